@@ -1,11 +1,18 @@
 import streamlit as st
-from src.config import PAGE_CONFIG, CUSTOM_CSS
+from src.config import PAGE_CONFIG, CUSTOM_CSS, WARM_UP_ON_START
+from src.utils.profiling_utils import start_rerun_profile, render_debug_panel
+from src.utils.startup_utils import start_warm_up
 
 # Configuração da página
 st.set_page_config(**PAGE_CONFIG)
 
 # Aplicar CSS customizado
 st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+start_rerun_profile()
+
+# Pré-carregar dados e bibliotecas pesadas em segundo plano enquanto a página inicial é mostrada
+if WARM_UP_ON_START:
+    start_warm_up()
 
 # Hero Section
 st.title("Through the Label 🧴✨")
@@ -77,5 +84,4 @@ with info_col4:
     if st.button("📊 View Dashboard", use_container_width=True, type="secondary"):
         st.switch_page("pages/4_Dashboard.py")
 
-
-
+render_debug_panel()
@@ -0,0 +1,39 @@
+"""
+Comparação de dois ficheiros de resultados de benchmarks
+
+Uso:
+
+    python -m benchmarks.compare benchmarks/results/bench-OLD.json benchmarks/results/bench-NEW.json
+"""
+
+import json
+import sys
+
+
+def load_results(path: str) -> tuple:
+    """Carrega um ficheiro de resultados indexado por (benchmark, tamanho)."""
+    with open(path, encoding="utf-8") as f:
+        report = json.load(f)
+    return report["commit"], {(r["name"], r["n_products"]): r for r in report["results"]}
+
+
+def compare(old_path: str, new_path: str) -> list:
+    """Retorna, para cada benchmark comum, a razão entre o tempo novo e o antigo."""
+    old_commit, old = load_results(old_path)
+    new_commit, new = load_results(new_path)
+
+    print(f"{'benchmark':<32} {'products':>10} {old_commit:>12} {new_commit:>12} {'ratio':>8}")
+    rows = []
+    for key in sorted(old.keys() & new.keys(), key=lambda k: (k[1], k[0])):
+        old_s, new_s = old[key]["median_s"], new[key]["median_s"]
+        ratio = new_s / old_s if old_s > 0 else float("inf")
+        rows.append({"name": key[0], "n_products": key[1], "old_s": old_s, "new_s": new_s, "ratio": ratio})
+        print(f"{key[0]:<32} {key[1]:>10,} {old_s * 1000:>10.2f}ms {new_s * 1000:>10.2f}ms {ratio:>7.2f}x")
+    return rows
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    compare(sys.argv[1], sys.argv[2])
@@ -0,0 +1,232 @@
+"""
+Benchmarks dos caminhos críticos de dados e recomendação
+
+Uso (a partir da raiz do repositório, sem acesso à rede):
+
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --sizes 1000 10000 --repeat 5
+
+Os resultados são gravados em JSON em benchmarks/results/ para comparação entre commits.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from src.config import DATA_PATHS
+from src.core.bitset import BitsetIndex
+from src.core.concerns import ConcernWeights
+from src.core.dedup import ProductClusters
+from src.core.index import CatalogIndex
+from src.core.ingredients import IngredientLookup
+from src.core.query import IngredientQuery, PostingBitmaps
+from src.core.recommend import recommend, recommend_ids
+from src.utils.cache_utils import get_dataset_store
+from src.utils.catalog_utils import get_catalog, get_query_engine, reset_catalog_watcher
+from src.utils.dashboard_utils import compute_advanced_stats, compute_brand_stats, compute_ingredient_stats
+from src.utils.ingredient_utils import get_ingredient_info, load_ingredient_data, parse_ingredient_list
+from src.utils.product_utils import load_products, recommend_products
+
+from benchmarks.synthetic import load_distributions, write_catalog
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Listas de ingredientes usadas nas consultas
+SAMPLE_INGREDIENT_TEXT = (
+    "Aqua, Glycerin, Niacinamide, Sodium Hyaluronate, Tocopherol, Cetearyl Alcohol, "
+    "Phenoxyethanol, Dimethicone, Parfum, Xanthan Gum, Citric Acid, Ethylhexylglycerin"
+)
+SAMPLE_LOOKUPS = ["glycerin", "niacinamide", "retinol", "hyaluronic", "dimethicon", "unknown ingredient"]
+# Filtro "com niacinamida, sem fragrância nem álcool" do Products page
+SAMPLE_QUERY = IngredientQuery(all_of=["niacinamide"], none_of=["parfum", "alcohol denat"])
+
+
+def time_call(func, repeat: int, setup=None) -> dict:
+    """Mede o tempo de parede de `func` em `repeat` execuções."""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "max_s": max(timings),
+        "repeat": repeat
+    }
+
+
+def peak_memory(func, setup=None) -> int:
+    """Mede o pico de memória alocada (bytes) numa execução de `func`."""
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_case(name: str, func, repeat: int, setup=None, measure_memory: bool = True) -> dict:
+    """Executa um benchmark e retorna tempos e pico de memória."""
+    result = {"name": name, **time_call(func, repeat, setup)}
+    if measure_memory:
+        result["peak_memory_bytes"] = peak_memory(func, setup)
+    print(f"  {name:<32} median {result['median_s'] * 1000:10.2f} ms")
+    return result
+
+
+def clear_loader(loader, path: str):
+    """Limpa o cache em memória de um loader e os artefactos persistidos do ficheiro `path`."""
+    loader.clear()
+    store = get_dataset_store()
+    if store is not None:
+        store.clear([path])
+
+
+@contextmanager
+def app_catalog(products_path: str, ingredients_path: str):
+    """Aponta o catálogo partilhado da app (DATA_PATHS e watcher) para outros ficheiros."""
+    saved = dict(DATA_PATHS)
+    DATA_PATHS.update(products=products_path, ingredients=ingredients_path)
+    reset_catalog_watcher()
+    try:
+        yield
+    finally:
+        DATA_PATHS.update(saved)
+        reset_catalog_watcher()
+
+
+def benchmark_size(n_products: int, repeat: int, workdir: str, distributions: dict) -> list:
+    """Executa todos os benchmarks para um catálogo sintético de `n_products` produtos."""
+    path = os.path.join(workdir, f"products_{n_products}.csv")
+    write_catalog(n_products, path, distributions=distributions)
+    # Cópia própria do dicionário, para não limpar os artefactos do ficheiro configurado
+    ingredients_path = os.path.join(workdir, "ingredients_dict.csv")
+    if not os.path.exists(ingredients_path):
+        shutil.copy(DATA_PATHS["ingredients"], ingredients_path)
+
+    products_df = load_products(path)
+    ingredients_df = load_ingredient_data(ingredients_path)
+    index = CatalogIndex.from_products(products_df)
+    query = parse_ingredient_list(SAMPLE_INGREDIENT_TEXT)
+    term_ids, n_query = index.encode(query)
+    bitsets = BitsetIndex.from_index(index)
+    posting_bitmaps = PostingBitmaps(index)
+    concern_weights = ConcernWeights.build(index.terms, IngredientLookup(ingredients_df))
+
+    cases = [
+        run_case("load_products", lambda: load_products(path), repeat,
+                 setup=lambda: clear_loader(load_products, path)),
+        run_case("load_products_persisted", lambda: load_products(path), repeat, setup=load_products.clear),
+        run_case("load_ingredient_data", lambda: load_ingredient_data(ingredients_path), repeat,
+                 setup=lambda: clear_loader(load_ingredient_data, ingredients_path)),
+    ]
+
+    # As funções públicas da app (recommend_products, get_ingredient_info) correm sobre o catálogo sintético
+    with app_catalog(path, ingredients_path):
+        get_catalog()
+        engine = get_query_engine()
+
+        cases += [
+            run_case("parse_ingredient_list", lambda: parse_ingredient_list(SAMPLE_INGREDIENT_TEXT), repeat),
+            run_case("get_ingredient_info", lambda: [get_ingredient_info(name) for name in SAMPLE_LOOKUPS], repeat),
+            run_case("build_catalog_index", lambda: CatalogIndex.from_products(products_df), repeat),
+            run_case("recommend_products", lambda: recommend_products(query, top_k=5), repeat,
+                     setup=engine.clear_cache),
+            run_case("recommend_products_cached", lambda: recommend_products(query, top_k=5), repeat),
+            # O núcleo de recommend_products com um índice já construído
+            run_case("recommend_index", lambda: recommend(products_df, index, query, top_k=5), repeat),
+            # Jaccard com posting lists vs. matriz de bits + popcount (SIMILARITY_BACKEND)
+            run_case("build_bitset_index", lambda: BitsetIndex.from_index(index), repeat),
+            run_case("jaccard_postings", lambda: index.jaccard_from_ids(term_ids, n_query), repeat),
+            run_case("jaccard_bitset", lambda: bitsets.jaccard_from_ids(term_ids, n_query), repeat),
+            run_case("recommend_index_bitset", lambda: recommend_ids(index, term_ids, n_query, 5, bitsets), repeat),
+            run_case("build_product_clusters", lambda: ProductClusters.build(index), repeat),
+            run_case("ingredient_query", lambda: SAMPLE_QUERY.rows(index, posting_bitmaps), repeat),
+            run_case("concern_scores", lambda: concern_weights.scores(index, ["Acne", "Wrinkles"], "Oily"), repeat),
+            run_case("dashboard_ingredient_stats", lambda: compute_ingredient_stats(products_df), repeat),
+            run_case("dashboard_brand_stats", lambda: compute_brand_stats(products_df), repeat),
+            run_case("dashboard_advanced_stats", lambda: compute_advanced_stats(products_df, ingredients_df), repeat),
+        ]
+
+    for case in cases:
+        case["n_products"] = n_products
+
+    clear_loader(load_products, path)
+    clear_loader(load_ingredient_data, ingredients_path)
+    os.remove(path)
+    return cases
+
+
+def git_commit() -> str:
+    """Retorna o commit atual (ou "unknown" fora de um repositório git)."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv: list = None) -> str:
+    parser = argparse.ArgumentParser(description="Benchmarks of the data and recommendation hot paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="catalog sizes to generate")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark")
+    parser.add_argument("--output", default=None, help="JSON output file (default: benchmarks/results/)")
+    args = parser.parse_args(argv)
+
+    # Fora do runtime do Streamlit os caches avisam em cada chamada
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    commit = git_commit()
+    distributions = load_distributions()
+    results = []
+
+    with tempfile.TemporaryDirectory(prefix="ttl-bench-") as workdir:
+        for n_products in args.sizes:
+            print(f"{n_products:,} products")
+            results.extend(benchmark_size(n_products, args.repeat, workdir, distributions))
+
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "sizes": args.sizes,
+        "results": results
+    }
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"bench-{commit}-{stamp}.json")
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Results written to {output}")
+    return output
+
+
+if __name__ == "__main__":
+    main()
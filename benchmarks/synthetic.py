@@ -0,0 +1,63 @@
+"""
+Geração de catálogos sintéticos a partir das distribuições de data/products.csv
+"""
+
+import ast
+
+import numpy as np
+import pandas as pd
+
+from src.config import DATA_PATHS
+
+
+def load_distributions(path: str = DATA_PATHS["products"]) -> dict:
+    """Extrai do catálogo real as distribuições usadas para gerar dados sintéticos."""
+    df = pd.read_csv(path)
+    lists = df["clean_ingreds"].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else [])
+    lists = lists.apply(lambda lst: [ing.strip().lower() for ing in lst])
+
+    ingredient_counts = lists.explode().dropna().value_counts()
+    type_counts = df["product_type"].value_counts()
+
+    return {
+        "ingredients": ingredient_counts.index.to_numpy(),
+        "ingredient_probs": (ingredient_counts / ingredient_counts.sum()).to_numpy(),
+        "lengths": lists.apply(len).to_numpy(),
+        "types": type_counts.index.to_numpy(),
+        "type_probs": (type_counts / type_counts.sum()).to_numpy(),
+        "prices": df["price"].dropna().to_numpy()
+    }
+
+
+def generate_catalog(n_products: int, seed: int = 42, distributions: dict = None) -> pd.DataFrame:
+    """Gera um catálogo com `n_products` produtos no mesmo formato de products.csv.
+
+    O número de ingredientes por produto, os ingredientes (pela sua frequência),
+    os tipos e os preços são reamostrados do catálogo real.
+    """
+    dist = distributions or load_distributions()
+    rng = np.random.default_rng(seed)
+
+    lengths = rng.choice(dist["lengths"], size=n_products)
+    ingredient_ids = rng.choice(len(dist["ingredients"]), size=int(lengths.sum()), p=dist["ingredient_probs"])
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    names = dist["ingredients"]
+
+    clean_ingreds = [
+        str([names[i] for i in dict.fromkeys(ingredient_ids[offsets[k]:offsets[k + 1]])])
+        for k in range(n_products)
+    ]
+
+    return pd.DataFrame({
+        "product_name": [f"Synthetic Product {k}" for k in range(n_products)],
+        "product_url": [f"https://example.com/products/{k}.html" for k in range(n_products)],
+        "product_type": rng.choice(dist["types"], size=n_products, p=dist["type_probs"]),
+        "clean_ingreds": clean_ingreds,
+        "price": rng.choice(dist["prices"], size=n_products)
+    })
+
+
+def write_catalog(n_products: int, path: str, seed: int = 42, distributions: dict = None) -> str:
+    """Gera um catálogo sintético e grava-o em CSV."""
+    generate_catalog(n_products, seed=seed, distributions=distributions).to_csv(path, index=False)
+    return path
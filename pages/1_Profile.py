@@ -1,16 +1,21 @@
 import streamlit as st
-import plotly.graph_objects as go
-import pandas as pd
 from src.config import (
     PAGE_CONFIG, CUSTOM_CSS, SKIN_TYPES, AGE_GROUPS, SKIN_CONCERNS,
     SENSITIVITY_LEVELS, FRAGRANCE_PREFERENCES, CLIMATE_OPTIONS,
     SUN_EXPOSURE_OPTIONS, BUDGET_MIN, BUDGET_MAX, BUDGET_DEFAULT, DATA_PATHS
 )
+from src.utils.profiling_utils import start_rerun_profile, render_debug_panel
 from src.utils import load_products
+from src.utils.product_utils import profile_recommendations
+from src.utils.catalog_utils import PROFILE_SPACE
+from src.utils.startup_utils import lazy_import
+
+go = lazy_import("plotly.graph_objects")
 
 # Page configuration
 st.set_page_config(**PAGE_CONFIG)
 st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+start_rerun_profile()
 
 st.title("🧬 Your Skin Profile")
 st.caption("Tell us about your skin to get personalized recommendations")
@@ -113,57 +118,15 @@ if st.session_state.get("profile"):
         df_products = load_products(DATA_PATHS["products"])
         
         if not df_products.empty:
-            # Filtrar produtos baseado no perfil
-            filtered_products = df_products.copy()
-            
-            # Filtrar por tipo de pele (se houver coluna relevante)
-            skin_type = profile.get('skin_type', '').lower()
-            concerns = [c.lower() for c in profile.get('concerns', [])]
             budget = profile.get('budget', BUDGET_DEFAULT)
             
-            # Filtrar por orçamento
-            if 'price' in filtered_products.columns:
-                # Converter preços para numérico
-                filtered_products['price_numeric'] = filtered_products['price'].str.replace('£', '').str.replace(',', '').astype(float)
-                filtered_products = filtered_products[filtered_products['price_numeric'] <= budget]
-            
-            # Pontuação baseada nas preocupações
-            if concerns and 'product_name' in filtered_products.columns:
-                def score_product(row):
-                    score = 0
-                    product_name = str(row.get('product_name', '')).lower()
-                    product_type = str(row.get('product_type', '')).lower()
-                    
-                    # Palavras-chave para cada preocupação
-                    concern_keywords = {
-                        'acne': ['acne', 'salicylic', 'bha', 'clarifying', 'purifying'],
-                        'aging': ['anti-aging', 'retinol', 'peptide', 'collagen', 'wrinkle'],
-                        'hyperpigmentation': ['brightening', 'vitamin c', 'niacinamide', 'dark spot', 'pigment'],
-                        'redness': ['calming', 'soothing', 'centella', 'redness', 'sensitive'],
-                        'dryness': ['hydrating', 'moisturizing', 'hyaluronic', 'ceramide', 'barrier'],
-                        'dullness': ['brightening', 'glow', 'vitamin c', 'exfoliat', 'radiance'],
-                        'dark circles': ['eye', 'caffeine', 'dark circle', 'under-eye', 'brightening'],
-                        'large pores': ['pore', 'refining', 'minimizing', 'niacinamide', 'aha'],
-                        'oiliness': ['oil control', 'mattifying', 'sebum', 'balancing', 'clay']
-                    }
-                    
-                    for concern in concerns:
-                        keywords = concern_keywords.get(concern, [])
-                        for keyword in keywords:
-                            if keyword in product_name or keyword in product_type:
-                                score += 2
-                    
-                    # Bonus para tipo de pele
-                    if skin_type and skin_type in product_name:
-                        score += 1
-                    
-                    return score
-                
-                filtered_products['relevance_score'] = filtered_products.apply(score_product, axis=1)
-                filtered_products = filtered_products.sort_values('relevance_score', ascending=False)
+            # Sensibilidade e fragrância excluem produtos pelas flags dos seus ingredientes
+            excluded_flags = PROFILE_SPACE.excluded_flags(profile.get('sensitivity'), profile.get('fragrance'))
+            if excluded_flags:
+                st.caption(f"🚫 Excluding products with: {', '.join(f.replace('_', ' ') for f in excluded_flags)}")
             
-            # Mostrar top 5 recomendações
-            top_recommendations = filtered_products.head(5)
+            # Top 5 lido da tabela pré-calculada para todas as combinações de perfil (corte por orçamento)
+            top_recommendations = profile_recommendations(profile, budget)
             
             if len(top_recommendations) > 0:
                 for idx, (_, product) in enumerate(top_recommendations.iterrows(), 1):
@@ -183,7 +146,7 @@ if st.session_state.get("profile"):
                             
                             # Mostrar por que foi recomendado
                             if 'relevance_score' in product and product['relevance_score'] > 0:
-                                st.markdown(f"✨ *Match score:* {int(product['relevance_score'])} points")
+                                st.markdown(f"✨ *Match score:* {product['relevance_score']:.1f} points")
                             
                             if 'product_url' in product and product['product_url']:
                                 st.markdown(f"[View Product]({product['product_url']})")
@@ -304,3 +267,4 @@ with col_nav2:
     if st.button("🧴 Browse Products", use_container_width=True):
         st.switch_page("pages/2_Products.py")
 
+render_debug_panel()
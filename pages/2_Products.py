@@ -1,27 +1,23 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from src.config import PAGE_CONFIG, CUSTOM_CSS, DATA_PATHS
+from src.config import PAGE_CONFIG, CUSTOM_CSS, DATA_PATHS, COMPARE_MAX_PRODUCTS
+from src.utils.profiling_utils import start_rerun_profile, render_debug_panel
+from src.utils import load_products
+from src.utils.product_utils import (
+    ingredient_filter, ingredient_options, product_variants, similar_products, variant_filter
+)
+from src.utils.visualization_utils import get_cached_figure
 
 # Page configuration
 st.set_page_config(**PAGE_CONFIG)
 st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+start_rerun_profile()
 
 st.title("🧴 Product Catalog")
 st.caption("Browse our curated skincare product database")
 
 # Load data with cache
-@st.cache_data
-def load_products():
-    try:
-        df = pd.read_csv(DATA_PATHS["products"])
-        return df
-    except Exception as e:
-        st.error(f"Error loading products: {e}")
-        return pd.DataFrame()
-
-df = load_products()
+df = load_products(DATA_PATHS["products"])
 
 if df.empty:
     st.warning("No products found in database.")
@@ -47,7 +43,9 @@ with col3:
         st.metric("Brands", "N/A")
 
 with col4:
-    st.metric("Categories", "Multiple")
+    # Tamanhos/variantes da mesma formulação contam uma vez
+    formulations = variant_filter().reindex(df.index, fill_value=False)
+    st.metric("Formulations", int(formulations.sum()))
 
 # Visualizações do banco de dados
 st.divider()
@@ -57,58 +55,22 @@ tab1, tab2, tab3 = st.tabs(["📊 Product Types", "🏢 Brands", "📋 Data Tabl
 
 with tab1:
     if 'product_type' in df.columns:
-        type_counts = df['product_type'].value_counts().head(10)
-        
-        fig_types = px.bar(
-            x=type_counts.values,
-            y=type_counts.index,
-            orientation='h',
-            title="Top 10 Product Types",
-            labels={'x': 'Quantity', 'y': 'Product Type'},
-            color=type_counts.values,
-            color_continuous_scale='Blues'
-        )
-        fig_types.update_layout(height=500, showlegend=False)
+        fig_types = get_cached_figure("product_types_bar", df, top_n=10)
         st.plotly_chart(fig_types, use_container_width=True)
         
         # Pizza chart
-        fig_pie = px.pie(
-            values=type_counts.values,
-            names=type_counts.index,
-            title="Product Type Distribution",
-            hole=0.4
-        )
+        fig_pie = get_cached_figure("product_types_pie", df, top_n=10)
         st.plotly_chart(fig_pie, use_container_width=True)
     else:
         st.info("Product type data not available")
 
 with tab2:
     if 'brand_name' in df.columns:
-        brand_counts = df['brand_name'].value_counts().head(15)
-        
-        fig_brands = px.bar(
-            x=brand_counts.index,
-            y=brand_counts.values,
-            title="Top 15 Brands by Product Count",
-            labels={'x': 'Brand', 'y': 'Number of Products'},
-            color=brand_counts.values,
-            color_continuous_scale='Viridis'
-        )
-        fig_brands.update_layout(
-            height=500,
-            xaxis_tickangle=-45,
-            showlegend=False
-        )
+        fig_brands = get_cached_figure("brand_bar", df, top_n=15)
         st.plotly_chart(fig_brands, use_container_width=True)
         
         # Treemap
-        fig_tree = px.treemap(
-            names=brand_counts.index,
-            parents=["" for _ in brand_counts.index],
-            values=brand_counts.values,
-            title="Brand Distribution (Treemap)"
-        )
-        fig_tree.update_layout(height=500)
+        fig_tree = get_cached_figure("brand_treemap", df, top_n=15)
         st.plotly_chart(fig_tree, use_container_width=True)
     else:
         st.info("Brand data not available")
@@ -142,8 +104,28 @@ with filter_col2:
     else:
         selected_brand = 'All'
 
+# Filter by ingredients
+ingredient_col1, ingredient_col2 = st.columns(2)
+options = ingredient_options()
+
+with ingredient_col1:
+    include_ingredients = st.multiselect(
+        "✅ Must include", options, placeholder="e.g. niacinamide",
+        help="Only products containing all of these ingredients"
+    )
+
+with ingredient_col2:
+    exclude_ingredients = st.multiselect(
+        "🚫 Must not include", options, placeholder="e.g. parfum, alcohol denat",
+        help="Hide products containing any of these ingredients"
+    )
+
 # Search by name
 search_query = st.text_input("🔎 Search by product name", placeholder="Enter product name...")
+collapse_variants = st.checkbox(
+    "Show one product per formulation", value=True,
+    help="Hide other sizes/variants with the same ingredient list; they are listed on each card"
+)
 
 # Apply filters
 filtered_df = df.copy()
@@ -154,9 +136,16 @@ if selected_type != 'All' and 'product_type' in df.columns:
 if selected_brand != 'All' and 'brand_name' in df.columns:
     filtered_df = filtered_df[filtered_df['brand_name'] == selected_brand]
 
+if include_ingredients or exclude_ingredients:
+    matches = ingredient_filter(include_ingredients, exclude_ingredients)
+    filtered_df = filtered_df[matches.reindex(filtered_df.index, fill_value=False)]
+
 if search_query and 'product_name' in df.columns:
     filtered_df = filtered_df[filtered_df['product_name'].str.contains(search_query, case=False, na=False)]
 
+if collapse_variants:
+    filtered_df = filtered_df[formulations.reindex(filtered_df.index, fill_value=False)]
+
 st.markdown(f"### 📦 Products ({len(filtered_df)} found)")
 
 # View options
@@ -190,6 +179,21 @@ else:
                     
                     st.markdown(f"**{product_name}**")
                     st.caption(f"Brand: {brand_name} | Type: {product_type}")
+                    
+                    # Mesma formulação noutros tamanhos (agrupados na ingestão)
+                    variants = product_variants(idx)
+                    if not variants.empty:
+                        st.caption("📏 Also available as: " + " · ".join(variants['product_name'].astype(str)))
+                    
+                    # Produtos semelhantes: vizinhos pré-calculados com o catálogo (sem varrer o catálogo por card)
+                    similar = similar_products(idx, top_k=3)
+                    if not similar.empty:
+                        links = [
+                            f"[{s['product_name']}]({s['product_url']}) ({s['similarity'] * 100:.0f}%)"
+                            if pd.notna(s.get('product_url')) else f"{s['product_name']} ({s['similarity'] * 100:.0f}%)"
+                            for _, s in similar.iterrows()
+                        ]
+                        st.caption("🔗 Similar: " + " · ".join(links))
                 
                 with col_b:
                     if 'product_url' in row and pd.notna(row['product_url']):
@@ -197,6 +201,34 @@ else:
                 
                 st.divider()
 
+# Comparação lado a lado: Jaccard par a par e presença de ingredientes
+st.markdown("### ⚖️ Compare Products")
+compare_rows = st.multiselect(
+    "Products to compare",
+    filtered_df.index.tolist() if len(filtered_df) else df.index.tolist(),
+    format_func=lambda i: df.at[i, 'product_name'] if 'product_name' in df.columns else str(i),
+    max_selections=COMPARE_MAX_PRODUCTS,
+    placeholder=f"Pick 2 to {COMPARE_MAX_PRODUCTS} products (options follow the filters above)"
+)
+
+if len(compare_rows) < 2:
+    st.info("Select at least two products to compare their ingredients.")
+else:
+    compare_key = tuple(sorted(compare_rows))
+    tab_similarity, tab_presence = st.tabs(["🟩 Similarity Matrix", "🧪 Ingredient Presence"])
+    
+    with tab_similarity:
+        fig_similarity = get_cached_figure("similarity_heatmap", df, rows=compare_key)
+        if fig_similarity is not None:
+            st.plotly_chart(fig_similarity, use_container_width=True)
+    
+    with tab_presence:
+        fig_presence = get_cached_figure("ingredient_presence", df, rows=compare_key)
+        if fig_presence is not None:
+            st.plotly_chart(fig_presence, use_container_width=True)
+
+st.divider()
+
 # Navigation
 st.markdown("### 🧭 Navigation")
 col_nav1, col_nav2 = st.columns(2)
@@ -208,3 +240,5 @@ with col_nav1:
 with col_nav2:
     if st.button("🔍 Analyze Ingredients", use_container_width=True):
         st.switch_page("pages/3_IngredientAnalysis.py")
+
+render_debug_panel()
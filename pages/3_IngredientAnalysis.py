@@ -1,11 +1,13 @@
 import streamlit as st
 import pandas as pd
 from src.config import PAGE_CONFIG, CUSTOM_CSS
-from src.utils import parse_ingredient_list, get_ingredient_info, recommend_products
+from src.utils.profiling_utils import start_rerun_profile, render_debug_panel
+from src.utils import parse_ingredient_list, resolve_ingredient, recommend_products
 
 # Page configuration
 st.set_page_config(**PAGE_CONFIG)
 st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+start_rerun_profile()
 
 st.title("🔍 Ingredient Analysis")
 st.caption("Understand what's in your skincare products")
@@ -75,16 +77,26 @@ if analyze_btn:
             st.markdown("### 📊 Detailed Analysis")
             
             found_count = 0
+            corrected_count = 0
             not_found = []
+            found_infos = []
             
             for ing in ingredients:
-                info = get_ingredient_info(ing)
+                match = resolve_ingredient(ing)
+                info = match["info"]
                 
                 if info is None:
-                    not_found.append(ing.title())
+                    not_found.append((ing.title(), [s["name"] for s in match["suggestions"]]))
                 else:
                     found_count += 1
-                    with st.expander(f"✓ {info['name']}", expanded=False):
+                    found_infos.append((ing, info))
+                    title = f"✓ {info['name']}"
+                    if match["corrected_to"]:
+                        corrected_count += 1
+                        title += f" (from \"{ing}\")"
+                    with st.expander(title, expanded=False):
+                        if match["corrected_to"]:
+                            st.caption(f"✏️ \"{ing}\" looks like a misspelling of **{match['corrected_to']}**")
                         if info.get("short_description"):
                             st.markdown(f"*{info['short_description']}*")
                             st.write("")
@@ -112,7 +124,11 @@ if analyze_btn:
             if not_found:
                 with st.expander(f"⚠️ Ingredients not in database ({len(not_found)})", expanded=False):
                     st.write("The following ingredients were not found in our database:")
-                    st.write(", ".join(not_found))
+                    for name, suggestions in not_found:
+                        if suggestions:
+                            st.markdown(f"- **{name}**, did you mean: {', '.join(suggestions)}?")
+                        else:
+                            st.markdown(f"- **{name}**")
             
             # Métricas
             st.divider()
@@ -122,15 +138,17 @@ if analyze_btn:
             with met_col1:
                 st.metric("Total Ingredients", len(ingredients))
             with met_col2:
-                st.metric("In Database", found_count)
+                st.metric("In Database", found_count,
+                          delta=f"{corrected_count} spelling corrected" if corrected_count else None,
+                          delta_color="off")
             with met_col3:
                 coverage = (found_count/len(ingredients)*100) if len(ingredients) > 0 else 0
                 st.metric("Coverage", f"{coverage:.0f}%")
             
             # Gráfico de cobertura
             coverage_data = {
-                'Category': ['Found in Database', 'Not Found'],
-                'Count': [found_count, len(not_found)]
+                'Category': ['Found in Database', 'Spelling Corrected', 'Not Found'],
+                'Count': [found_count - corrected_count, corrected_count, len(not_found)]
             }
             
             import plotly.express as px
@@ -140,7 +158,7 @@ if analyze_btn:
                 names='Category',
                 title='Ingredient Database Coverage',
                 color='Category',
-                color_discrete_map={'Found in Database': '#10b981', 'Not Found': '#ef4444'},
+                color_discrete_map={'Found in Database': '#10b981', 'Spelling Corrected': '#f59e0b', 'Not Found': '#ef4444'},
                 hole=0.4
             )
             fig_coverage.update_layout(height=400)
@@ -151,15 +169,13 @@ if analyze_btn:
                 st.markdown("### 📋 Ingredient Comparison Table")
                 
                 ingredient_data = []
-                for ing in ingredients:
-                    info = get_ingredient_info(ing)
-                    if info:
-                        ingredient_data.append({
-                            'Ingredient': info.get('name', ing),
-                            'Category': (info.get('what_is_it', 'N/A')[:40] + '...') if len(info.get('what_is_it', '')) > 40 else info.get('what_is_it', 'N/A'),
-                            'Main Benefit': (info.get('what_does_it_do', 'N/A')[:50] + '...') if len(info.get('what_does_it_do', '')) > 50 else info.get('what_does_it_do', 'N/A'),
-                            'Good For': (info.get('who_is_it_good_for', 'N/A')[:40] + '...') if len(info.get('who_is_it_good_for', '')) > 40 else info.get('who_is_it_good_for', 'N/A')
-                        })
+                for ing, info in found_infos:
+                    ingredient_data.append({
+                        'Ingredient': info.get('name', ing),
+                        'Category': (info.get('what_is_it', 'N/A')[:40] + '...') if len(info.get('what_is_it', '')) > 40 else info.get('what_is_it', 'N/A'),
+                        'Main Benefit': (info.get('what_does_it_do', 'N/A')[:50] + '...') if len(info.get('what_does_it_do', '')) > 50 else info.get('what_does_it_do', 'N/A'),
+                        'Good For': (info.get('who_is_it_good_for', 'N/A')[:40] + '...') if len(info.get('who_is_it_good_for', '')) > 40 else info.get('who_is_it_good_for', 'N/A')
+                    })
                 
                 if ingredient_data:
                     import pandas as pd
@@ -173,7 +189,7 @@ if analyze_btn:
                 st.caption("Products with similar ingredient profiles")
                 
                 try:
-                    recs = recommend_products(ingredients, top_k=5)
+                    recs = recommend_products(ingredients, top_k=5, explain=True)
                     
                     if len(recs) == 0:
                         st.info("No similar products found in our database.")
@@ -209,6 +225,13 @@ if analyze_btn:
                                 with col1:
                                     st.markdown(f"**{row['product_name']}**")
                                     st.caption(f"{row['product_type']} | Match: {row['similarity']*100:.1f}%")
+                                    
+                                    # Ingredientes em comum e diferentes (calculados com a recomendação)
+                                    shared = row['shared_ingredients']
+                                    with st.expander(f"🧩 {len(shared)} shared ingredients"):
+                                        st.markdown(f"**✅ Shared:** {', '.join(shared) or '—'}")
+                                        st.markdown(f"**➖ Only in your list:** {', '.join(row['only_in_query']) or '—'}")
+                                        st.markdown(f"**➕ Only in this product:** {', '.join(row['only_in_product']) or '—'}")
                                 
                                 with col2:
                                     if pd.notna(row.get('product_url')):
@@ -230,3 +253,5 @@ with col_nav1:
 with col_nav2:
     if st.button("🧴 Browse Products", use_container_width=True):
         st.switch_page("pages/2_Products.py")
+
+render_debug_panel()
@@ -16,6 +16,51 @@ DATA_PATHS = {
     "products": "data/products.csv"
 }
 
+# Configurações de cache
+FIGURE_CACHE_SIZE = 64
+# Backend dos loaders de dados: "auto" (Streamlit quando a app corre, memória nos scripts),
+# "memory", "disk" ou "streamlit"
+CACHE_BACKEND = "auto"
+CACHE_TTL_SECONDS = 3600
+CACHE_DIR = ".cache"
+# Cache persistente dos CSVs processados e dos índices (chave: hash do conteúdo + versão do código)
+PERSISTENT_CACHE = True
+DATASET_CACHE_DIR = ".cache/datasets"
+# Recarregamento automático: os CSVs são verificados em segundo plano a cada N segundos
+HOT_RELOAD = True
+RELOAD_POLL_SECONDS = 2.0
+# Consultas concorrentes: pool limitado (0 = na thread de cada sessão) e agrupamento de consultas iguais
+QUERY_WORKERS = 0
+QUERY_COALESCE = True
+# Cache de resultados das recomendações (política "lru" ou "lfu"; 0 desativa)
+RECOMMENDATION_CACHE_SIZE = 1024
+RECOMMENDATION_CACHE_POLICY = "lfu"
+# Jaccard das recomendações: "postings" (listas invertidas) ou "bitset" (matriz de bits + popcount)
+SIMILARITY_BACKEND = "postings"
+
+# Limites dos gráficos (número máximo de barras/fatias/retângulos por gráfico)
+MAX_CHART_MARKS = 100
+OTHER_LABEL = "Other"
+# Comparação de produtos (Products page): máximo de produtos no heatmap N×N
+COMPARE_MAX_PRODUCTS = 50
+
+# Arranque: módulos pesados pré-carregados em segundo plano após o boot
+WARM_UP_ON_START = True
+HEAVY_MODULES = ["pandas", "numpy", "plotly.express", "plotly.graph_objects", "plotly.io"]
+
+# Instrumentação: painel de debug ativado com ?debug=1 ou TTL_DEBUG=1
+DEBUG_ENV_VAR = "TTL_DEBUG"
+PROFILE_LOG_DIR = "logs"
+
+# Serviço HTTP local (python -m src.service.server)
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+SERVICE_WORKERS = 4
+SERVICE_MAX_BATCH = 64
+SERVICE_MAX_BODY_BYTES = 1_000_000
+# POST /catalog/delta altera o catálogo sem autenticação: só ativar em redes de confiança
+SERVICE_ENABLE_DELTA = False
+
 # Opções de perfil
 SKIN_TYPES = ["Oily", "Dry", "Combination", "Normal", "Sensitive"]
 
@@ -37,12 +82,27 @@ SKIN_CONCERNS = [
 
 SENSITIVITY_LEVELS = ["Low", "Medium", "High"]
 
+# Flags de ingredientes (ver src/core/flags.py) excluídas pela sensibilidade e pela preferência de fragrância
+SENSITIVITY_EXCLUDED_FLAGS = {
+    "Low": [],
+    "Medium": ["drying_alcohol"],
+    "High": ["fragrance", "drying_alcohol", "allergen"]
+}
+
 FRAGRANCE_PREFERENCES = [
     "No preference",
     "Fragrance-free",
     "Light fragrance OK"
 ]
 
+FRAGRANCE_EXCLUDED_FLAGS = {
+    "Fragrance-free": ["fragrance"]
+}
+
+# Recomendações do perfil: pré-calculadas para todas as combinações (python -m src.core.profiles)
+PROFILE_MAX_CONCERNS = 3
+PROFILE_TOP_N = 5
+
 CLIMATE_OPTIONS = ["Cold", "Moderate", "Hot"]
 
 SUN_EXPOSURE_OPTIONS = ["Mostly indoors", "Mixed", "Mostly outdoors"]
@@ -0,0 +1,32 @@
+"""
+Framework-free core: data loading, catalog index and recommendations
+
+Nothing in this package imports Streamlit, so it can be reused by the HTTP
+service and by batch jobs.
+"""
+
+import importlib
+
+# Tal como em src.utils, os submódulos só são importados quando usados
+_LAZY_EXPORTS = {
+    'Catalog': 'catalog',
+    'load_catalog': 'catalog',
+    'CatalogWatcher': 'watcher',
+    'QueryEngine': 'engine',
+    'CatalogIndex': 'index',
+    'DatasetStore': 'store',
+    'IngredientLookup': 'ingredients',
+    'parse_ingredient_list': 'ingredients',
+    'read_products': 'data',
+    'read_ingredients': 'data',
+    'recommend': 'recommend'
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        module = importlib.import_module(f".{_LAZY_EXPORTS[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,37 @@
+"""
+Análise completa de uma lista de ingredientes (usada pelo serviço HTTP)
+"""
+
+from src.core.catalog import Catalog
+from src.core.ingredients import parse_ingredient_list
+
+
+def analyze_ingredients(catalog: Catalog, text: str, top_k: int = 5, engine=None, explain: bool = False) -> dict:
+    """Analisa uma lista de ingredientes: informação de cada um, cobertura e produtos semelhantes.
+
+    Com `explain`, cada recomendação traz os ingredientes em comum e os diferentes.
+    """
+    ingredients = parse_ingredient_list(text)
+
+    found = []
+    not_found = []
+    suggestions = {}
+    for ing in ingredients:
+        match = catalog.resolve_ingredient(ing)
+        if match["info"] is None:
+            not_found.append(ing)
+            suggestions[ing] = [s["name"] for s in match["suggestions"]]
+        else:
+            found.append({"query": ing, **match["info"], "corrected_to": match["corrected_to"]})
+
+    # Nomes corrigidos automaticamente contam como reconhecidos
+    coverage = len(found) / len(ingredients) * 100 if ingredients else 0.0
+
+    return {
+        "ingredients": ingredients,
+        "found": found,
+        "not_found": not_found,
+        "suggestions": suggestions,
+        "coverage": coverage,
+        "recommendations": catalog.recommend_records(ingredients, top_k, engine, explain)
+    }
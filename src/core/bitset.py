@@ -0,0 +1,110 @@
+"""
+Conjuntos de ingredientes em bits (uint64) e Jaccard por popcount, alternativa às posting lists
+"""
+
+import numpy as np
+
+from src.core.index import CatalogIndex
+
+# Acima deste vocabulário a matriz de bits deixa de compensar (memória = produtos × termos / 8 bytes)
+MAX_TERMS = 8192
+
+# `np.bitwise_count` só existe no NumPy >= 2.0; antes disso o popcount usa uma tabela por byte
+HAS_BITWISE_COUNT = hasattr(np, "bitwise_count")
+_BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(words: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """Número de bits ligados de cada palavra uint64 (em `out`, uint8)."""
+    if HAS_BITWISE_COUNT:
+        return np.bitwise_count(words, out=out)
+    per_byte = _BYTE_POPCOUNT[words.view(np.uint8)].reshape(len(words), 8)
+    return per_byte.sum(axis=1, dtype=np.uint8, out=out)
+
+
+class BitsetIndex:
+    """Matriz de bits compacta (n_palavras × n_produtos, uint64) com os ingredientes de cada produto.
+
+    Cada ingrediente ocupa um bit; os mais frequentes ficam nas primeiras palavras, para
+    que uma consulta típica toque em poucas. A palavra `w` de todos os produtos é
+    contígua em memória, por isso o Jaccard de uma consulta contra o catálogo inteiro é,
+    por cada palavra da consulta, um `bitwise_and` vetorizado seguido de popcount
+    (`np.bitwise_count`, ou uma tabela por byte no NumPy 1.x). Dá os mesmos resultados
+    que `CatalogIndex.jaccard_from_ids`.
+    """
+
+    def __init__(self, bits: np.ndarray, bit_of: np.ndarray, sizes: np.ndarray):
+        self.bits = bits
+        self.bit_of = bit_of
+        self.sizes = sizes
+        self.n_products = bits.shape[1]
+
+    @staticmethod
+    def _set_bits(bits: np.ndarray, index: CatalogIndex, bit_of: np.ndarray, start: int = 0):
+        """Liga os bits dos ingredientes dos produtos a partir da linha `start`."""
+        rows = np.repeat(np.arange(start, index.n_products, dtype=np.int64), index.sizes[start:])
+        positions = bit_of[index.indices[index.indptr[start]:]]
+        words = (positions >> 6).astype(np.int64)
+        masks = np.left_shift(np.uint64(1), (positions & 63).astype(np.uint64))
+        np.bitwise_or.at(bits, (words, rows), masks)
+
+    @classmethod
+    def from_index(cls, index: CatalogIndex) -> "BitsetIndex":
+        """Constrói a matriz a partir do índice, com os bits ordenados pela frequência dos ingredientes."""
+        bit_of = np.empty(index.n_terms, dtype=np.int32)
+        bit_of[np.argsort(-index.document_frequencies(), kind="stable")] = np.arange(index.n_terms, dtype=np.int32)
+        bits = np.zeros(((index.n_terms + 63) // 64, index.n_products), dtype=np.uint64)
+        cls._set_bits(bits, index, bit_of)
+        return cls(bits, bit_of, index.sizes)
+
+    def extended(self, index: CatalogIndex) -> "BitsetIndex":
+        """Matriz para um índice com produtos removidos e acrescentados no fim (ver `CatalogIndex.apply_changes`).
+
+        Os ingredientes novos recebem os bits seguintes e só as colunas novas são preenchidas.
+        """
+        n_old = len(self.bit_of)
+        bit_of = np.concatenate([self.bit_of, np.arange(n_old, index.n_terms, dtype=np.int32)])
+        bits = np.zeros(((index.n_terms + 63) // 64, index.n_products), dtype=np.uint64)
+        bits[:self.bits.shape[0], :self.n_products] = self.bits
+        # Tombstones ficam sem ingredientes, tal como no índice
+        bits[:, :self.n_products][:, ~index.live_mask()[:self.n_products]] = 0
+        self._set_bits(bits, index, bit_of, start=self.n_products)
+        return BitsetIndex(bits, bit_of, index.sizes)
+
+    def query_words(self, term_ids: np.ndarray) -> tuple:
+        """(palavras, máscaras) da consulta: só as palavras com algum bit ligado."""
+        positions = self.bit_of[np.asarray(term_ids, dtype=np.int64)]
+        words = positions >> 6
+        masks = np.left_shift(np.uint64(1), (positions & 63).astype(np.uint64))
+        if not len(words):
+            return words, masks
+        order = np.argsort(words, kind="stable")
+        words, masks = words[order], masks[order]
+        starts = np.flatnonzero(np.r_[True, words[1:] != words[:-1]])
+        return words[starts], np.bitwise_or.reduceat(masks, starts)
+
+    def intersection_counts(self, term_ids: np.ndarray) -> np.ndarray:
+        """Número de ingredientes em comum entre a consulta e cada produto (popcount de AND)."""
+        # Cada palavra contribui no máximo 64; com menos de 256 bits na consulta chega uint8
+        dtype = np.uint8 if len(term_ids) < 256 else np.int32
+        counts = np.zeros(self.n_products, dtype=dtype)
+        scratch = np.empty(self.n_products, dtype=np.uint64)
+        bit_counts = np.empty(self.n_products, dtype=np.uint8)
+        for word, mask in zip(*self.query_words(term_ids)):
+            np.bitwise_and(self.bits[word], mask, out=scratch)
+            np.add(counts, popcount(scratch, out=bit_counts), out=counts, casting="unsafe")
+        return counts
+
+    def jaccard_from_ids(self, term_ids: np.ndarray, n_query: int) -> np.ndarray:
+        """Jaccard a partir de ids do `CatalogIndex` (`n_query` conta também ingredientes desconhecidos).
+
+        A união sai de |A ∪ B| = |A| + |B| - |A ∩ B|, sem percorrer as palavras que a consulta não toca.
+        """
+        scores = np.zeros(self.n_products, dtype=np.float64)
+        if n_query == 0:
+            return scores
+
+        intersection = self.intersection_counts(term_ids)
+        union = n_query + self.sizes - intersection
+        np.divide(intersection, union, out=scores, where=self.sizes > 0)
+        return scores
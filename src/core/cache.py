@@ -0,0 +1,286 @@
+"""
+Caches explícitos do núcleo (sem dependência do Streamlit)
+"""
+
+import functools
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+
+
+class LRUCache:
+    """Cache LRU limitado e thread-safe."""
+
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Retorna o valor da chave e marca como usado recentemente."""
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        """Guarda um valor, removendo o menos usado se o limite for excedido."""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Remove todas as entradas."""
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+class LFUCache:
+    """Cache LFU limitado e thread-safe; entre chaves com a mesma frequência sai a usada há mais tempo.
+
+    Operações O(1): as chaves são agrupadas por frequência de acesso.
+    """
+
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        self.evictions = 0
+        self._values = {}
+        self._counts = {}
+        self._buckets = defaultdict(OrderedDict)
+        self._min_count = 0
+        self._lock = threading.Lock()
+
+    def _touch(self, key):
+        count = self._counts[key]
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+            if self._min_count == count:
+                self._min_count = count + 1
+        self._counts[key] = count + 1
+        self._buckets[count + 1][key] = None
+
+    def get(self, key, default=None):
+        """Retorna o valor da chave e incrementa a sua frequência."""
+        with self._lock:
+            if key not in self._values:
+                return default
+            self._touch(key)
+            return self._values[key]
+
+    def set(self, key, value):
+        """Guarda um valor, removendo o menos frequente se o limite for excedido."""
+        with self._lock:
+            if self.max_size <= 0:
+                return
+            if key in self._values:
+                self._values[key] = value
+                self._touch(key)
+                return
+
+            if len(self._values) >= self.max_size:
+                bucket = self._buckets[self._min_count]
+                evicted, _ = bucket.popitem(last=False)
+                if not bucket:
+                    del self._buckets[self._min_count]
+                del self._values[evicted]
+                del self._counts[evicted]
+                self.evictions += 1
+
+            self._values[key] = value
+            self._counts[key] = 1
+            self._buckets[1][key] = None
+            self._min_count = 1
+
+    def clear(self):
+        """Remove todas as entradas."""
+        with self._lock:
+            self._values.clear()
+            self._counts.clear()
+            self._buckets.clear()
+            self._min_count = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._values
+
+    def __len__(self):
+        with self._lock:
+            return len(self._values)
+
+
+class CacheBackend:
+    """Interface dos backends de cache usados por `cached`."""
+
+    def get(self, key, default=None):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """Cache LRU em memória do processo, com expiração opcional (TTL).
+
+    Os valores são partilhados por referência: nenhum acesso copia os dados.
+    """
+
+    def __init__(self, max_size: int = 32, ttl: float = None):
+        self.ttl = ttl
+        self._cache = LRUCache(max_size=max_size)
+
+    def get(self, key, default=None):
+        entry = self._cache.get(key)
+        if entry is None:
+            return default
+        stored_at, value = entry
+        if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+            return default
+        return value
+
+    def set(self, key, value):
+        self._cache.set(key, (time.monotonic(), value))
+
+    def clear(self):
+        self._cache.clear()
+
+
+class DiskBackend(CacheBackend):
+    """Cache persistente em disco (pickle), com uma camada em memória para os acessos seguintes."""
+
+    def __init__(self, directory: str, name: str, ttl: float = None, max_size: int = 32):
+        self.directory = os.path.join(directory, name)
+        self.ttl = ttl
+        self._memory = MemoryBackend(max_size=max_size, ttl=ttl)
+
+    def _path(self, key) -> str:
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.pkl")
+
+    def get(self, key, default=None):
+        value = self._memory.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        path = self._path(key)
+        try:
+            if self.ttl is not None and time.time() - os.path.getmtime(path) > self.ttl:
+                return default
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return default
+
+        self._memory.set(key, value)
+        return value
+
+    def set(self, key, value):
+        self._memory.set(key, value)
+        os.makedirs(self.directory, exist_ok=True)
+        # Escrita atómica: ficheiro temporário + rename
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def clear(self):
+        self._memory.clear()
+        if os.path.isdir(self.directory):
+            for filename in os.listdir(self.directory):
+                if filename.endswith(".pkl"):
+                    os.remove(os.path.join(self.directory, filename))
+
+
+_MISSING = object()
+
+
+def freeze(value):
+    """Marca arrays NumPy como só de leitura, para que valores partilhados não sejam alterados por engano."""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            freeze(item)
+    elif hasattr(value, "__dict__") and not hasattr(value, "columns"):
+        # Objetos como CatalogIndex: congelar os arrays que contêm
+        for attr in vars(value).values():
+            if isinstance(attr, np.ndarray):
+                attr.flags.writeable = False
+    return value
+
+
+def cached(backend_factory, read_only: bool = True):
+    """Decorador de cache com backend configurável.
+
+    `backend_factory` só é chamado no primeiro uso, para que o backend possa
+    depender do ambiente (ex.: runtime do Streamlit). Os resultados são
+    partilhados sem cópia; com `read_only=True` os arrays NumPy ficam só de
+    leitura. DataFrames partilhados devem ser copiados antes de serem alterados.
+    Exceções não são guardadas em cache.
+    """
+    def decorator(func):
+        lock = threading.Lock()
+        state = {"backend": None}
+
+        def get_backend() -> CacheBackend:
+            if state["backend"] is None:
+                with lock:
+                    if state["backend"] is None:
+                        state["backend"] = backend_factory()
+            return state["backend"]
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (func.__qualname__, args, tuple(sorted(kwargs.items())))
+            backend = get_backend()
+            value = backend.get(key, _MISSING)
+            if value is _MISSING:
+                value = func(*args, **kwargs)
+                if read_only:
+                    freeze(value)
+                backend.set(key, value)
+            return value
+
+        wrapper.clear = lambda: get_backend().clear()
+        wrapper.backend = get_backend
+        return wrapper
+    return decorator
+
+
+def file_version(paths: dict) -> str:
+    """Retorna uma versão dos ficheiros baseada no mtime e tamanho de cada um."""
+    parts = []
+    for name, path in sorted(paths.items()):
+        try:
+            stat = os.stat(path)
+            parts.append(f"{name}:{stat.st_mtime_ns}:{stat.st_size}")
+        except OSError:
+            parts.append(f"{name}:missing")
+    return "|".join(parts)
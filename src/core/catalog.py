@@ -0,0 +1,354 @@
+"""
+Catálogo carregado em memória: produtos, dicionário de ingredientes e índices derivados
+"""
+
+import copy
+import functools
+import hashlib
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from src.core.bitset import HAS_BITWISE_COUNT, MAX_TERMS, BitsetIndex
+from src.core.cache import LRUCache, file_version
+from src.core.compare import pairwise_jaccard, presence_matrix
+from src.core.concerns import ConcernWeights
+from src.core.data import parse_prices, read_ingredients, read_products
+from src.core.dedup import ProductClusters
+from src.core.flags import ProductFlags
+from src.core.index import CatalogIndex
+from src.core.ingredients import IngredientLookup, IngredientTexts, split_ingredients
+from src.core.neighbors import NeighborGraph, row_neighbors
+from src.core.query import IngredientQuery, PostingBitmaps
+from src.core.recommend import add_explanations, explain_rows, recommend, recommend_rows
+from src.core.store import DatasetStore
+
+# Campos devolvidos nas recomendações em formato JSON
+RECORD_FIELDS = ["product_name", "product_url", "product_type", "price"]
+
+# Implementações do Jaccard das recomendações (ver `Catalog.similarity_index`)
+SIMILARITY_BACKENDS = ("postings", "bitset")
+
+
+def _record_values(values: pd.Series) -> list:
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+class Catalog:
+    """Snapshot imutável dos dados, partilhado entre pedidos e sessões.
+
+    `version` identifica o snapshot (base dos ficheiros + revisão dos deltas aplicados)
+    e deve fazer parte das chaves de qualquer cache derivado.
+    """
+
+    def __init__(self, products: pd.DataFrame, ingredients: pd.DataFrame, version: str = "",
+                 index: CatalogIndex = None, prices: np.ndarray = None, ingredient_texts: IngredientTexts = None,
+                 flags: ProductFlags = None, neighbors: NeighborGraph = None, clusters: ProductClusters = None):
+        if ingredient_texts is None:
+            ingredients, ingredient_texts = split_ingredients(ingredients)
+        self.products = products
+        # Só os nomes ficam no DataFrame; as descrições são lidas de `ingredient_texts` a pedido
+        self.ingredients = ingredients
+        self.ingredient_texts = ingredient_texts
+        self.base_version = version
+        self.revision = 0
+        self.version = version
+        # Identifica o conteúdo dos deltas aplicados (igual entre processos que aplicam os mesmos deltas)
+        self.delta_key = ""
+        self.index = index if index is not None else CatalogIndex.from_products(products)
+        self._live_products = None
+        # Flags de ingredientes por produto (fragrância, alergénios, ...), calculadas na ingestão
+        self.flags = flags if flags is not None else ProductFlags.build(self.index)
+        # Grupos de variantes da mesma formulação (ex.: tamanhos); recomendações usam só os canónicos
+        self.clusters = clusters if clusters is not None else ProductClusters.build(self.index)
+        self.canonical_mask = self.clusters.canonical_mask() & self.index.live_mask()
+        # Frequência nos produtos desempata as sugestões para nomes com erros de escrita
+        frequencies = self.index.document_frequencies()
+        term_counts = {term: int(frequencies[i]) for term, i in self.index.vocab.items()}
+        self.lookup = IngredientLookup(ingredients, ingredient_texts, term_counts)
+        # Pesos ingrediente×preocupação, calculados no primeiro uso se não vierem do DatasetStore
+        self._concern_weights = None
+        # Grafo de produtos semelhantes: só existe se tiver sido publicado offline (O(N²))
+        self.neighbors = neighbors
+        self._bitsets = None
+        self._posting_bitmaps = None
+        if prices is not None:
+            self.prices = prices
+        elif "price" in products.columns:
+            self.prices = parse_prices(products["price"]).to_numpy(dtype=float)
+        else:
+            self.prices = None
+
+        # Colunas já convertidas para objetos Python, para serializar resultados sem pandas
+        self._record_columns = {
+            field: _record_values(products[field]) for field in RECORD_FIELDS if field in products.columns
+        }
+
+        # Agregados mantidos a par dos deltas
+        if "product_type" in products.columns:
+            live_types = products["product_type"][self.index.live_mask()]
+            self.type_counts = Counter(live_types.dropna().tolist())
+        else:
+            self.type_counts = Counter()
+
+    @property
+    def concern_weights(self) -> ConcernWeights:
+        weights = self._concern_weights
+        if weights is None or weights.weights.shape[1] != len(ConcernWeights.TARGETS):
+            weights = self._concern_weights = ConcernWeights.build(self.index.terms, self.lookup)
+        return weights
+
+    @property
+    def bitsets(self) -> BitsetIndex:
+        if self._bitsets is None:
+            self._bitsets = BitsetIndex.from_index(self.index)
+        return self._bitsets
+
+    @property
+    def posting_bitmaps(self) -> PostingBitmaps:
+        if self._posting_bitmaps is None:
+            self._posting_bitmaps = PostingBitmaps(self.index)
+        return self._posting_bitmaps
+
+    def similarity_index(self, backend: str = "postings"):
+        """Objeto que calcula o Jaccard das recomendações: o índice (posting lists) ou a matriz de bits.
+
+        Com "bitset" e um vocabulário maior que `MAX_TERMS`, ou sem `np.bitwise_count`
+        (NumPy 1.x, onde o popcount por tabela perde para as posting lists), usa as posting lists.
+        """
+        if backend not in SIMILARITY_BACKENDS:
+            raise ValueError(f"Unknown similarity backend: {backend}")
+        if backend == "bitset" and HAS_BITWISE_COUNT and self.index.n_terms <= MAX_TERMS:
+            return self.bitsets
+        return self.index
+
+    def live_products(self) -> pd.DataFrame:
+        """Produtos ativos (sem os removidos ou substituídos por deltas)."""
+        if self.index.live is None:
+            return self.products
+        # Calculado uma vez por snapshot
+        if self._live_products is None:
+            self._live_products = self.products[self.index.live]
+        return self._live_products
+
+    def ingredient_counts(self, top_n: int = None) -> dict:
+        """Número de produtos ativos que contêm cada ingrediente, do mais para o menos frequente."""
+        frequencies = self.index.document_frequencies()
+        order = np.argsort(-frequencies, kind="stable")[:top_n]
+        return {self.index.terms[i]: int(frequencies[i]) for i in order.tolist() if frequencies[i] > 0}
+
+    def apply_delta(self, delta: pd.DataFrame) -> "Catalog":
+        """Novo snapshot com as alterações de `delta` (ver `read_delta`), sem reconstruir o catálogo.
+
+        As linhas atuais dos URLs alterados ficam como tombstones e as novas versões são
+        acrescentadas no fim; o índice, os preços e os agregados são atualizados só
+        para essas linhas. O snapshot atual não é modificado.
+        """
+        delta = delta.drop_duplicates("product_url", keep="last")
+        touched = self.products["product_url"].isin(delta["product_url"]).to_numpy() & self.index.live_mask()
+        removed = np.flatnonzero(touched)
+
+        # Upserts parciais: colunas em falta ou vazias mantêm o valor atual do produto
+        columns = [c for c in self.products.columns if c != "product_url"]
+        upserts = delta[delta["action"] == "upsert"].set_index("product_url").reindex(columns=columns)
+        current = (self.products.iloc[removed]
+                   .drop_duplicates("product_url", keep="last")
+                   .set_index("product_url")
+                   .reindex(index=upserts.index, columns=columns))
+        upserts = upserts.astype(object).where(upserts.notna(), current).reset_index()
+        upserts = upserts[self.products.columns].astype(self.products.dtypes.to_dict(), errors="ignore")
+
+        snapshot = copy.copy(self)
+        snapshot._live_products = None
+        snapshot._posting_bitmaps = None
+        snapshot.products = pd.concat([self.products, upserts], ignore_index=True)
+        added_lists = upserts["clean_ingreds"].tolist() if "clean_ingreds" in upserts.columns else [[]] * len(upserts)
+        snapshot.index = self.index.apply_changes(removed, added_lists)
+        snapshot.flags = self.flags.extended(snapshot.index)
+        snapshot.clusters = self.clusters.extended(snapshot.index)
+        snapshot.canonical_mask = snapshot.clusters.canonical_mask() & snapshot.index.live_mask()
+        if self.neighbors is not None:
+            snapshot.neighbors = self.neighbors.extended(snapshot.index)
+        if self._bitsets is not None:
+            snapshot._bitsets = self._bitsets.extended(snapshot.index)
+        if self._concern_weights is not None:
+            snapshot._concern_weights = self._concern_weights.extended(snapshot.index.terms, self.lookup)
+
+        if self.prices is not None:
+            added_prices = parse_prices(upserts["price"]).to_numpy(dtype=float)
+            snapshot.prices = np.concatenate([self.prices, added_prices])
+        snapshot._record_columns = {
+            field: column + _record_values(upserts[field]) for field, column in self._record_columns.items()
+        }
+
+        if "product_type" in self.products.columns:
+            snapshot.type_counts = self.type_counts.copy()
+            snapshot.type_counts.subtract(self.products["product_type"].iloc[removed].dropna().tolist())
+            snapshot.type_counts.update(upserts["product_type"].dropna().tolist())
+            snapshot.type_counts = +snapshot.type_counts
+
+        snapshot.revision = self.revision + 1
+        snapshot.version = f"{self.base_version}+r{snapshot.revision}"
+        digest = hashlib.sha1(self.delta_key.encode("utf-8"))
+        digest.update(delta.to_csv(index=False).encode("utf-8"))
+        snapshot.delta_key = f"r{snapshot.revision}-{digest.hexdigest()[:12]}"
+        return snapshot
+
+    def recommend_rows(self, ingredient_list: list, top_k: int = 3, engine=None) -> tuple:
+        """(posições, scores) das recomendações; com `engine` (QueryEngine), consultas iguais em curso são agrupadas."""
+        if engine is not None:
+            return engine.recommend_rows(self, ingredient_list, top_k)
+        return recommend_rows(self.index, ingredient_list, top_k, self.canonical_mask)
+
+    def recommend(self, ingredient_list: list, top_k: int = 3, engine=None, explain: bool = False) -> pd.DataFrame:
+        """Recomenda os produtos com ingredientes mais semelhantes.
+
+        Com `engine`, consultas iguais em curso partilham o mesmo DataFrame (não o altere).
+        Com `explain`, cada linha traz os ingredientes em comum e os diferentes (ver `explain_rows`).
+        """
+        if engine is None:
+            recommendations = recommend(self.products, self.index, ingredient_list, top_k, self.canonical_mask)
+        elif not ingredient_list:
+            return pd.DataFrame()
+        else:
+            recommendations = engine.recommend_frame(self, ingredient_list, top_k)
+        if explain and not recommendations.empty:
+            return add_explanations(recommendations, self.index, ingredient_list)
+        return recommendations
+
+    def recommend_records(self, ingredient_list: list, top_k: int = 3, engine=None, explain: bool = False) -> list:
+        """Recomendações como lista de dicionários serializáveis em JSON (com `explain`, também as diferenças)."""
+        rows, scores = self.recommend_rows(ingredient_list, top_k, engine)
+        records = [
+            {**{field: column[row] for field, column in self._record_columns.items()}, "similarity": float(score)}
+            for row, score in zip(rows.tolist(), scores.tolist())
+        ]
+        if explain:
+            for record, explanation in zip(records, explain_rows(self.index, ingredient_list, rows)):
+                record.update(explanation)
+        return records
+
+    def concern_scores(self, concerns: list, skin_type: str = None) -> np.ndarray:
+        """Pontuação de cada produto (posição em `products`) para as preocupações e o tipo de pele indicados."""
+        return self.concern_weights.scores(self.index, concerns, skin_type)
+
+    def similar_products(self, row: int, top_k: int = 5) -> tuple:
+        """(posições, semelhanças) dos produtos mais parecidos com o da posição `row`.
+
+        Lidos do grafo pré-calculado se tiver sido publicado; senão, os vizinhos deste produto
+        são calculados a pedido (só as suas posting lists). Cada formulação aparece uma vez
+        (pelo seu produto canónico) e as variantes do próprio produto são omitidas.
+        """
+        if self.neighbors is not None:
+            rows, scores = self.neighbors.similar(row, None, self.index.live)
+        else:
+            rows, scores = row_neighbors(self.index, row)
+        canonical = self.clusters.canonical[rows]
+        keep = canonical != self.clusters.canonical[row]
+        canonical, scores = canonical[keep], scores[keep]
+        _, first = np.unique(canonical, return_index=True)
+        first.sort()
+        return canonical[first][:top_k], scores[first][:top_k]
+
+    def variants(self, row: int) -> np.ndarray:
+        """Posições dos outros produtos ativos com a mesma formulação que `row` (ex.: outros tamanhos)."""
+        variants = self.clusters.variants(row)
+        return variants[self.index.live_mask()[variants]]
+
+    def ingredient_query(self, all_of=(), none_of=(), any_of=()) -> np.ndarray:
+        """Posições (em `products`) dos produtos ativos com todos os `all_of`, algum dos `any_of` e nenhum dos `none_of`."""
+        return IngredientQuery(all_of, any_of, none_of).rows(self.index, self.posting_bitmaps)
+
+    def compare_products(self, rows) -> tuple:
+        """(ingredientes, presença len(rows) × ingredientes, Jaccard len(rows) × len(rows)) dos produtos `rows`."""
+        term_ids, presence = presence_matrix(self.index, rows)
+        return self.index.terms[term_ids], presence, pairwise_jaccard(presence)
+
+    def flag_mask(self, exclude=(), require=()) -> np.ndarray:
+        """Máscara (por posição em `products`) dos produtos sem as flags `exclude` e com todas as `require`."""
+        return self.flags.mask(exclude, require)
+
+    def ingredient_info(self, name: str) -> dict:
+        """Busca informações sobre um ingrediente."""
+        return self.lookup.info(name)
+
+    def resolve_ingredient(self, name: str, limit: int = 3) -> dict:
+        """Como `ingredient_info`, mas com correção de erros de escrita e sugestões (ver `IngredientLookup.resolve`)."""
+        return self.lookup.resolve(name, limit)
+
+
+# Cache explícito de catálogos por (caminhos, versão dos ficheiros)
+_CATALOG_CACHE = LRUCache(max_size=4)
+_CATALOG_LOCK = threading.Lock()
+
+
+def _numeric_columns(products: pd.DataFrame) -> dict:
+    if "price" not in products.columns:
+        return {}
+    return {"prices": parse_prices(products["price"]).to_numpy(dtype=float)}
+
+
+def _build_catalog(products_path: str, ingredients_path: str, version: str, store: DatasetStore = None) -> Catalog:
+    if store is None:
+        return Catalog(read_products(products_path), read_ingredients(ingredients_path), version)
+
+    products = store.frame("products", [products_path], lambda: read_products(products_path))
+
+    # Dicionário em duas partes: nomes (pickle) e textos longos (buffer + offsets, em mmap)
+    @functools.cache
+    def split_dictionary():
+        return split_ingredients(read_ingredients(ingredients_path))
+
+    # Nome próprio: o artefacto "ingredients" é o dicionário completo (ver `load_ingredient_data`)
+    ingredients = store.frame("ingredient_names", [ingredients_path], lambda: split_dictionary()[0])
+    texts = IngredientTexts.from_arrays(
+        store.arrays("ingredient_texts", [ingredients_path], lambda: split_dictionary()[1].to_arrays())
+    )
+
+    index = store.index("catalog_index", [products_path], lambda: CatalogIndex.from_products(products))
+    # Colunas numéricas partilhadas (mmap) entre processos, tal como o índice
+    numeric = store.arrays("catalog_numeric", [products_path], lambda: _numeric_columns(products))
+    flags = ProductFlags.from_arrays(
+        store.arrays("product_flags", [products_path], lambda: ProductFlags.build(index).to_arrays())
+    )
+    clusters = ProductClusters.from_arrays(
+        store.arrays("product_clusters", [products_path], lambda: ProductClusters.build(index).to_arrays())
+    )
+    # Só o grafo publicado por `python -m src.core.neighbors`; nunca é calculado ao carregar
+    neighbors = NeighborGraph.published(store, [products_path])
+    catalog = Catalog(products, ingredients, version, index=index, prices=numeric.get("prices"),
+                      ingredient_texts=texts, flags=flags, neighbors=neighbors, clusters=clusters)
+
+    # Os pesos por preocupação dependem dos produtos (vocabulário) e do dicionário (textos)
+    catalog._concern_weights = ConcernWeights.from_arrays(store.arrays(
+        "concern_weights", [products_path, ingredients_path],
+        lambda: ConcernWeights.build(index.terms, catalog.lookup).to_arrays()
+    ))
+    return catalog
+
+
+def load_catalog(products_path: str, ingredients_path: str, store: DatasetStore = None) -> Catalog:
+    """Carrega (ou reutiliza) o catálogo; recarrega apenas quando os ficheiros mudam.
+
+    Com `store`, os dados processados e o índice são lidos do cache em disco quando
+    o conteúdo dos CSVs não mudou (ex.: depois de reiniciar o servidor).
+    """
+    version = file_version({"products": products_path, "ingredients": ingredients_path})
+    key = (products_path, ingredients_path, version)
+
+    catalog = _CATALOG_CACHE.get(key)
+    if catalog is None:
+        with _CATALOG_LOCK:
+            catalog = _CATALOG_CACHE.get(key)
+            if catalog is None:
+                catalog = _build_catalog(products_path, ingredients_path, version, store)
+                _CATALOG_CACHE.set(key, catalog)
+
+    return catalog
+
+
+def clear_catalog_cache():
+    """Esquece os catálogos carregados."""
+    _CATALOG_CACHE.clear()
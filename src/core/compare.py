@@ -0,0 +1,39 @@
+"""
+Comparação de vários produtos: matriz de presença de ingredientes e Jaccard par a par (matriz de Gram)
+"""
+
+import numpy as np
+
+from src.core.index import CatalogIndex
+
+
+def presence_matrix(index: CatalogIndex, rows) -> tuple:
+    """(ids dos ingredientes, matriz 0/1 len(rows) × ingredientes) para a união dos ingredientes de `rows`.
+
+    São as colunas da matriz produto×ingrediente (CSR) que algum dos produtos usa,
+    ordenadas do ingrediente mais partilhado para o menos partilhado.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    sizes = index.sizes[rows]
+    entries = np.concatenate([index.product_ids(row) for row in rows]) if len(rows) else np.zeros(0, dtype=np.int32)
+    term_ids, columns = np.unique(entries, return_inverse=True)
+
+    matrix = np.zeros((len(rows), len(term_ids)), dtype=np.uint8)
+    matrix[np.repeat(np.arange(len(rows)), sizes), columns] = 1
+
+    order = np.argsort(-matrix.sum(axis=0, dtype=np.int64), kind="stable")
+    return term_ids[order], matrix[:, order]
+
+
+def pairwise_jaccard(matrix: np.ndarray) -> np.ndarray:
+    """Jaccard entre todas as linhas de uma matriz 0/1, com um único produto de Gram (M · Mᵀ).
+
+    As interseções são o Gram e as uniões saem de |A| + |B| - |A ∩ B|; a diagonal é 1
+    para produtos com ingredientes.
+    """
+    # Contagens inteiras são exatas em float32 (BLAS); a divisão é feita em float64
+    dense = matrix.astype(np.float32)
+    intersection = (dense @ dense.T).astype(np.float64)
+    sizes = np.diag(intersection)
+    union = sizes[:, None] + sizes[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
@@ -0,0 +1,134 @@
+"""
+Pontuação de produtos por preocupação de pele, a partir dos ingredientes (matriz ingrediente×preocupação)
+"""
+
+import numpy as np
+
+from src.core.ingredients import COMMON_INGREDIENTS, IngredientLookup
+
+# Palavras-chave procuradas nos textos do dicionário de ingredientes, por preocupação (ver SKIN_CONCERNS)
+CONCERN_KEYWORDS = {
+    "acne": ["acne", "breakout", "blemish", "spot", "clog", "pore", "antibacterial", "exfoliat"],
+    "redness": ["redness", "sooth", "calm", "irritat", "inflammat", "rosacea", "sensitive"],
+    "hyperpigmentation": ["pigment", "dark spot", "bright", "skin tone", "discolo", "melanin", "age spot"],
+    "wrinkles": ["wrinkle", "fine line", "aging", "ageing", "collagen", "firm", "elasticity", "mature"],
+    "oiliness": ["oily", "sebum", "shine", "matt", "oil control", "pore", "absorb"],
+    "dehydration": ["hydrat", "moistur", "humectant", "dry", "barrier", "plump", "water loss"]
+}
+
+# O mesmo para os tipos de pele (ver SKIN_TYPES)
+SKIN_TYPE_KEYWORDS = {
+    "oily": ["oily", "sebum", "oil control"],
+    "dry": ["dry", "dehydrat"],
+    "combination": ["combination"],
+    "normal": ["normal", "all skin types"],
+    "sensitive": ["sensitive", "sooth", "calm"]
+}
+
+# Máximo de palavras-chave contadas por texto (um ingrediente pesa no máximo 1 por preocupação)
+MAX_KEYWORD_HITS = 3
+
+
+def _keyword_hits(text: str, keywords: list) -> int:
+    text = text.lower()
+    return min(sum(keyword in text for keyword in keywords), MAX_KEYWORD_HITS)
+
+
+def text_weights(info: dict, targets: dict) -> np.ndarray:
+    """Peso de um ingrediente para cada alvo, em [-1, 1].
+
+    Menções em "o que faz"/"para quem é bom" contam a favor e em "quem deve evitar" contra.
+    """
+    good = info.get("what_does_it_do", "") + " " + info.get("who_is_it_good_for", "")
+    avoid = info.get("who_should_avoid", "")
+    return np.array([
+        (_keyword_hits(good, keywords) - _keyword_hits(avoid, keywords)) / MAX_KEYWORD_HITS
+        for keywords in targets.values()
+    ], dtype=np.float32)
+
+
+class ConcernWeights:
+    """Matriz densa (n_ingredientes × n_alvos) de pesos por preocupação/tipo de pele.
+
+    As linhas seguem o vocabulário do CatalogIndex; os ingredientes são ligados ao
+    dicionário pelo nome exato ou por uma única correção de 1 edição (ex.: "arganine").
+    Calculada uma vez por versão dos ficheiros (e persistida pelo DatasetStore);
+    a pontuação dos produtos é um produto matriz CSR × vetor, em O(nnz).
+    """
+
+    TARGETS = {**CONCERN_KEYWORDS, **SKIN_TYPE_KEYWORDS}
+
+    def __init__(self, weights: np.ndarray):
+        self.targets = list(self.TARGETS)
+        self._target_ids = {target: i for i, target in enumerate(self.targets)}
+        self.weights = weights
+
+    @staticmethod
+    def _dictionary_name(term: str, lookup: IngredientLookup):
+        if term in lookup.exact or term in COMMON_INGREDIENTS:
+            return term
+        matches = lookup.fuzzy.lookup(term, limit=2, max_distance=1)
+        if len(matches) == 1 and len(term) >= 5:
+            return matches[0][0]
+        return None
+
+    @classmethod
+    def _term_weights(cls, terms: list, lookup: IngredientLookup) -> np.ndarray:
+        weights = np.zeros((len(terms), len(cls.TARGETS)), dtype=np.float32)
+        by_name = {}
+        for i, term in enumerate(terms):
+            name = cls._dictionary_name(term, lookup)
+            if name is None:
+                continue
+            if name not in by_name:
+                position = lookup.exact.get(name)
+                info = lookup.row_info(position) if position is not None else COMMON_INGREDIENTS[name]
+                by_name[name] = text_weights(info, cls.TARGETS)
+            weights[i] = by_name[name]
+        return weights
+
+    @classmethod
+    def build(cls, terms, lookup: IngredientLookup) -> "ConcernWeights":
+        """Calcula os pesos de todos os ingredientes `terms` (vocabulário do índice)."""
+        return cls(cls._term_weights([str(t) for t in terms], lookup))
+
+    def extended(self, terms, lookup: IngredientLookup) -> "ConcernWeights":
+        """Pesos para um vocabulário estendido (ex.: ingredientes novos de um delta); só calcula os novos."""
+        new_terms = [str(t) for t in terms[len(self.weights):]]
+        if not new_terms:
+            return self
+        return ConcernWeights(np.concatenate([self.weights, self._term_weights(new_terms, lookup)]))
+
+    def to_arrays(self) -> dict:
+        return {"weights": self.weights}
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "ConcernWeights":
+        return cls(arrays["weights"])
+
+    def vector(self, concerns: list, skin_type: str = None, skin_type_weight: float = 0.5) -> np.ndarray:
+        """Vetor de pesos dos alvos escolhidos (preocupações desconhecidas são ignoradas)."""
+        vector = np.zeros(len(self.targets), dtype=np.float32)
+        for concern in concerns:
+            target = self._target_ids.get(concern.strip().lower())
+            if target is not None:
+                vector[target] += 1.0
+        if skin_type:
+            target = self._target_ids.get(skin_type.strip().lower())
+            if target is not None:
+                vector[target] += skin_type_weight
+        return vector
+
+    def target_scores(self, index) -> np.ndarray:
+        """Pontuação de cada produto para cada alvo (n_produtos × n_alvos); `scores` = esta matriz × `vector`."""
+        weights = np.zeros((index.n_terms, len(self.targets)), dtype=np.float32)
+        n = min(len(self.weights), index.n_terms)
+        weights[:n] = self.weights[:n]
+        return index.row_sums(weights)
+
+    def scores(self, index, concerns: list, skin_type: str = None) -> np.ndarray:
+        """Pontuação de cada produto do índice: soma dos pesos dos seus ingredientes."""
+        term_scores = np.zeros(index.n_terms, dtype=np.float32)
+        n = min(len(self.weights), index.n_terms)
+        term_scores[:n] = self.weights[:n] @ self.vector(concerns, skin_type)
+        return index.row_sums(term_scores)
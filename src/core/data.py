@@ -0,0 +1,98 @@
+"""
+Leitura dos datasets em CSV, sem dependência do Streamlit
+"""
+
+import ast
+
+import pandas as pd
+
+# Ações aceites nos ficheiros de alterações incrementais
+DELTA_ACTIONS = ("upsert", "delete")
+
+
+def _normalize_ingredients(values: pd.Series) -> pd.Series:
+    """Converte `clean_ingreds` (texto ou lista) em listas de ingredientes em minúsculas."""
+    values = values.apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x)
+    return values.apply(
+        lambda lst: [ing.strip().lower() for ing in lst] if isinstance(lst, list) else []
+    )
+
+
+def _normalize_delta_ingredients(df: pd.DataFrame):
+    """Normaliza `clean_ingreds` num delta, mantendo vazios (None) para não alterar o valor atual."""
+    if "clean_ingreds" in df.columns:
+        values = df["clean_ingreds"].astype(object)
+        has_value = values.map(lambda x: isinstance(x, (str, list)))
+        df["clean_ingreds"] = _normalize_ingredients(values).where(has_value, None)
+
+
+def read_products(path: str) -> pd.DataFrame:
+    """Lê o catálogo de produtos e converte `clean_ingreds` em listas normalizadas.
+
+    Os erros de leitura (ex.: FileNotFoundError) são propagados para quem chama.
+    """
+    df = pd.read_csv(path)
+
+    # Process ingredient column if it exists
+    if 'clean_ingreds' in df.columns:
+        df["clean_ingreds"] = _normalize_ingredients(df["clean_ingreds"])
+
+    return df
+
+
+def _validate_delta(df: pd.DataFrame) -> pd.DataFrame:
+    if "product_url" not in df.columns:
+        raise ValueError("delta must have a 'product_url' column")
+    if df["product_url"].isna().any():
+        raise ValueError("every delta row needs a 'product_url'")
+
+    if "action" not in df.columns:
+        df["action"] = "upsert"
+    df["action"] = df["action"].fillna("upsert").astype(str).str.strip().str.lower()
+    invalid = sorted(set(df["action"]) - set(DELTA_ACTIONS))
+    if invalid:
+        raise ValueError(f"unknown delta actions: {invalid}")
+    return df
+
+
+def read_delta(path: str) -> pd.DataFrame:
+    """Lê um ficheiro de alterações (CSV com `product_url` e `action` = upsert/delete).
+
+    Num upsert, colunas omitidas ou vazias mantêm o valor atual do produto
+    (ex.: um ficheiro só com `product_url,price` atualiza apenas os preços).
+    """
+    df = pd.read_csv(path)
+    _normalize_delta_ingredients(df)
+    return _validate_delta(df)
+
+
+def delta_from_records(upserts: list = None, deletes: list = None) -> pd.DataFrame:
+    """Constrói um delta a partir de produtos (dicionários) a inserir/atualizar e URLs a remover."""
+    upserts = pd.DataFrame(upserts or [])
+    upserts["action"] = "upsert"
+    _normalize_delta_ingredients(upserts)
+    deletes = pd.DataFrame({"product_url": list(deletes or []), "action": "delete"})
+    return _validate_delta(pd.concat([upserts, deletes], ignore_index=True))
+
+
+def read_ingredients(path: str) -> pd.DataFrame:
+    """Lê o dicionário de ingredientes e cria a coluna normalizada `name_clean`."""
+    df = pd.read_csv(path)
+    # Normalize column names
+    df.columns = [col.lower() for col in df.columns]
+    # Create normalized search column
+    df["name_clean"] = df["name"].str.strip().str.lower()
+    return df
+
+
+def parse_prices(prices: pd.Series) -> pd.Series:
+    """Converte preços em texto (ex.: "£5.20") para valores numéricos.
+
+    Usa o primeiro número do texto: "£1,299.00 - £1,499.00" dá 1299.0 e "£5.20/100ml" dá 5.2
+    (separadores de milhares removidos); textos sem números ficam NaN.
+    """
+    if pd.api.types.is_numeric_dtype(prices):
+        return prices.astype(float)
+
+    first = prices.astype(str).str.extract(r"(-?\d[\d,]*\.?\d*)", expand=False)
+    return pd.to_numeric(first.str.replace(",", "", regex=False), errors="coerce")
@@ -0,0 +1,184 @@
+"""
+Deteção de produtos quase duplicados (mesma formulação em vários tamanhos) com MinHash + LSH e verificação exata
+"""
+
+import zlib
+
+import numpy as np
+
+from src.core.index import CatalogIndex
+
+# Jaccard mínimo para dois produtos serem a mesma formulação (abaixo disto aparecem variantes de aroma/cor)
+DEDUP_THRESHOLD = 0.95
+# Listas mais curtas (ex.: "squalane", sais de banho) coincidem entre marcas diferentes
+MIN_INGREDIENTS = 3
+
+# Assinatura MinHash: NUM_HASHES valores, em bandas de BAND_ROWS para o LSH
+NUM_HASHES = 32
+BAND_ROWS = 4
+HASH_SEED = 20240601
+# Num balde do LSH, cada produto é comparado com os BUCKET_WINDOW seguintes (todos os pares em baldes pequenos)
+BUCKET_WINDOW = 16
+# Fração mínima de valores iguais na assinatura (estimativa do Jaccard) antes da verificação exata
+MIN_AGREEMENT = 0.8
+
+# Primo de Mersenne 2^31 - 1: hashes (a·h + b) mod p cabem em uint32
+_PRIME = (1 << 31) - 1
+# Entradas da matriz CSR processadas de cada vez ao calcular assinaturas (limita a memória)
+_BLOCK_ENTRIES = 1 << 20
+
+
+def _term_hashes(terms) -> np.ndarray:
+    """NUM_HASHES hashes (uint64) de cada ingrediente, a partir do nome (estáveis entre snapshots)."""
+    base = np.fromiter((zlib.crc32(str(t).encode("utf-8")) for t in terms), dtype=np.uint64, count=len(terms))
+    rng = np.random.default_rng(HASH_SEED)
+    a = rng.integers(1, _PRIME, NUM_HASHES, dtype=np.uint64)
+    b = rng.integers(0, _PRIME, NUM_HASHES, dtype=np.uint64)
+    return (base[:, None] * a[None, :] + b[None, :]) % np.uint64(_PRIME)
+
+
+def signatures(index: CatalogIndex, start: int = 0) -> np.ndarray:
+    """Assinaturas MinHash (uint32, linhas × NUM_HASHES) dos produtos a partir de `start`.
+
+    O mínimo dos hashes dos ingredientes de cada produto, com `np.minimum.reduceat` sobre
+    a matriz CSR em blocos de linhas; produtos sem ingredientes ficam com 0.
+    """
+    hashes = _term_hashes(index.terms)
+    result = np.zeros((index.n_products - start, NUM_HASHES), dtype=np.uint32)
+    row = start
+    while row < index.n_products:
+        # Linhas inteiras até ~_BLOCK_ENTRIES entradas (pelo menos uma linha)
+        stop = int(np.searchsorted(index.indptr, index.indptr[row] + _BLOCK_ENTRIES, side="right")) - 1
+        stop = min(max(stop, row + 1), index.n_products)
+        indptr = index.indptr[row:stop + 1]
+        nonempty = np.diff(indptr) > 0
+        if nonempty.any():
+            per_entry = hashes[index.indices[indptr[0]:indptr[-1]]]
+            block = np.minimum.reduceat(per_entry, indptr[:-1][nonempty] - indptr[0], axis=0)
+            result[row - start:stop - start][nonempty] = block
+        row = stop
+    return result
+
+
+def _band_keys(sigs: np.ndarray) -> np.ndarray:
+    """Uma chave (uint64) por banda de BAND_ROWS valores da assinatura."""
+    n_bands = sigs.shape[1] // BAND_ROWS
+    bands = sigs[:, :n_bands * BAND_ROWS].reshape(len(sigs), n_bands, BAND_ROWS).astype(np.uint64)
+    # Combinação polinomial (com overflow): colisões só geram candidatos extra, eliminados na verificação
+    weights = np.uint64(1_000_003) ** np.arange(BAND_ROWS, dtype=np.uint64)
+    return (bands * weights).sum(axis=2, dtype=np.uint64)
+
+
+def _candidate_pairs(sigs: np.ndarray, eligible: np.ndarray, start: int) -> np.ndarray:
+    """Pares (i, j), i < j, j >= `start`, com a mesma chave em alguma banda (array k × 2, ordenado).
+
+    Em cada banda os produtos são ordenados pela chave e, dentro do balde, pela chave da
+    banda seguinte; cada um é comparado com os BUCKET_WINDOW seguintes do mesmo balde. Em
+    catálogos grandes há baldes enormes (listas curtas com os ingredientes mais comuns) e
+    todos os pares seriam quadráticos; ali as cópias exatas ficam lado a lado e a janela
+    chega para as ligar. Os pares cuja assinatura concorda em menos de MIN_AGREEMENT
+    posições são descartados sem calcular o Jaccard.
+    """
+    rows = np.flatnonzero(eligible)
+    keys = _band_keys(sigs[rows])
+    n_bands = keys.shape[1]
+    parts = []
+    for band in range(n_bands):
+        order = np.lexsort((keys[:, (band + 1) % n_bands], keys[:, band]))
+        sorted_keys, sorted_rows = keys[order, band], rows[order]
+        for offset in range(1, min(BUCKET_WINDOW, len(rows) - 1) + 1):
+            same = sorted_keys[offset:] == sorted_keys[:-offset]
+            i, j = sorted_rows[:-offset][same], sorted_rows[offset:][same]
+            i, j = np.minimum(i, j), np.maximum(i, j)
+            new = j >= start
+            i, j = i[new], j[new]
+            agreement = (sigs[i] == sigs[j]).mean(axis=1)
+            keep = agreement >= MIN_AGREEMENT
+            parts.append(np.stack([i[keep], j[keep]], axis=1))
+    if not parts:
+        return np.zeros((0, 2), dtype=np.int64)
+    return np.unique(np.concatenate(parts), axis=0)
+
+
+def _jaccard(index: CatalogIndex, i: int, j: int) -> float:
+    shared = len(np.intersect1d(index.product_ids(i), index.product_ids(j), assume_unique=True))
+    return shared / (int(index.sizes[i]) + int(index.sizes[j]) - shared)
+
+
+class ProductClusters:
+    """Grupos de produtos com a mesma formulação (ingredientes iguais ou quase iguais).
+
+    `canonical[i]` é a posição do produto canónico do grupo de `i` (o primeiro ativo no
+    catálogo; o próprio produto se não tiver variantes). Os candidatos saem do LSH sobre
+    as assinaturas MinHash e só são juntados depois de verificar o Jaccard exato.
+    """
+
+    def __init__(self, canonical: np.ndarray, signatures: np.ndarray):
+        self.canonical = canonical
+        self.signatures = signatures
+
+    @classmethod
+    def build(cls, index: CatalogIndex) -> "ProductClusters":
+        empty = cls(np.zeros(0, dtype=np.int32), np.zeros((0, NUM_HASHES), dtype=np.uint32))
+        return empty.extended(index)
+
+    def extended(self, index: CatalogIndex) -> "ProductClusters":
+        """Grupos para um índice com produtos removidos e acrescentados no fim (ver `CatalogIndex.apply_changes`).
+
+        Só os produtos novos são comparados (com todos); grupos cujo canónico foi removido
+        passam para o variante ativo seguinte.
+        """
+        start = len(self.canonical)
+        sigs = np.concatenate([self.signatures, signatures(index, start)])
+        live = index.live_mask()
+        eligible = live & (index.sizes >= MIN_INGREDIENTS)
+
+        canonical = np.concatenate([self.canonical, np.arange(start, index.n_products, dtype=np.int32)])
+        # Union-find sobre os rótulos dos grupos; a raiz é sempre a menor posição
+        parent = {}
+
+        def find(label):
+            while parent.get(label, label) != label:
+                label = parent[label]
+            return label
+
+        for i, j in _candidate_pairs(sigs, eligible, start).tolist():
+            root_i, root_j = find(int(canonical[i])), find(int(canonical[j]))
+            if root_i != root_j and _jaccard(index, i, j) >= DEDUP_THRESHOLD:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+        if parent:
+            roots = np.arange(index.n_products, dtype=np.int32)
+            for label in parent:
+                roots[label] = find(label)
+            canonical = roots[canonical]
+
+        # Produtos removidos deixam de ser canónicos: o grupo passa para o primeiro membro ativo
+        canonical[~live] = np.flatnonzero(~live)
+        orphaned = np.flatnonzero(live & ~live[canonical])
+        if len(orphaned):
+            labels = canonical[orphaned]
+            first = {}
+            for row, label in zip(orphaned.tolist(), labels.tolist()):
+                first.setdefault(label, row)
+            canonical[orphaned] = [first[label] for label in labels.tolist()]
+        return ProductClusters(canonical, sigs)
+
+    def to_arrays(self) -> dict:
+        return {"canonical": self.canonical, "signatures": self.signatures}
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "ProductClusters":
+        return cls(arrays["canonical"], arrays["signatures"])
+
+    def canonical_mask(self) -> np.ndarray:
+        """Produtos que representam a sua formulação (um por grupo)."""
+        return self.canonical == np.arange(len(self.canonical))
+
+    def variants(self, row: int) -> np.ndarray:
+        """Posições dos outros produtos do grupo de `row` (ordenadas)."""
+        members = np.flatnonzero(self.canonical == self.canonical[row])
+        return members[members != row]
+
+    def variant_counts(self) -> np.ndarray:
+        """Número de produtos de cada grupo, por posição do canónico (0 nas outras posições)."""
+        return np.bincount(self.canonical, minlength=len(self.canonical))
@@ -0,0 +1,158 @@
+"""
+Execução concorrente de consultas sobre o catálogo partilhado
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+
+from src.core.cache import LFUCache, LRUCache
+from src.core.catalog import SIMILARITY_BACKENDS, Catalog
+from src.core.recommend import recommend_ids, rows_to_frame
+
+
+_MISSING = object()
+
+CACHE_POLICIES = {"lru": LRUCache, "lfu": LFUCache}
+
+
+class QueryEngine:
+    """Executa consultas de muitas sessões/pedidos em simultâneo sobre snapshots imutáveis.
+
+    - Com `cache_size`, os resultados ficam em cache (LRU ou LFU), com chave nos ids
+      ordenados dos ingredientes e no `top_k`; o cache é esvaziado quando a versão do
+      catálogo muda.
+    - Consultas idênticas em curso (mesmo snapshot, mesmos ingredientes e `top_k`) são
+      agrupadas: só uma é calculada e as restantes recebem o mesmo resultado.
+    - Com `max_workers`, o cálculo corre num pool limitado em vez de na thread de quem
+      chama, para não sobrecarregar o CPU quando muitas sessões consultam ao mesmo tempo.
+    - `similarity` escolhe a implementação do Jaccard ("postings" ou "bitset", ver
+      `Catalog.similarity_index`).
+    """
+
+    def __init__(self, max_workers: int = 0, coalesce: bool = True, cache_size: int = 0,
+                 cache_policy: str = "lru", similarity: str = "postings"):
+        if cache_policy not in CACHE_POLICIES:
+            raise ValueError(f"Unknown cache policy: {cache_policy}")
+        if similarity not in SIMILARITY_BACKENDS:
+            raise ValueError(f"Unknown similarity backend: {similarity}")
+        self.similarity = similarity
+        self.coalesce = coalesce
+        self.cache_policy = cache_policy
+        self._cache = CACHE_POLICIES[cache_policy](cache_size) if cache_size else None
+        self._cache_version = None
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="query") if max_workers else None
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _compute(self, func, *args):
+        if self._pool is not None:
+            return self._pool.submit(func, *args).result()
+        return func(*args)
+
+    def _run(self, key, func, *args):
+        if not self.coalesce:
+            with self._lock:
+                self.executed += 1
+            return self._compute(func, *args)
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = self._compute(func, *args)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def _cached(self, version: str, key, func, *args):
+        """Resultado em cache, ou calculado (com agrupamento) e guardado."""
+        if self._cache is None:
+            return self._run(key, func, *args)
+
+        if version != self._cache_version:
+            # Novo snapshot do catálogo: os resultados anteriores deixam de ser válidos
+            with self._lock:
+                if version != self._cache_version:
+                    self._cache.clear()
+                    self._cache_version = version
+
+        value = self._cache.get(key, _MISSING)
+        with self._lock:
+            if value is _MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if value is not _MISSING:
+            return value
+
+        value = self._run(key, func, *args)
+        self._cache.set(key, value)
+        return value
+
+    def recommend_rows(self, catalog: Catalog, ingredient_list: list, top_k: int = 3) -> tuple:
+        """(posições, scores) das recomendações; os arrays são partilhados e só de leitura."""
+        term_ids, n_query = catalog.index.encode(ingredient_list or [])
+        key = ("recommend", catalog.version, term_ids.tobytes(), n_query, top_k)
+        rows, scores = self._cached(catalog.version, key, recommend_ids, catalog.index, term_ids, n_query, top_k,
+                                    catalog.similarity_index(self.similarity), catalog.canonical_mask)
+        rows.flags.writeable = False
+        scores.flags.writeable = False
+        return rows, scores
+
+    def recommend_frame(self, catalog: Catalog, ingredient_list: list, top_k: int = 3) -> pd.DataFrame:
+        """DataFrame das recomendações; consultas iguais em curso recebem o mesmo objeto (só de leitura)."""
+        term_ids, n_query = catalog.index.encode(ingredient_list or [])
+        key = ("frame", catalog.version, term_ids.tobytes(), n_query, top_k)
+
+        def build():
+            scorer = catalog.similarity_index(self.similarity)
+            rows, scores = recommend_ids(catalog.index, term_ids, n_query, top_k, scorer, catalog.canonical_mask)
+            return rows_to_frame(catalog.products, rows, scores)
+
+        return self._cached(catalog.version, key, build)
+
+    def stats(self) -> dict:
+        """Consultas calculadas, agrupadas com outra em curso e em curso, mais as estatísticas do cache."""
+        with self._lock:
+            stats = {"executed": self.executed, "coalesced": self.coalesced, "in_flight": len(self._in_flight)}
+            if self._cache is not None:
+                lookups = self.hits + self.misses
+                stats["cache"] = {
+                    "policy": self.cache_policy,
+                    "size": len(self._cache),
+                    "max_size": self._cache.max_size,
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "hit_rate": self.hits / lookups if lookups else 0.0,
+                    "evictions": self._cache.evictions
+                }
+            return stats
+
+    def clear_cache(self):
+        if self._cache is not None:
+            self._cache.clear()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
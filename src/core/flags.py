@@ -0,0 +1,108 @@
+"""
+Classificação dos produtos por flags de ingredientes (fragrância, álcool secante, alergénios, ativos)
+"""
+
+import re
+
+import numpy as np
+
+# Padrões (regex sobre o nome normalizado do ingrediente) de cada flag; a ordem define o bit
+FLAG_PATTERNS = {
+    "fragrance": [
+        r"\bparfum\b", r"\bfragrance\b", r"\baroma\b", r"\blinalool\b", r"\blimonene\b",
+        r"\bcitronellol\b", r"\bgeraniol\b"
+    ],
+    "drying_alcohol": [
+        r"^alcohol$", r"\balcohol denat", r"\bdenatured alcohol\b", r"^sd alcohol", r"\bethanol\b",
+        r"^ethyl alcohol$", r"\bisopropyl alcohol\b", r"^methanol$"
+    ],
+    # Alergénios de fragrância de declaração obrigatória na UE e conservantes isotiazolinonas
+    "allergen": [
+        r"\bamyl cinnamal\b", r"\bamylcinnamyl alcohol\b", r"\banis(e|yl) alcohol\b", r"\bbenzyl alcohol\b",
+        r"\bbenzyl benzoate\b", r"\bbenzyl cinnamate\b", r"\bbenzyl salicylate\b", r"\bbutylphenyl methylpropional\b",
+        r"\bcinnamal\b", r"\bcinnamyl alcohol\b", r"\bcitral\b", r"\bcitronellol\b", r"\bcoumarin\b",
+        r"\beugenol\b", r"\bfarnesol\b", r"\bgeraniol\b", r"\bhexyl cinnamal\b", r"\bhydroxycitronellal\b",
+        r"\bisoeugenol\b", r"\blimonene\b", r"\blinalool\b", r"\bmethyl 2-octynoate\b",
+        r"\balpha-isomethyl ionone\b", r"\bevernia (prunastri|furfuracea)\b", r"isothiazolinone\b"
+    ],
+    "retinoid": [r"\bretin(ol|al|oate|yl)\b", r"\bretinyl\b", r"\btretinoin\b", r"\badapalene\b"],
+    "aha_bha": [
+        r"\bglycolic acid\b", r"\blactic acid\b", r"\bmandelic acid\b", r"\bmalic acid\b", r"\btartaric acid\b",
+        r"\bsalicylic acid\b", r"\bbetaine salicylate\b", r"\bsalix alba\b", r"\bwillow bark\b"
+    ],
+    "spf_filter": [
+        r"\bbutyl methoxydibenzoylmethane\b", r"\bavobenzone\b", r"\boctocrylene\b", r"\bhomosalate\b",
+        r"\bethylhexyl (methoxycinnamate|salicylate|triazone)\b", r"\boctinoxate\b", r"\boctisalate\b",
+        r"\boxybenzone\b", r"\bbenzophenone-3\b", r"\bzinc oxide\b", r"\btitanium dioxide\b",
+        r"\bbis-?ethylhexyloxyphenol methoxyphenyl triazine\b", r"\bdiethylamino hydroxybenzoyl hexyl benzoate\b",
+        r"\bmethylene bis-benzotriazolyl tetramethylbutylphenol\b", r"\bdrometrizole trisiloxane\b",
+        r"\bterephthalylidene dicamphor sulfonic acid\b", r"\bpolysilicone-15\b"
+    ]
+}
+
+# Bit de cada flag (máscaras uint32)
+FLAG_BITS = {name: 1 << bit for bit, name in enumerate(FLAG_PATTERNS)}
+
+_FLAG_REGEXES = {name: re.compile("|".join(patterns)) for name, patterns in FLAG_PATTERNS.items()}
+
+
+def flag_mask(names) -> int:
+    """Máscara com os bits das flags `names` (nomes desconhecidos dão ValueError)."""
+    mask = 0
+    for name in names:
+        if name not in FLAG_BITS:
+            raise ValueError(f"Unknown product flag: {name}")
+        mask |= FLAG_BITS[name]
+    return mask
+
+
+def flag_names(mask: int) -> list:
+    """Nomes das flags presentes em `mask`."""
+    return [name for name, bit in FLAG_BITS.items() if int(mask) & bit]
+
+
+def tag_terms(terms) -> np.ndarray:
+    """Flags (uint32) de cada ingrediente do vocabulário."""
+    flags = np.zeros(len(terms), dtype=np.uint32)
+    for i, term in enumerate(terms):
+        term = str(term)
+        for name, regex in _FLAG_REGEXES.items():
+            if regex.search(term):
+                flags[i] |= FLAG_BITS[name]
+    return flags
+
+
+class ProductFlags:
+    """Flags de cada ingrediente e de cada produto (OR das flags dos seus ingredientes).
+
+    Calculadas na ingestão (e persistidas pelo DatasetStore); filtrar o catálogo por
+    flags é um único teste bit a bit vetorizado sobre `products`.
+    """
+
+    def __init__(self, terms: np.ndarray, products: np.ndarray):
+        self.terms = terms
+        self.products = products
+
+    @classmethod
+    def build(cls, index) -> "ProductFlags":
+        terms = tag_terms(index.terms)
+        return cls(terms, index.reduce_rows(terms, np.bitwise_or))
+
+    def extended(self, index) -> "ProductFlags":
+        """Flags para um índice com ingredientes e produtos acrescentados no fim (ver `CatalogIndex.apply_changes`)."""
+        terms = np.concatenate([self.terms, tag_terms(index.terms[len(self.terms):])])
+        added = index.reduce_rows(terms, np.bitwise_or, start=len(self.products))
+        return ProductFlags(terms, np.concatenate([self.products, added]))
+
+    def to_arrays(self) -> dict:
+        return {"terms": self.terms, "products": self.products}
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "ProductFlags":
+        return cls(arrays["terms"], arrays["products"])
+
+    def mask(self, exclude=(), require=()) -> np.ndarray:
+        """Produtos sem nenhuma das flags `exclude` e com todas as flags `require`."""
+        excluded = np.uint32(flag_mask(exclude))
+        required = np.uint32(flag_mask(require))
+        return ((self.products & excluded) == 0) & ((self.products & required) == required)
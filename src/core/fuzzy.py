@@ -0,0 +1,147 @@
+"""
+Pesquisa de nomes sem percorrer o dicionário: aproximada (erros de escrita) com um dicionário de
+deleções ao estilo SymSpell e por substring com posting lists de trigramas
+"""
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Distância de Damerau-Levenshtein (com transposições adjacentes) limitada a `max_distance`.
+
+    Só calcula a faixa de largura `2 * max_distance + 1` em torno da diagonal e
+    retorna `max_distance + 1` assim que a distância ultrapassa o limite.
+    """
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    # O prefixo e o sufixo comuns não mudam a distância; normalmente sobra muito pouco para comparar
+    start = 0
+    while start < min(len(a), len(b)) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < min(len(a), len(b)) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if not a or not b:
+        return min(max(len(a), len(b)), max_distance + 1)
+
+    too_far = max_distance + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        start = max(1, i - max_distance)
+        end = min(len(b), i + max_distance)
+        current = [too_far] * (len(b) + 1)
+        if start == 1:
+            current[0] = i
+        best = current[0] if start == 1 else too_far
+        for j in range(start, end + 1):
+            cost = a[i - 1] != b[j - 1]
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous2 is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = min(value, too_far)
+            best = min(best, current[j])
+        if best > max_distance:
+            return too_far
+        previous2, previous = previous, current
+    return min(previous[len(b)], too_far)
+
+
+def _deletes(word: str, max_distance: int) -> set:
+    """`word` e todas as variantes com até `max_distance` caracteres apagados."""
+    variants = frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        variants = variants | frontier
+    return variants
+
+
+class FuzzyIndex:
+    """Dicionário de deleções pré-calculado (SymSpell) para sugerir nomes com erros de escrita.
+
+    Cada termo é indexado pelas variantes do seu prefixo com até `max_distance`
+    caracteres apagados; uma consulta gera as mesmas variantes e só verifica com a
+    distância de edição os termos que partilham alguma delas (sem percorrer o dicionário).
+    """
+
+    def __init__(self, terms, counts: dict = None, max_distance: int = 2, prefix_length: int = 7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.terms = sorted({t for t in terms if t})
+        counts = counts or {}
+        self.counts = [counts.get(t, 0) for t in self.terms]
+
+        self._deletes = {}
+        for term_id, term in enumerate(self.terms):
+            for variant in _deletes(term[:prefix_length], max_distance):
+                self._deletes.setdefault(variant, []).append(term_id)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def lookup(self, word: str, limit: int = 5, max_distance: int = None) -> list:
+        """Termos a até `max_distance` edições de `word`, como [(termo, distância)].
+
+        Ordenados por distância, depois pela frequência do termo (`counts`) e por ordem alfabética.
+        """
+        if not word:
+            return []
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+
+        candidates = set()
+        for variant in _deletes(word[:self.prefix_length], max_distance):
+            candidates.update(self._deletes.get(variant, ()))
+
+        matches = []
+        for term_id in candidates:
+            term = self.terms[term_id]
+            distance = edit_distance(word, term, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, -self.counts[term_id], term))
+
+        matches.sort()
+        return [(term, distance) for distance, _, term in matches[:limit]]
+
+
+class SubstringIndex:
+    """Primeira posição de uma lista de nomes que contém um texto (`text in name`).
+
+    Cada nome é indexado pelos seus trigramas; uma consulta só verifica os nomes que
+    têm todos os trigramas do texto (interseção das posting lists, da mais curta para a
+    mais longa). Textos com menos de 3 caracteres vêm de um dicionário com a primeira
+    posição de cada substring curta.
+    """
+
+    GRAM = 3
+
+    def __init__(self, names: list):
+        self.names = names
+        self._short = {}
+        self._postings = {}
+        for position, name in enumerate(names):
+            for size in range(1, self.GRAM):
+                for i in range(len(name) - size + 1):
+                    self._short.setdefault(name[i:i + size], position)
+            for gram in {name[i:i + self.GRAM] for i in range(len(name) - self.GRAM + 1)}:
+                self._postings.setdefault(gram, []).append(position)
+
+    def first(self, text: str):
+        """Posição do primeiro nome que contém `text`, ou None."""
+        if len(text) < self.GRAM:
+            if not text:
+                return 0 if self.names else None
+            return self._short.get(text)
+
+        grams = {text[i:i + self.GRAM] for i in range(len(text) - self.GRAM + 1)}
+        postings = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+        candidates = set(postings[0])
+        for other in postings[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(other)
+        for position in sorted(candidates):
+            if text in self.names[position]:
+                return position
+        return None
@@ -0,0 +1,219 @@
+"""
+Índice invertido do catálogo: vocabulário de ingredientes, matriz produto×ingrediente (CSR) e posting lists
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class CatalogIndex:
+    """Índice imutável dos ingredientes de cada produto.
+
+    - `vocab`: ingrediente -> id; `terms`: id -> ingrediente
+    - `indptr`/`indices`: ids de ingredientes (únicos e ordenados) de cada produto, em formato CSR
+    - `post_indptr`/`post_indices`: ids dos produtos (ordenados) que contêm cada ingrediente
+    - `sizes`: número de ingredientes distintos de cada produto
+    - `live`: máscara dos produtos ativos (None = todos); produtos removidos ficam como tombstones
+    """
+
+    # Arrays que definem completamente o índice (usados para persistir em disco)
+    ARRAY_FIELDS = ["terms", "indptr", "indices", "sizes", "post_indptr", "post_indices"]
+
+    def __init__(self, terms: np.ndarray, indptr: np.ndarray, indices: np.ndarray,
+                 post_indptr: np.ndarray = None, post_indices: np.ndarray = None, sizes: np.ndarray = None,
+                 live: np.ndarray = None):
+        self.terms = terms
+        self.vocab = dict(zip(terms.tolist(), range(len(terms))))
+        self.indptr = indptr
+        self.indices = indices
+        self.n_products = len(indptr) - 1
+        self.n_terms = len(terms)
+        self.sizes = sizes if sizes is not None else np.diff(indptr).astype(np.int32)
+        self.live = live
+        self.n_live = int(live.sum()) if live is not None else self.n_products
+
+        if post_indptr is not None and post_indices is not None:
+            self.post_indptr = post_indptr
+            self.post_indices = post_indices
+            return
+
+        # Transpor a matriz para obter as posting lists (ordem estável mantém os produtos ordenados)
+        rows = np.repeat(np.arange(self.n_products, dtype=np.int32), self.sizes)
+        order = np.argsort(indices, kind="stable")
+        self.post_indices = rows[order]
+        self.post_indptr = np.zeros(self.n_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(indices, minlength=self.n_terms), out=self.post_indptr[1:])
+
+    @classmethod
+    def from_lists(cls, ingredient_lists) -> "CatalogIndex":
+        """Constrói o índice a partir de uma sequência de listas de ingredientes."""
+        lists = pd.Series(list(ingredient_lists), dtype=object)
+        lists = lists.map(lambda x: x if isinstance(x, list) else [])
+        exploded = lists.explode().dropna()
+
+        codes, terms = pd.factorize(exploded, sort=True)
+        rows = exploded.index.to_numpy(dtype=np.int64)
+        n_products = len(lists)
+        n_terms = len(terms)
+
+        # Remover duplicados dentro de cada produto e ordenar por (produto, ingrediente)
+        keys = np.unique(rows * max(n_terms, 1) + codes)
+        rows = keys // max(n_terms, 1)
+        indices = (keys % max(n_terms, 1)).astype(np.int32)
+
+        indptr = np.zeros(n_products + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_products), out=indptr[1:])
+
+        return cls(np.asarray(terms, dtype=object), indptr, indices)
+
+    @classmethod
+    def from_products(cls, products_df: pd.DataFrame) -> "CatalogIndex":
+        """Constrói o índice a partir da coluna `clean_ingreds` do catálogo."""
+        if products_df.empty or 'clean_ingreds' not in products_df.columns:
+            return cls.from_lists([[] for _ in range(len(products_df))])
+        return cls.from_lists(products_df['clean_ingreds'])
+
+    def to_arrays(self) -> dict:
+        """Arrays do índice, prontos para `np.savez` (o vocabulário passa a texto Unicode)."""
+        arrays = {field: getattr(self, field) for field in self.ARRAY_FIELDS}
+        arrays["terms"] = np.asarray(self.terms, dtype=str)
+        if self.live is not None:
+            arrays["live"] = self.live
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "CatalogIndex":
+        """Reconstrói o índice a partir de `to_arrays()` sem recalcular as posting lists.
+
+        Os arrays são usados sem cópia, por isso podem ser memmaps partilhados entre processos.
+        """
+        live = arrays["live"] if "live" in arrays else None
+        return cls(**{field: arrays[field] for field in cls.ARRAY_FIELDS}, live=live)
+
+    def live_mask(self) -> np.ndarray:
+        """Máscara booleana dos produtos ativos."""
+        if self.live is None:
+            return np.ones(self.n_products, dtype=bool)
+        return self.live
+
+    def apply_changes(self, removed_rows, added_lists) -> "CatalogIndex":
+        """Novo índice com produtos removidos (tombstones) e produtos novos acrescentados no fim.
+
+        Os ids dos produtos existentes não mudam, só as posting lists dos ingredientes
+        afetados são reescritas e os ingredientes novos recebem ids a seguir aos atuais.
+        O índice original não é alterado (pode continuar a servir pedidos).
+        """
+        live = self.live_mask().copy()
+        removed = np.unique(np.asarray(removed_rows, dtype=np.int64))
+        removed = removed[live[removed]]
+        live[removed] = False
+
+        # Codificar os produtos novos, estendendo o vocabulário
+        vocab = dict(self.vocab)
+        new_terms = []
+        added_ids = []
+        for ingredients in added_lists:
+            ids = set()
+            for ing in ingredients if isinstance(ingredients, list) else []:
+                if ing not in vocab:
+                    vocab[ing] = len(vocab)
+                    new_terms.append(ing)
+                ids.add(vocab[ing])
+            added_ids.append(np.asarray(sorted(ids), dtype=np.int32))
+        n_terms = len(vocab)
+        n_added = len(added_ids)
+
+        # CSR: esvaziar as linhas removidas e acrescentar as novas
+        added_sizes = np.asarray([len(ids) for ids in added_ids], dtype=np.int32)
+        kept_nnz = np.repeat(live[:self.n_products], self.sizes)
+        sizes = np.concatenate([np.where(live, self.sizes, 0), added_sizes]).astype(np.int32)
+        indices = np.concatenate([self.indices[kept_nnz], *added_ids]).astype(np.int32)
+        indptr = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=indptr[1:])
+
+        # Posting lists: retirar os produtos removidos só das listas dos seus ingredientes
+        keep = np.ones(len(self.post_indices), dtype=bool)
+        removed_terms = []
+        for row in removed:
+            for term_id in self.product_ids(row):
+                start = self.post_indptr[term_id]
+                keep[start + np.searchsorted(self.postings(term_id), row)] = False
+                removed_terms.append(term_id)
+        kept_counts = np.zeros(n_terms, dtype=np.int64)
+        kept_counts[:self.n_terms] = np.diff(self.post_indptr)
+        kept_counts -= np.bincount(np.asarray(removed_terms, dtype=np.int64), minlength=n_terms)
+        kept_indptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(kept_counts, out=kept_indptr[1:])
+
+        # ... e acrescentar os produtos novos no fim de cada lista (os seus ids são os maiores)
+        new_rows = np.repeat(np.arange(self.n_products, self.n_products + n_added, dtype=np.int32), added_sizes)
+        new_term_ids = indices[indptr[self.n_products]:]
+        order = np.lexsort((new_rows, new_term_ids))
+        post_indices = np.insert(
+            self.post_indices[keep], kept_indptr[new_term_ids[order] + 1], new_rows[order]
+        ).astype(np.int32)
+        post_indptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(kept_counts + np.bincount(new_term_ids, minlength=n_terms), out=post_indptr[1:])
+
+        terms = np.concatenate([np.asarray(self.terms, dtype=object), np.asarray(new_terms, dtype=object)])
+        live = np.concatenate([live, np.ones(n_added, dtype=bool)])
+        return CatalogIndex(terms, indptr, indices, post_indptr, post_indices, sizes, live=live)
+
+    def document_frequencies(self) -> np.ndarray:
+        """Número de produtos ativos que contêm cada ingrediente."""
+        return np.diff(self.post_indptr)
+
+    def reduce_rows(self, term_values: np.ndarray, ufunc=np.add, start: int = 0) -> np.ndarray:
+        """Reduz `term_values` (um valor ou vetor por ingrediente) sobre os ingredientes de cada produto.
+
+        Usa `ufunc.reduceat` sobre a matriz CSR, em O(nnz); produtos sem ingredientes
+        (incluindo tombstones) ficam com 0. Com `start`, só as linhas a partir dessa posição.
+        """
+        indptr = self.indptr[start:]
+        per_entry = term_values[self.indices[indptr[0]:]]
+        result = np.zeros((len(indptr) - 1,) + per_entry.shape[1:], dtype=per_entry.dtype)
+        nonempty = np.diff(indptr) > 0
+        if nonempty.any():
+            # reduceat reduz de cada início até ao seguinte; as linhas vazias são saltadas
+            result[nonempty] = ufunc.reduceat(per_entry, indptr[:-1][nonempty] - indptr[0], axis=0)
+        return result
+
+    def row_sums(self, term_values: np.ndarray) -> np.ndarray:
+        """Produto da matriz produto×ingrediente por `term_values` (soma por produto)."""
+        return self.reduce_rows(term_values, np.add)
+
+    def product_ids(self, row: int) -> np.ndarray:
+        """Ids ordenados dos ingredientes de um produto."""
+        return self.indices[self.indptr[row]:self.indptr[row + 1]]
+
+    def postings(self, term_id: int) -> np.ndarray:
+        """Ids ordenados dos produtos que contêm um ingrediente."""
+        return self.post_indices[self.post_indptr[term_id]:self.post_indptr[term_id + 1]]
+
+    def encode(self, ingredients) -> tuple:
+        """Converte ingredientes em ids conhecidos; retorna (ids ordenados, nº de ingredientes distintos)."""
+        unique = {i.strip().lower() for i in ingredients if i and i.strip()}
+        ids = sorted(self.vocab[i] for i in unique if i in self.vocab)
+        return np.asarray(ids, dtype=np.int32), len(unique)
+
+    def intersection_counts(self, term_ids: np.ndarray) -> np.ndarray:
+        """Número de ingredientes em comum entre a consulta e cada produto."""
+        if len(term_ids) == 0:
+            return np.zeros(self.n_products, dtype=np.int64)
+        hits = np.concatenate([self.postings(t) for t in term_ids])
+        return np.bincount(hits, minlength=self.n_products)
+
+    def jaccard_scores(self, ingredients) -> np.ndarray:
+        """Similaridade de Jaccard entre a lista de ingredientes e cada produto."""
+        return self.jaccard_from_ids(*self.encode(ingredients))
+
+    def jaccard_from_ids(self, term_ids: np.ndarray, n_query: int) -> np.ndarray:
+        """Jaccard a partir de ids já codificados (`n_query` conta também ingredientes desconhecidos)."""
+        scores = np.zeros(self.n_products, dtype=np.float64)
+        if n_query == 0:
+            return scores
+
+        intersection = self.intersection_counts(term_ids)
+        union = n_query + self.sizes - intersection
+        np.divide(intersection, union, out=scores, where=self.sizes > 0)
+        return scores
@@ -0,0 +1,296 @@
+"""
+Pesquisa de informação sobre ingredientes, sem dependência do Streamlit
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from src.core.fuzzy import FuzzyIndex, SubstringIndex
+
+INFO_FIELDS = [
+    "short_description",
+    "what_is_it",
+    "what_does_it_do",
+    "who_is_it_good_for",
+    "who_should_avoid",
+    "url"
+]
+
+# Colunas mantidas em memória; as restantes (textos longos) vão para IngredientTexts
+NAME_FIELDS = ["name", "name_clean"]
+
+# Correção automática de erros de escrita: só com um único candidato a esta distância
+AUTOCORRECT_DISTANCE = 1
+# Nomes mais curtos não recebem sugestões (quase tudo fica a 1-2 edições)
+MIN_FUZZY_LENGTH = 4
+
+# Dicionário de ingredientes comuns com informações básicas
+COMMON_INGREDIENTS = {
+    "aqua": {
+        "name": "Aqua (Water)",
+        "short_description": "Water is the most common cosmetic ingredient and serves as a solvent.",
+        "what_is_it": "Water (Aqua) is the universal solvent used in skincare formulations.",
+        "what_does_it_do": "Acts as a base for most skincare products, helps dissolve other ingredients, and provides hydration to the skin.",
+        "who_is_it_good_for": "All skin types",
+        "who_should_avoid": "Generally safe for everyone",
+        "url": ""
+    },
+    "water": {
+        "name": "Water (Aqua)",
+        "short_description": "Water is the most common cosmetic ingredient and serves as a solvent.",
+        "what_is_it": "Water (Aqua) is the universal solvent used in skincare formulations.",
+        "what_does_it_do": "Acts as a base for most skincare products, helps dissolve other ingredients, and provides hydration to the skin.",
+        "who_is_it_good_for": "All skin types",
+        "who_should_avoid": "Generally safe for everyone",
+        "url": ""
+    },
+    "glycerin": {
+        "name": "Glycerin",
+        "short_description": "A powerful humectant that draws moisture into the skin.",
+        "what_is_it": "Glycerin (also called glycerol) is a natural compound derived from vegetable oils or animal fats. It's a humectant, meaning it attracts water.",
+        "what_does_it_do": "Attracts and retains moisture in the skin, helps strengthen the skin barrier, provides hydration, and makes skin feel soft and smooth.",
+        "who_is_it_good_for": "All skin types, especially dry and dehydrated skin",
+        "who_should_avoid": "Generally safe, but in very dry climates without proper occlusive, it may draw moisture from deeper skin layers",
+        "url": ""
+    },
+    "glycerol": {
+        "name": "Glycerol (Glycerin)",
+        "short_description": "A powerful humectant that draws moisture into the skin.",
+        "what_is_it": "Glycerol (also called glycerin) is a natural compound derived from vegetable oils or animal fats. It's a humectant, meaning it attracts water.",
+        "what_does_it_do": "Attracts and retains moisture in the skin, helps strengthen the skin barrier, provides hydration, and makes skin feel soft and smooth.",
+        "who_is_it_good_for": "All skin types, especially dry and dehydrated skin",
+        "who_should_avoid": "Generally safe for all skin types",
+        "url": ""
+    },
+    "niacinamide": {
+        "name": "Niacinamide",
+        "short_description": "A form of Vitamin B3 that brightens, reduces pores, and strengthens the skin barrier.",
+        "what_is_it": "Niacinamide (Vitamin B3) is a water-soluble vitamin that offers multiple benefits for the skin.",
+        "what_does_it_do": "Reduces the appearance of pores, regulates oil production, brightens skin tone, reduces hyperpigmentation, strengthens the skin barrier, and has anti-inflammatory properties.",
+        "who_is_it_good_for": "All skin types, especially oily, acne-prone, aging, and hyperpigmented skin",
+        "who_should_avoid": "Generally safe for all skin types, though some may experience sensitivity at high concentrations",
+        "url": ""
+    },
+    "hyaluronic acid": {
+        "name": "Hyaluronic Acid",
+        "short_description": "A powerful humectant that can hold up to 1000x its weight in water.",
+        "what_is_it": "Hyaluronic acid is a naturally occurring substance in the skin that helps retain moisture and keep skin plump and hydrated.",
+        "what_does_it_do": "Provides intense hydration, plumps the skin, reduces the appearance of fine lines and wrinkles, and helps maintain skin elasticity.",
+        "who_is_it_good_for": "All skin types, especially dry, dehydrated, and aging skin",
+        "who_should_avoid": "Generally safe for all skin types. In very dry climates, use with an occlusive to prevent moisture loss",
+        "url": ""
+    },
+    "tocopherol": {
+        "name": "Tocopherol (Vitamin E)",
+        "short_description": "A fat-soluble antioxidant that protects skin from environmental damage.",
+        "what_is_it": "Tocopherol is the most common form of Vitamin E, a powerful antioxidant naturally found in the skin.",
+        "what_does_it_do": "Protects against free radical damage, helps moisturize and heal the skin, reduces inflammation, and can help fade scars and hyperpigmentation.",
+        "who_is_it_good_for": "All skin types, especially dry and mature skin",
+        "who_should_avoid": "Those with very oily or acne-prone skin may want to use lower concentrations as it can be comedogenic in high amounts",
+        "url": ""
+    },
+    "cetearyl alcohol": {
+        "name": "Cetearyl Alcohol",
+        "short_description": "A fatty alcohol that acts as an emollient and emulsifier.",
+        "what_is_it": "Cetearyl alcohol is a fatty alcohol derived from natural sources like coconut or palm oil. Unlike drying alcohols, it's actually beneficial for skin.",
+        "what_does_it_do": "Softens and smooths the skin, helps stabilize formulations, provides texture and consistency to products, and acts as a moisturizing agent.",
+        "who_is_it_good_for": "All skin types, especially dry skin",
+        "who_should_avoid": "Generally safe, though rarely may cause sensitivity in some individuals",
+        "url": ""
+    },
+    "parfum": {
+        "name": "Parfum (Fragrance)",
+        "short_description": "Added to products for scent, can be synthetic or natural.",
+        "what_is_it": "Parfum or fragrance is a blend of aromatic compounds added to cosmetic products to provide a pleasant smell.",
+        "what_does_it_do": "Provides scent to the product. Does not offer skincare benefits but enhances the sensory experience of using the product.",
+        "who_is_it_good_for": "Those who enjoy fragranced products and don't have sensitive skin",
+        "who_should_avoid": "People with sensitive skin, eczema, rosacea, or fragrance allergies should avoid fragranced products",
+        "url": ""
+    },
+    "fragrance": {
+        "name": "Fragrance (Parfum)",
+        "short_description": "Added to products for scent, can be synthetic or natural.",
+        "what_is_it": "Fragrance or parfum is a blend of aromatic compounds added to cosmetic products to provide a pleasant smell.",
+        "what_does_it_do": "Provides scent to the product. Does not offer skincare benefits but enhances the sensory experience of using the product.",
+        "who_is_it_good_for": "Those who enjoy fragranced products and don't have sensitive skin",
+        "who_should_avoid": "People with sensitive skin, eczema, rosacea, or fragrance allergies should avoid fragranced products",
+        "url": ""
+    }
+}
+
+
+def parse_ingredient_list(text: str) -> list:
+    """Parse uma lista de ingredientes separada por vírgulas ou ponto-e-vírgula."""
+    if not text or not isinstance(text, str):
+        return []
+
+    # Split by comma or semicolon
+    parts = re.split(r",|;", text)
+
+    # Clean and normalize
+    return [p.strip().lower() for p in parts if p.strip()]
+
+
+def get_common_ingredient_fallback(name_clean: str) -> dict:
+    """Retorna informações básicas para ingredientes comuns não encontrados no banco."""
+    return COMMON_INGREDIENTS.get(name_clean)
+
+
+class IngredientTexts:
+    """Textos longos do dicionário num único buffer UTF-8, indexado por offsets.
+
+    O valor do campo `f` da linha `r` está em `blob[offsets[r * n_fields + f]:offsets[r * n_fields + f + 1]]`.
+    Quando os arrays vêm do DatasetStore são memmaps, por isso só as páginas dos
+    ingredientes efetivamente mostrados são lidas do disco.
+    """
+
+    def __init__(self, fields: list, blob: np.ndarray, offsets: np.ndarray):
+        self.fields = list(fields)
+        self._field_ids = {field: i for i, field in enumerate(self.fields)}
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, fields: list) -> "IngredientTexts":
+        """Serializa as colunas `fields` (linha a linha; valores em falta ficam vazios)."""
+        encoded = [
+            "" if pd.isna(value) else str(value)
+            for row in df[fields].itertuples(index=False) for value in row
+        ]
+        encoded = [value.encode("utf-8") for value in encoded]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(fields, blob, offsets)
+
+    def to_arrays(self) -> dict:
+        return {"fields": np.asarray(self.fields, dtype=str), "blob": self.blob, "offsets": self.offsets}
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "IngredientTexts":
+        return cls(arrays["fields"].tolist(), arrays["blob"], arrays["offsets"])
+
+    def get(self, row: int, field: str) -> str:
+        """Texto de um campo de uma linha ("" se o campo não existir)."""
+        field_id = self._field_ids.get(field)
+        if field_id is None:
+            return ""
+        k = row * len(self.fields) + field_id
+        return bytes(self.blob[self.offsets[k]:self.offsets[k + 1]]).decode("utf-8")
+
+
+def split_ingredients(ingredients_df: pd.DataFrame) -> tuple:
+    """Separa o dicionário em (DataFrame compacto só com os nomes, IngredientTexts com os textos)."""
+    names = [c for c in NAME_FIELDS if c in ingredients_df.columns]
+    fields = [c for c in ingredients_df.columns if c not in NAME_FIELDS]
+    return ingredients_df[names].copy(), IngredientTexts.from_frame(ingredients_df, fields)
+
+
+class IngredientLookup:
+    """Pesquisa de ingredientes com índice exato em memória (dict) em vez de filtrar o DataFrame.
+
+    Com `texts`, o DataFrame só precisa dos nomes; as descrições são lidas de `texts` a pedido.
+    As correspondências parciais vêm de um SubstringIndex (trigramas) e os nomes não
+    encontrados recebem sugestões de um FuzzyIndex; `counts` (frequência de cada nome
+    nos produtos) desempata candidatos à mesma distância.
+    """
+
+    def __init__(self, ingredients_df: pd.DataFrame, texts: IngredientTexts = None, counts: dict = None):
+        self.df = ingredients_df
+        self.texts = texts
+        self.display_names = ingredients_df["name"].tolist() if "name" in ingredients_df.columns else []
+        if ingredients_df.empty or "name_clean" not in ingredients_df.columns:
+            self.names = []
+            self.exact = {}
+        else:
+            self.names = ingredients_df["name_clean"].fillna("").tolist()
+            # Guardar a primeira ocorrência de cada nome, como o filtro original
+            self.exact = {}
+            for position, name in enumerate(self.names):
+                self.exact.setdefault(name, position)
+
+        self.substrings = SubstringIndex(self.names)
+        # Sugestões sobre os nomes do dicionário e os ingredientes comuns (também reconhecidos por `info`)
+        self.fuzzy = FuzzyIndex(list(self.exact) + list(COMMON_INGREDIENTS), counts)
+
+    def find(self, name: str):
+        """Retorna a posição da linha correspondente (exata ou parcial) ou None."""
+        if not name or not isinstance(name, str):
+            return None
+
+        name_clean = name.strip().lower()
+
+        # Exact match
+        if name_clean in self.exact:
+            return self.exact[name_clean]
+
+        # If not found, partial match (primeiro nome que contém o texto, via trigramas)
+        return self.substrings.first(name_clean)
+
+    def row_info(self, position: int, default_name: str = "") -> dict:
+        """Converte uma linha do dicionário no formato usado pelas páginas."""
+        if self.texts is not None:
+            info = {"name": self.display_names[position] if self.display_names else default_name}
+            info.update({field: self.texts.get(position, field) for field in INFO_FIELDS})
+            return info
+
+        row = self.df.iloc[position]
+        info = {"name": row.get("name", default_name)}
+        for field in INFO_FIELDS:
+            value = row.get(field, "")
+            info[field] = "" if pd.isna(value) else value
+        return info
+
+    def info(self, name: str) -> dict:
+        """Busca informações sobre um ingrediente específico."""
+        if not name or not isinstance(name, str):
+            return None
+
+        position = self.find(name)
+
+        # If not found, try common ingredient fallbacks
+        if position is None:
+            return get_common_ingredient_fallback(name.strip().lower())
+
+        return self.row_info(position, name.title())
+
+    def display_name(self, name_clean: str) -> str:
+        """Nome do dicionário (com a capitalização original) para um nome normalizado."""
+        position = self.exact.get(name_clean)
+        if position is not None and self.display_names:
+            return self.display_names[position]
+        return COMMON_INGREDIENTS.get(name_clean, {}).get("name", name_clean.title())
+
+    def suggest(self, name: str, limit: int = 3) -> list:
+        """Candidatos "did you mean" para um nome com erros, do mais para o menos provável.
+
+        Cada sugestão é {"name", "query", "distance"}; `query` pode ser passado a `info`.
+        """
+        if not name or not isinstance(name, str):
+            return []
+        name_clean = name.strip().lower()
+        if len(name_clean) < MIN_FUZZY_LENGTH:
+            return []
+        return [
+            {"name": self.display_name(term), "query": term, "distance": distance}
+            for term, distance in self.fuzzy.lookup(name_clean, limit)
+        ]
+
+    def resolve(self, name: str, limit: int = 3) -> dict:
+        """Informação de um ingrediente, corrigindo erros de escrita quando não há ambiguidade.
+
+        Retorna {"info", "corrected_to", "suggestions"}: `info` é None se nada for reconhecido
+        e `corrected_to` o nome usado quando a informação vem de uma correção automática.
+        """
+        info = self.info(name)
+        if info is not None:
+            return {"info": info, "corrected_to": None, "suggestions": []}
+
+        suggestions = self.suggest(name, limit)
+        best = suggestions[0] if suggestions else None
+        unique = len(suggestions) < 2 or suggestions[1]["distance"] > best["distance"]
+        if best is not None and best["distance"] <= AUTOCORRECT_DISTANCE and unique:
+            return {"info": self.info(best["query"]), "corrected_to": best["name"], "suggestions": suggestions}
+        return {"info": None, "corrected_to": None, "suggestions": suggestions}
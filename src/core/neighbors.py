@@ -0,0 +1,206 @@
+"""
+Grafo kNN produto→produto (Jaccard dos ingredientes) pré-calculado para "produtos semelhantes"
+
+O grafo é O(N²) e só é calculado offline; a app carrega-o do cache persistente se
+já tiver sido publicado e, se não, calcula os vizinhos de cada produto a pedido.
+Uso (a partir da raiz do repositório, para publicar o grafo no cache persistente):
+
+    python -m src.core.neighbors --workers 4
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.core.index import CatalogIndex
+from src.core.store import DatasetStore
+
+# Vizinhos guardados por produto
+NEIGHBORS_K = 10
+
+# Entradas das posting lists (pares linha do bloco × produto) acumuladas de cada vez; limita a memória por bloco
+BLOCK_HITS = 4_000_000
+
+# Nome do artefacto no DatasetStore
+_ARTIFACT = f"product_neighbors_k{NEIGHBORS_K}"
+
+# Índice usado pelos processos do pool (definido uma vez por processo no initializer)
+_WORKER_INDEX = None
+
+
+def _row_hits(index: CatalogIndex) -> np.ndarray:
+    """Número de entradas das posting lists percorridas por cada linha (soma das frequências dos seus ingredientes)."""
+    per_entry = index.document_frequencies()[index.indices].astype(np.int64)
+    return np.diff(np.r_[0, np.cumsum(per_entry)][index.indptr])
+
+
+def _block_neighbors(index: CatalogIndex, start: int, stop: int, k: int) -> tuple:
+    """Vizinhos das linhas [start, stop): produto esparso bloco × catálogo via posting lists.
+
+    Só os pares (linha, produto) com algum ingrediente em comum são acumulados (ordenação
+    das chaves + contagem), sem matriz densa linhas × catálogo; o top-k de cada linha sai
+    de `argpartition` sobre os seus candidatos.
+    """
+    n = index.n_products
+    n_rows = stop - start
+    neighbors = np.full((n_rows, k), -1, dtype=np.int32)
+    scores = np.zeros((n_rows, k), dtype=np.float16)
+
+    # Cada ingrediente do bloco contribui com a sua posting list para a linha a que pertence
+    terms = index.indices[index.indptr[start]:index.indptr[stop]]
+    owners = np.repeat(np.arange(n_rows, dtype=np.int64), np.diff(index.indptr[start:stop + 1]))
+    lengths = index.post_indptr[terms + 1] - index.post_indptr[terms]
+    if lengths.sum() == 0:
+        return neighbors, scores
+    offsets = np.repeat(index.post_indptr[terms] - np.cumsum(lengths) + lengths, lengths)
+    hits = index.post_indices[offsets + np.arange(lengths.sum())]
+    # Chave linha·n + produto (int32 quando cabe, que ordena mais depressa); contagem por ordenação
+    dtype = np.int32 if n_rows * n < np.iinfo(np.int32).max else np.int64
+    keys = np.repeat(owners.astype(dtype), lengths) * dtype(n) + hits.astype(dtype)
+    keys.sort()
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    counts = np.diff(np.r_[starts, len(keys)])
+    rows, products = np.divmod(keys[starts], dtype(n))
+
+    union = index.sizes[start + rows] + index.sizes[products] - counts
+    similarity = counts / union
+    # O próprio produto e os removidos nunca são vizinhos
+    keep = (products != start + rows) & index.live_mask()[products]
+    rows, products, similarity = rows[keep], products[keep], similarity[keep]
+
+    # Os pares vêm ordenados por linha: cada linha é um segmento contíguo
+    bounds = np.searchsorted(rows, np.arange(n_rows + 1))
+    for row in np.flatnonzero(np.diff(bounds)).tolist():
+        lo, hi = bounds[row], bounds[row + 1]
+        candidates = similarity[lo:hi]
+        top = np.arange(hi - lo)
+        if len(top) > k:
+            top = np.argpartition(-candidates, k - 1)[:k]
+        top = top[np.argsort(-candidates[top], kind="stable")]
+        neighbors[row, :len(top)] = products[lo:hi][top]
+        scores[row, :len(top)] = candidates[top]
+    return neighbors, scores
+
+
+def _init_worker(arrays: dict):
+    global _WORKER_INDEX
+    _WORKER_INDEX = CatalogIndex.from_arrays(arrays)
+
+
+def _worker_block(args: tuple) -> tuple:
+    return _block_neighbors(_WORKER_INDEX, *args)
+
+
+def _blocks(index: CatalogIndex, start: int) -> list:
+    """Blocos de linhas consecutivas a partir de `start` com até ~BLOCK_HITS entradas das posting lists cada."""
+    cumulative = np.cumsum(_row_hits(index)[start:])
+    blocks = []
+    row = 0
+    while row < len(cumulative):
+        base = cumulative[row - 1] if row else 0
+        stop = max(int(np.searchsorted(cumulative, base + BLOCK_HITS, side="right")), row + 1)
+        blocks.append((start + row, start + stop))
+        row = stop
+    return blocks
+
+
+class NeighborGraph:
+    """Os `k` produtos mais semelhantes (Jaccard) a cada produto, em arrays N×k compactos.
+
+    `neighbors[i]` tem as posições em `Catalog.products` por ordem decrescente de
+    semelhança (-1 = sem vizinho) e `scores[i]` as semelhanças (float16).
+    """
+
+    def __init__(self, neighbors: np.ndarray, scores: np.ndarray):
+        self.neighbors = neighbors
+        self.scores = scores
+        self.k = neighbors.shape[1]
+
+    @staticmethod
+    def _compute(index: CatalogIndex, start: int, k: int, workers: int) -> tuple:
+        blocks = _blocks(index, start)
+        if workers > 1 and len(blocks) > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(index.to_arrays(),)) as pool:
+                parts = list(pool.map(_worker_block, [(a, b, k) for a, b in blocks]))
+        else:
+            parts = [_block_neighbors(index, a, b, k) for a, b in blocks]
+
+        if not parts:
+            return np.zeros((0, k), dtype=np.int32), np.zeros((0, k), dtype=np.float16)
+        return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+    @classmethod
+    def build(cls, index: CatalogIndex, k: int = NEIGHBORS_K, workers: int = 0) -> "NeighborGraph":
+        """Calcula o grafo para todo o índice, por blocos de linhas (num pool de `workers` processos se > 1)."""
+        return cls(*cls._compute(index, 0, k, workers))
+
+    def extended(self, index: CatalogIndex) -> "NeighborGraph":
+        """Grafo para um índice com produtos acrescentados no fim (ver `CatalogIndex.apply_changes`).
+
+        Só as linhas novas são calculadas; as listas existentes não passam a incluir os
+        produtos novos e os vizinhos removidos são ignorados em `similar`.
+        """
+        if index.n_products == len(self.neighbors):
+            return self
+        neighbors, scores = self._compute(index, len(self.neighbors), self.k, workers=0)
+        return NeighborGraph(np.concatenate([self.neighbors, neighbors]), np.concatenate([self.scores, scores]))
+
+    @classmethod
+    def published(cls, store: DatasetStore, sources: list):
+        """Grafo já publicado no DatasetStore (por `publish_neighbors`), ou None; nunca o calcula."""
+        arrays = store.published(_ARTIFACT, sources)
+        return None if arrays is None else cls.from_arrays(arrays)
+
+    def to_arrays(self) -> dict:
+        return {"neighbors": self.neighbors, "scores": self.scores}
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "NeighborGraph":
+        return cls(arrays["neighbors"], arrays["scores"])
+
+    def similar(self, row: int, top_k: int = None, live: np.ndarray = None) -> tuple:
+        """(posições, semelhanças) dos vizinhos de `row`, em O(k); com `live`, sem os produtos removidos."""
+        neighbors = self.neighbors[row]
+        keep = neighbors >= 0
+        if live is not None:
+            keep &= live[np.maximum(neighbors, 0)]
+        neighbors, scores = neighbors[keep], self.scores[row][keep]
+        return neighbors[:top_k], scores[:top_k].astype(float)
+
+
+def row_neighbors(index: CatalogIndex, row: int, k: int = NEIGHBORS_K) -> tuple:
+    """(posições, semelhanças) dos `k` vizinhos de um produto, calculados a pedido (sem grafo publicado)."""
+    neighbors, scores = _block_neighbors(index, row, row + 1, k)
+    found = neighbors[0] >= 0
+    return neighbors[0][found], scores[0][found].astype(float)
+
+
+def publish_neighbors(index: CatalogIndex, store: DatasetStore, sources: list, workers: int = 0) -> NeighborGraph:
+    """Calcula o grafo (num pool de `workers` processos) e publica-o no DatasetStore, se ainda não existir."""
+    return NeighborGraph.from_arrays(store.arrays(
+        _ARTIFACT, sources, lambda: NeighborGraph.build(index, NEIGHBORS_K, workers).to_arrays()
+    ))
+
+
+def main(argv: list = None):
+    from src.config import DATA_PATHS, DATASET_CACHE_DIR
+    from src.core.catalog import load_catalog
+
+    parser = argparse.ArgumentParser(description="Precompute the similar-products (kNN) graph")
+    parser.add_argument("--products", default=DATA_PATHS["products"])
+    parser.add_argument("--ingredients", default=DATA_PATHS["ingredients"])
+    parser.add_argument("--directory", default=DATASET_CACHE_DIR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    store = DatasetStore(args.directory)
+    catalog = load_catalog(args.products, args.ingredients, store)
+    graph = publish_neighbors(catalog.index, store, [args.products], args.workers)
+    print(f"Published {len(graph.neighbors)} x {graph.k} neighbors to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
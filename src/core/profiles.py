@@ -0,0 +1,271 @@
+"""
+Recomendações por perfil pré-calculadas para todo o espaço (finito) de perfis
+
+Uso (a partir da raiz do repositório, para publicar a tabela no cache persistente):
+
+    python -m src.core.profiles
+"""
+
+import argparse
+import bisect
+import hashlib
+from itertools import combinations, product
+
+import numpy as np
+
+from src.core.catalog import Catalog
+from src.core.store import DatasetStore
+
+
+def budget_frontier(prices: np.ndarray, top_n: int) -> np.ndarray:
+    """Posições (por ordem de ranking) que estão no top `top_n` para algum orçamento.
+
+    `prices` segue a ordem do ranking. Uma posição entra se menos de `top_n` posições
+    anteriores custarem o mesmo ou menos; o top N para um orçamento é então o prefixo
+    dos primeiros `top_n` itens da fronteira com preço <= orçamento.
+    """
+    kept = []
+    cheapest = []  # os `top_n` menores preços já vistos, ordenados
+    rest = np.flatnonzero(~np.isnan(prices))
+    pos = 0
+    while pos < len(rest):
+        i = rest[pos]
+        kept.append(i)
+        bisect.insort(cheapest, prices[i])
+        del cheapest[top_n:]
+        pos += 1
+        if len(cheapest) == top_n:
+            # O limite só desce: filtrar de uma vez as posições que já não podem entrar
+            rest = rest[pos:]
+            rest = rest[prices[rest] < cheapest[-1]]
+            pos = 0
+    return np.asarray(kept, dtype=np.int64)
+
+
+class ProfileSpace:
+    """Combinações de perfil que mudam a recomendação: tipo de pele, até `max_concerns`
+    preocupações e o conjunto de flags excluídas (sensibilidade + preferência de fragrância).
+
+    A idade, o clima e a exposição solar não entram no ranking; o orçamento é aplicado
+    na consulta sobre a fronteira de preços de cada combinação.
+    """
+
+    def __init__(self, skin_types: list, concerns: list, sensitivity_flags: dict, fragrance_flags: dict,
+                 max_concerns: int = 3, top_n: int = 5):
+        self.skin_types = list(skin_types)
+        self.concerns = list(concerns)
+        self.sensitivity_flags = {level: sorted(flags) for level, flags in sensitivity_flags.items()}
+        self.fragrance_flags = {pref: sorted(flags) for pref, flags in fragrance_flags.items()}
+        self.max_concerns = max_concerns
+        self.top_n = top_n
+
+        self._concern_order = {concern: i for i, concern in enumerate(self.concerns)}
+        self.concern_sets = [
+            subset for size in range(max_concerns + 1) for subset in combinations(self.concerns, size)
+        ]
+        self.exclusions = sorted({
+            self.excluded_flags(level, pref)
+            for level, pref in product([None, *self.sensitivity_flags], [None, *self.fragrance_flags])
+        })
+        self.keys = list(product(self.skin_types, self.concern_sets, self.exclusions))
+        self._key_ids = {key: i for i, key in enumerate(self.keys)}
+
+    @classmethod
+    def from_config(cls) -> "ProfileSpace":
+        """Espaço definido pelas opções de perfil de src/config.py."""
+        from src.config import (
+            FRAGRANCE_EXCLUDED_FLAGS, PROFILE_MAX_CONCERNS, PROFILE_TOP_N, SENSITIVITY_EXCLUDED_FLAGS, SKIN_CONCERNS,
+            SKIN_TYPES
+        )
+        return cls(SKIN_TYPES, SKIN_CONCERNS, SENSITIVITY_EXCLUDED_FLAGS, FRAGRANCE_EXCLUDED_FLAGS,
+                   max_concerns=PROFILE_MAX_CONCERNS, top_n=PROFILE_TOP_N)
+
+    def excluded_flags(self, sensitivity: str = None, fragrance: str = None) -> tuple:
+        """Flags excluídas para uma sensibilidade e preferência de fragrância."""
+        flags = set(self.sensitivity_flags.get(sensitivity, [])) | set(self.fragrance_flags.get(fragrance, []))
+        return tuple(sorted(flags))
+
+    def key(self, skin_type: str, concerns: list, sensitivity: str = None, fragrance: str = None) -> tuple:
+        """Chave normalizada (as preocupações seguem a ordem da configuração)."""
+        concerns = tuple(sorted(set(concerns), key=lambda c: self._concern_order.get(c, len(self.concerns))))
+        return skin_type, concerns, self.excluded_flags(sensitivity, fragrance)
+
+    def key_id(self, key: tuple):
+        """Posição da combinação na tabela, ou None se estiver fora do espaço."""
+        return self._key_ids.get(key)
+
+    def fingerprint(self) -> str:
+        """Identifica a definição do espaço (parte do nome da tabela no DatasetStore)."""
+        spec = (self.skin_types, self.concerns, self.sensitivity_flags, self.fragrance_flags,
+                self.max_concerns, self.top_n)
+        return hashlib.sha1(repr(spec).encode("utf-8")).hexdigest()[:12]
+
+
+class ProfileTable:
+    """Tabela compacta com a fronteira de recomendações de cada combinação de `ProfileSpace`.
+
+    Os itens da combinação `k` estão em `rows[offsets[k]:offsets[k + 1]]` (posições em
+    `Catalog.products`, por ordem de ranking), com os preços e as pontuações ao lado.
+    Consultar um perfil é um corte por orçamento de poucas dezenas de itens.
+    `n_products` é o tamanho do catálogo para o qual foi calculada (ver `extended`).
+    """
+
+    def __init__(self, space: ProfileSpace, offsets: np.ndarray, rows: np.ndarray,
+                 prices: np.ndarray, scores: np.ndarray, n_products: int):
+        self.space = space
+        self.offsets = offsets
+        self.rows = rows
+        self.prices = prices
+        self.scores = scores
+        self.n_products = n_products
+
+    @staticmethod
+    def _candidates(catalog: Catalog, flags: tuple) -> np.ndarray:
+        """Máscara dos produtos ativos, com preço e sem as flags excluídas."""
+        if catalog.prices is None:
+            return np.zeros(catalog.index.n_products, dtype=bool)
+        return catalog.index.live_mask() & ~np.isnan(catalog.prices) & catalog.flag_mask(exclude=flags)
+
+    @staticmethod
+    def _scores(catalog: Catalog, target_scores: np.ndarray, candidates: np.ndarray,
+                skin_type: str, concerns: tuple) -> np.ndarray:
+        if concerns:
+            vector = catalog.concern_weights.vector(concerns, skin_type)
+            return (target_scores[candidates] @ vector).astype(np.float32)
+        # Sem preocupações não há ranking: ordem do catálogo
+        return np.zeros(len(candidates), dtype=np.float32)
+
+    @staticmethod
+    def _frontier(catalog: Catalog, space: ProfileSpace, candidates: np.ndarray, scores: np.ndarray) -> tuple:
+        """(posições, pontuações) da fronteira, por pontuação decrescente e, nos empates, pela posição."""
+        order = np.lexsort((candidates, -scores))
+        frontier = order[budget_frontier(catalog.prices[candidates[order]], space.top_n)]
+        return candidates[frontier].astype(np.int32), scores[frontier]
+
+    @classmethod
+    def _rank(cls, catalog: Catalog, space: ProfileSpace, target_scores: np.ndarray, allowed: np.ndarray,
+              skin_type: str, concerns: tuple) -> tuple:
+        """(posições, pontuações) da fronteira de uma combinação."""
+        candidates = np.flatnonzero(allowed)
+        if not len(candidates):
+            return candidates.astype(np.int32), np.zeros(0, dtype=np.float32)
+        scores = cls._scores(catalog, target_scores, candidates, skin_type, concerns)
+        return cls._frontier(catalog, space, candidates, scores)
+
+    @classmethod
+    def build(cls, catalog: Catalog, space: ProfileSpace) -> "ProfileTable":
+        """Calcula a fronteira de todas as combinações do espaço."""
+        target_scores = catalog.concern_weights.target_scores(catalog.index)
+        allowed = {flags: cls._candidates(catalog, flags) for flags in space.exclusions}
+        parts = [
+            cls._rank(catalog, space, target_scores, allowed[flags], skin_type, concerns)
+            for skin_type, concerns, flags in space.keys
+        ]
+        return cls._assemble(catalog, space, parts)
+
+    @classmethod
+    def _assemble(cls, catalog: Catalog, space: ProfileSpace, parts: list) -> "ProfileTable":
+        offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+        np.cumsum([len(rows) for rows, _ in parts], out=offsets[1:])
+        rows = np.concatenate([np.zeros(0, dtype=np.int32)] + [rows for rows, _ in parts]).astype(np.int32)
+        scores = np.concatenate([np.zeros(0, dtype=np.float32)] + [s for _, s in parts])
+        prices = catalog.prices[rows].astype(float) if len(rows) else np.zeros(0, dtype=float)
+        return cls(space, offsets, rows, prices, scores, catalog.index.n_products)
+
+    def extended(self, catalog: Catalog) -> "ProfileTable":
+        """Tabela para um snapshot posterior (deltas: produtos removidos e acrescentados no fim).
+
+        Um produto fora da fronteira continua fora quando outros entram ou saem, por isso
+        a nova fronteira de cada combinação sai da fronteira atual mais os produtos novos
+        que passam os filtros. Só as combinações com algum produto removido na fronteira
+        são recalculadas sobre o catálogo inteiro.
+        """
+        start = self.n_products
+        live = catalog.index.live_mask()
+        target_scores = catalog.concern_weights.target_scores(catalog.index)
+        allowed = {flags: self._candidates(catalog, flags) for flags in self.space.exclusions}
+        added = {flags: start + np.flatnonzero(mask[start:]) for flags, mask in allowed.items()}
+
+        parts = []
+        for key_id, (skin_type, concerns, flags) in enumerate(self.space.keys):
+            lo, hi = self.offsets[key_id], self.offsets[key_id + 1]
+            rows = np.asarray(self.rows[lo:hi])
+            if not live[rows].all():
+                parts.append(self._rank(catalog, self.space, target_scores, allowed[flags], skin_type, concerns))
+                continue
+            scores = np.asarray(self.scores[lo:hi])
+            new_rows = added[flags]
+            if len(new_rows):
+                new_scores = self._scores(catalog, target_scores, new_rows, skin_type, concerns)
+                rows, scores = self._frontier(catalog, self.space, np.concatenate([rows, new_rows]),
+                                              np.concatenate([scores, new_scores]))
+            parts.append((rows, scores))
+        return self._assemble(catalog, self.space, parts)
+
+    @classmethod
+    def load(cls, catalog: Catalog, space: ProfileSpace, store: DatasetStore = None,
+             sources: list = None, base: "ProfileTable" = None) -> "ProfileTable":
+        """Tabela do DatasetStore (calculada e publicada se ainda não existir) ou calculada em memória.
+
+        Com `base` (tabela de um snapshot anterior do mesmo catálogo), é obtida com `extended`
+        em vez de recalculada. Depois de deltas, a chave inclui `Catalog.delta_key`.
+        """
+        def build():
+            return base.extended(catalog) if base is not None else cls.build(catalog, space)
+
+        if store is None or sources is None:
+            return build()
+        arrays = store.arrays(f"profile_table_{space.fingerprint()}", sources,
+                              lambda: build().to_arrays(), revision=catalog.delta_key)
+        return cls.from_arrays(space, arrays)
+
+    def to_arrays(self) -> dict:
+        return {"offsets": self.offsets, "rows": self.rows, "prices": self.prices, "scores": self.scores,
+                "n_products": np.array(self.n_products, dtype=np.int64)}
+
+    @classmethod
+    def from_arrays(cls, space: ProfileSpace, arrays) -> "ProfileTable":
+        return cls(space, arrays["offsets"], arrays["rows"], arrays["prices"], arrays["scores"],
+                   int(arrays["n_products"]))
+
+    def lookup(self, key: tuple, budget: float):
+        """(posições, pontuações) do top N da combinação `key` até `budget`, ou None se `key` não estiver no espaço."""
+        key_id = self.space.key_id(key)
+        if key_id is None:
+            return None
+        start, end = self.offsets[key_id], self.offsets[key_id + 1]
+        within = np.flatnonzero(self.prices[start:end] <= budget)[:self.space.top_n]
+        return self.rows[start:end][within], self.scores[start:end][within]
+
+    @classmethod
+    def rank_profile(cls, catalog: Catalog, space: ProfileSpace, key: tuple, budget: float) -> tuple:
+        """O mesmo que `lookup`, calculado na hora (para perfis fora do espaço pré-calculado)."""
+        skin_type, concerns, flags = key
+        rows, scores = cls._rank(catalog, space, catalog.concern_weights.target_scores(catalog.index),
+                                 cls._candidates(catalog, flags), skin_type, concerns)
+        if not len(rows):
+            return rows, scores
+        within = np.flatnonzero(catalog.prices[rows] <= budget)[:space.top_n]
+        return rows[within], scores[within]
+
+
+def main(argv: list = None):
+    from src.config import DATA_PATHS, DATASET_CACHE_DIR
+    from src.core.catalog import load_catalog
+
+    parser = argparse.ArgumentParser(description="Precompute the profile recommendation table")
+    parser.add_argument("--products", default=DATA_PATHS["products"])
+    parser.add_argument("--ingredients", default=DATA_PATHS["ingredients"])
+    parser.add_argument("--directory", default=DATASET_CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    store = DatasetStore(args.directory)
+    space = ProfileSpace.from_config()
+    catalog = load_catalog(args.products, args.ingredients, store)
+    table = ProfileTable.load(catalog, space, store, [args.products, args.ingredients])
+    print(f"Published {len(space.keys)} profile combinations ({len(table.rows)} entries) "
+          f"to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
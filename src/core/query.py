@@ -0,0 +1,161 @@
+"""
+Consultas booleanas por ingredientes (tem todos / tem algum / não tem nenhum) sobre as posting lists do índice
+"""
+
+import numpy as np
+
+from src.core.index import CatalogIndex
+
+# Ingredientes presentes em pelo menos n / DENSE_RATIO produtos têm também um bitmap compacto
+DENSE_RATIO = 32
+
+
+def contains(sorted_values: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Máscara de `values` que existem em `sorted_values` (pesquisa binária, O(m log n))."""
+    if not len(sorted_values):
+        return np.zeros(len(values), dtype=bool)
+    positions = np.searchsorted(sorted_values, values)
+    positions[positions == len(sorted_values)] = 0
+    return sorted_values[positions] == values
+
+
+def intersect(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Interseção de dois arrays ordenados e sem repetidos: a lista menor é procurada na maior."""
+    if len(a) > len(b):
+        a, b = b, a
+    return a[contains(b, a)]
+
+
+def difference(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """`a` sem os elementos de `b` (ambos ordenados e sem repetidos)."""
+    return a[~contains(b, a)]
+
+
+def pack(mask: np.ndarray) -> np.ndarray:
+    """Bitmap compacto (uint8, bit `i % 8` do byte `i // 8`) de uma máscara booleana."""
+    return np.packbits(mask, bitorder="little")
+
+
+def unpack(bitmap: np.ndarray, n: int) -> np.ndarray:
+    """Máscara booleana de `n` posições a partir de `pack`."""
+    return np.unpackbits(bitmap, count=n, bitorder="little").view(bool)
+
+
+def test_bits(bitmap: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Máscara de `rows` cujo bit está ligado no bitmap, em O(len(rows))."""
+    return (bitmap[rows >> 3] >> (rows & 7).astype(np.uint8)) & 1 == 1
+
+
+class PostingBitmaps:
+    """Bitmaps compactos das posting lists dos ingredientes frequentes (ao estilo Roaring).
+
+    Listas curtas cruzam-se por pesquisa binária; para ingredientes presentes em boa parte
+    do catálogo (ex.: "aqua") testar um bit por produto ou combinar bitmaps de n/8 bytes
+    é muito mais rápido do que percorrer a lista. Calculados uma vez por snapshot.
+    """
+
+    def __init__(self, index: CatalogIndex, ratio: int = DENSE_RATIO):
+        frequencies = index.document_frequencies()
+        dense = np.flatnonzero(frequencies >= max(1, index.n_products // ratio))
+        self.rows = {int(term_id): i for i, term_id in enumerate(dense)}
+        self.bitmaps = np.zeros((len(dense), (index.n_products + 7) // 8), dtype=np.uint8)
+        for i, term_id in enumerate(dense):
+            mask = np.zeros(index.n_products, dtype=bool)
+            mask[index.postings(term_id)] = True
+            self.bitmaps[i] = pack(mask)
+        self.live = pack(index.live_mask())
+
+    def get(self, term_id: int):
+        """Bitmap do ingrediente, ou None se for pouco frequente (usar a posting list)."""
+        i = self.rows.get(term_id)
+        return None if i is None else self.bitmaps[i]
+
+
+class IngredientQuery:
+    """Filtro por ingredientes: produtos com todos os `all_of`, pelo menos um dos `any_of`
+    (se houver) e nenhum dos `none_of`.
+
+    Avaliado com as posting lists (ordenadas) dos ingredientes pedidos: AND das listas, da
+    mais curta para a mais longa, OR do grupo `any_of` e NOT de cada excluído. Com
+    `PostingBitmaps`, os ingredientes frequentes são testados bit a bit, e sem nenhuma
+    lista curta a consulta é resolvida só com operações sobre bitmaps.
+    Ingredientes desconhecidos em `all_of` não dão resultados; nos outros grupos são ignorados.
+    """
+
+    def __init__(self, all_of=(), any_of=(), none_of=()):
+        self.all_of = self._normalize(all_of)
+        self.any_of = self._normalize(any_of)
+        self.none_of = self._normalize(none_of)
+
+    @staticmethod
+    def _normalize(names) -> list:
+        return list(dict.fromkeys(n.strip().lower() for n in names if n and n.strip()))
+
+    def is_empty(self) -> bool:
+        return not (self.all_of or self.any_of or self.none_of)
+
+    @staticmethod
+    def _split(index: CatalogIndex, bitmaps: PostingBitmaps, names: list) -> tuple:
+        """(posting lists curtas, bitmaps) dos ingredientes conhecidos em `names`."""
+        sparse, dense = [], []
+        for name in names:
+            term_id = index.vocab.get(name)
+            if term_id is None:
+                continue
+            bitmap = bitmaps.get(term_id) if bitmaps is not None else None
+            if bitmap is None:
+                sparse.append(index.postings(term_id))
+            else:
+                dense.append(bitmap)
+        return sparse, dense
+
+    def _any_of(self, index: CatalogIndex, bitmaps: PostingBitmaps) -> tuple:
+        """O grupo `any_of` como (posting list, None) se só tiver listas curtas, senão (None, bitmap)."""
+        sparse, dense = self._split(index, bitmaps, self.any_of)
+        if not dense:
+            sparse = [s for s in sparse if len(s)]
+            if len(sparse) <= 1:
+                return (sparse[0] if sparse else np.zeros(0, dtype=np.int32)), None
+            return np.unique(np.concatenate(sparse)), None
+        mask = np.zeros(index.n_products, dtype=bool)
+        for postings in sparse:
+            mask[postings] = True
+        return None, np.bitwise_or.reduce([pack(mask), *dense])
+
+    def rows(self, index: CatalogIndex, bitmaps: PostingBitmaps = None) -> np.ndarray:
+        """Posições ordenadas dos produtos ativos que satisfazem a consulta."""
+        if any(name not in index.vocab for name in self.all_of):
+            return np.zeros(0, dtype=np.int32)
+
+        required, required_bitmaps = self._split(index, bitmaps, self.all_of)
+        if self.any_of:
+            postings, bitmap = self._any_of(index, bitmaps)
+            if bitmap is None:
+                required.append(postings)
+            else:
+                required_bitmaps.append(bitmap)
+        excluded, excluded_bitmaps = self._split(index, bitmaps, self.none_of)
+
+        if not required:
+            # Só bitmaps: AND / AND NOT sobre n/8 bytes; as exclusões curtas apagam posições
+            live = bitmaps.live if bitmaps is not None else pack(index.live_mask())
+            bitmap = np.bitwise_and.reduce([live, *required_bitmaps])
+            for other in excluded_bitmaps:
+                bitmap = bitmap & ~other
+            mask = unpack(bitmap, index.n_products).copy()
+            for postings in excluded:
+                mask[postings] = False
+            return np.flatnonzero(mask).astype(np.int32)
+
+        # Partir da posting list mais curta; o resultado só diminui
+        required.sort(key=len)
+        rows = required[0]
+        for postings in required[1:]:
+            rows = intersect(rows, postings)
+        for bitmap in required_bitmaps:
+            rows = rows[test_bits(bitmap, rows)]
+        for bitmap in excluded_bitmaps:
+            rows = rows[~test_bits(bitmap, rows)]
+        for postings in excluded:
+            rows = difference(rows, postings)
+        return rows
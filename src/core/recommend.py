@@ -0,0 +1,122 @@
+"""
+Recomendação de produtos por similaridade de ingredientes (Jaccard)
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.core.index import CatalogIndex
+
+# Colunas acrescentadas às recomendações com `explain` (chave de `explain_rows` -> coluna)
+EXPLANATION_COLUMNS = {
+    "shared": "shared_ingredients",
+    "only_in_query": "only_in_query",
+    "only_in_product": "only_in_product"
+}
+
+
+def top_k_rows(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Posições dos `top_k` maiores scores (empates resolvidos pela ordem do catálogo)."""
+    n = len(scores)
+    top_k = min(top_k, n)
+    if top_k <= 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # np.partition é O(n); só os candidatos são ordenados
+    if top_k < n:
+        threshold = np.partition(scores, n - top_k)[n - top_k]
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)[:top_k - len(above)]
+        candidates = np.concatenate([above, ties])
+    else:
+        candidates = np.arange(n)
+
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order[:top_k]]
+
+
+def recommend_rows(index: CatalogIndex, ingredient_list: list, top_k: int = 3, allowed: np.ndarray = None) -> tuple:
+    """Retorna (posições, scores) dos `top_k` produtos mais semelhantes; vazio se a lista não tiver ingredientes."""
+    return recommend_ids(index, *index.encode(ingredient_list or []), top_k, allowed=allowed)
+
+
+def recommend_ids(index: CatalogIndex, term_ids: np.ndarray, n_query: int, top_k: int = 3, scorer=None,
+                  allowed: np.ndarray = None) -> tuple:
+    """Como `recommend_rows`, mas a partir de ingredientes já codificados (ver `CatalogIndex.encode`).
+
+    `scorer` calcula o Jaccard em vez do índice (ex.: `BitsetIndex`); os resultados são os mesmos.
+    `allowed` limita os candidatos (ex.: um produto por formulação, ver `ProductClusters`).
+    """
+    if n_query == 0 or index.n_products == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+
+    scores = (scorer or index).jaccard_from_ids(term_ids, n_query)
+    # Produtos removidos nunca são recomendados
+    excluded = ~index.live if index.live is not None else None
+    if allowed is not None:
+        excluded = ~allowed if excluded is None else excluded | ~allowed
+    if excluded is not None:
+        scores[excluded] = -1.0
+        rows = top_k_rows(scores, top_k)
+        rows = rows[scores[rows] >= 0]
+    else:
+        rows = top_k_rows(scores, top_k)
+    return rows, scores[rows]
+
+
+def recommend(products_df: pd.DataFrame, index: CatalogIndex, ingredient_list: list, top_k: int = 3,
+              allowed: np.ndarray = None) -> pd.DataFrame:
+    """Retorna os `top_k` produtos mais semelhantes, com a coluna `similarity`."""
+    if not ingredient_list or products_df.empty:
+        return pd.DataFrame()
+
+    return rows_to_frame(products_df, *recommend_rows(index, ingredient_list, top_k, allowed))
+
+
+def explain_rows(index: CatalogIndex, ingredient_list: list, rows) -> list:
+    """Ingredientes em comum, só na consulta e só no produto, para cada posição de `rows`.
+
+    Calculado sobre os arrays ordenados de ids, sem construir sets Python: uma tabela
+    booleana dos ids da consulta separa os ids de cada produto num único passo linear
+    (o resultado continua ordenado); ingredientes desconhecidos do índice contam como
+    só na consulta.
+    """
+    term_ids, _ = index.encode(ingredient_list or [])
+    names = {i.strip().lower() for i in ingredient_list or [] if i and i.strip()}
+    unknown = sorted(name for name in names if name not in index.vocab)
+    in_query = np.zeros(index.n_terms, dtype=bool)
+    in_query[term_ids] = True
+
+    explanations = []
+    for row in rows:
+        product_ids = index.product_ids(row)
+        is_shared = in_query[product_ids]
+        shared = product_ids[is_shared]
+        # `shared` é um subconjunto ordenado de `term_ids`: o resto da consulta sai por pesquisa binária
+        only_in_query = np.ones(len(term_ids), dtype=bool)
+        only_in_query[np.searchsorted(term_ids, shared)] = False
+        explanations.append({
+            "shared": index.terms[shared].tolist(),
+            "only_in_query": index.terms[term_ids[only_in_query]].tolist() + unknown,
+            "only_in_product": index.terms[product_ids[~is_shared]].tolist()
+        })
+    return explanations
+
+
+def add_explanations(recommendations: pd.DataFrame, index: CatalogIndex, ingredient_list: list) -> pd.DataFrame:
+    """Cópia de `recommendations` (índice = posições no catálogo) com as colunas de `EXPLANATION_COLUMNS`."""
+    recommendations = recommendations.copy()
+    explanations = explain_rows(index, ingredient_list, recommendations.index)
+    for key, column in EXPLANATION_COLUMNS.items():
+        recommendations[column] = [explanation[key] for explanation in explanations]
+    return recommendations
+
+
+def rows_to_frame(products_df: pd.DataFrame, rows: np.ndarray, scores: np.ndarray) -> pd.DataFrame:
+    """Linhas recomendadas do catálogo, com a coluna `similarity`."""
+    if len(rows) == 0:
+        return pd.DataFrame()
+
+    recommendations = products_df.iloc[rows].copy()
+    recommendations["similarity"] = scores
+    return recommendations
@@ -0,0 +1,250 @@
+"""
+Cache persistente em disco dos datasets já processados e dos índices derivados
+
+Os arrays numéricos (índice, preços) são guardados como ficheiros .npy e abertos
+com mmap só de leitura: vários processos no mesmo host partilham as mesmas
+páginas de memória em vez de terem cada um a sua cópia.
+
+Uso (pré-publicar o catálogo antes de arrancar os workers):
+
+    python -m src.core.store
+"""
+
+import argparse
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src import __version__
+from src.core.index import CatalogIndex
+
+# Incrementar quando o formato dos artefactos guardados mudar
+STORE_FORMAT = 6
+
+
+# Hash de cada ficheiro por (caminho, mtime, tamanho): cada artefacto de uma construção do
+# catálogo consulta as mesmas fontes, que assim só são lidas uma vez por versão
+_FILE_DIGESTS = {}
+_FILE_DIGESTS_LOCK = threading.Lock()
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 do conteúdo de um ficheiro, recalculado só quando o mtime ou o tamanho mudam."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    digest = _FILE_DIGESTS.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        with _FILE_DIGESTS_LOCK:
+            # Versões antigas do mesmo ficheiro já não serão pedidas
+            for old in [k for k in _FILE_DIGESTS if k[0] == key[0]]:
+                del _FILE_DIGESTS[old]
+            _FILE_DIGESTS[key] = digest
+    return digest
+
+
+def content_hash(paths: list, code_version: str = __version__) -> str:
+    """Hash do conteúdo dos ficheiros de origem e da versão do código."""
+    digest = hashlib.sha256(f"{code_version}:{STORE_FORMAT}".encode("utf-8"))
+    for path in paths:
+        digest.update(os.path.basename(path).encode("utf-8"))
+        digest.update(file_digest(path).encode("utf-8"))
+    return digest.hexdigest()[:24]
+
+
+def _atomic_write(path: str, write):
+    """Escreve via ficheiro temporário + rename, para que leitores nunca vejam ficheiros incompletos."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _publish_arrays(path: str, arrays: dict):
+    """Grava os arrays num diretório temporário e publica-o com um rename atómico."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.asarray(array), allow_pickle=False)
+        try:
+            os.replace(tmp_dir, path)
+        except OSError:
+            # Outro processo publicou a mesma versão primeiro
+            if not os.path.isdir(path):
+                raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _attach_arrays(path: str) -> dict:
+    """Abre os arrays publicados em `path` com mmap só de leitura."""
+    return {
+        filename[:-len(".npy")]: np.load(os.path.join(path, filename), mmap_mode="r", allow_pickle=False)
+        for filename in os.listdir(path) if filename.endswith(".npy")
+    }
+
+
+def _source_tag(paths: list) -> str:
+    """Identificador curto dos caminhos de origem (separa artefactos de CSVs diferentes)."""
+    joined = "|".join(os.path.abspath(path) for path in paths)
+    return hashlib.sha1(joined.encode("utf-8")).hexdigest()[:12]
+
+
+class DatasetStore:
+    """Diretório de artefactos (`<nome>/<origem>/<hash>.<ext>`), invalidados quando as fontes ou o código mudam.
+
+    Cada artefacto guarda apenas a versão mais recente das fontes (e as variantes dessa versão,
+    ex.: por delta aplicado); as anteriores são apagadas ao escrever.
+    """
+
+    def __init__(self, directory: str, code_version: str = __version__):
+        self.directory = directory
+        self.code_version = code_version
+
+    def _folder(self, name: str, sources: list) -> str:
+        return os.path.join(self.directory, name, _source_tag(sources))
+
+    def _prune(self, folder: str, keep: str):
+        """Apaga as entradas de `folder` que não são da versão `keep` (hash do conteúdo)."""
+        for filename in os.listdir(folder):
+            if not filename.startswith(keep) and not filename.endswith(".tmp"):
+                path = os.path.join(folder, filename)
+                try:
+                    if os.path.isdir(path):
+                        # Processos que ainda tenham o mmap aberto continuam a ler a versão antiga
+                        shutil.rmtree(path)
+                    else:
+                        os.remove(path)
+                except OSError:
+                    pass
+
+    def _load_or_build(self, name: str, sources: list, ext: str, build, load, dump):
+        folder = self._folder(name, sources)
+        key = content_hash(sources, self.code_version)
+        path = os.path.join(folder, f"{key}.{ext}")
+
+        if os.path.exists(path):
+            try:
+                return load(path)
+            except Exception:
+                # Artefacto corrompido ou de formato incompatível: reconstruir
+                pass
+
+        value = build()
+        try:
+            _atomic_write(path, lambda f: dump(value, f))
+            self._prune(folder, key)
+        except OSError:
+            # Sem permissões de escrita: continua a funcionar sem persistência
+            pass
+        return value
+
+    def frame(self, name: str, sources: list, build) -> pd.DataFrame:
+        """DataFrame guardado em disco, ou construído com `build()` e guardado."""
+        def load(path):
+            with open(path, "rb") as f:
+                return pickle.load(f)
+
+        def dump(df, f):
+            pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        return self._load_or_build(name, sources, "pkl", build, load, dump)
+
+    def arrays(self, name: str, sources: list, build, revision: str = "") -> dict:
+        """Arrays publicados em disco e abertos com mmap (só leitura), ou construídos com `build()`.
+
+        O primeiro processo a precisar deles publica-os; os restantes apenas os abrem.
+        `revision` distingue variantes da mesma versão das fontes (ex.: `Catalog.delta_key`).
+        """
+        folder = self._folder(name, sources)
+        base = content_hash(sources, self.code_version)
+        key = f"{base}-{revision}" if revision else base
+        path = os.path.join(folder, key)
+
+        if os.path.isdir(path):
+            try:
+                return _attach_arrays(path)
+            except (OSError, ValueError):
+                shutil.rmtree(path, ignore_errors=True)
+
+        arrays = build()
+        try:
+            _publish_arrays(path, arrays)
+            self._prune(folder, base)
+            return _attach_arrays(path)
+        except OSError:
+            return arrays
+
+    def published(self, name: str, sources: list):
+        """Arrays já publicados para o conteúdo atual das fontes (abertos com mmap), ou None; nunca os constrói."""
+        path = os.path.join(self._folder(name, sources), content_hash(sources, self.code_version))
+        if not os.path.isdir(path):
+            return None
+        try:
+            return _attach_arrays(path)
+        except (OSError, ValueError):
+            return None
+
+    def index(self, name: str, sources: list, build) -> CatalogIndex:
+        """Índice com os arrays partilhados via mmap, ou construído com `build()` e publicado."""
+        return CatalogIndex.from_arrays(self.arrays(name, sources, lambda: build().to_arrays()))
+
+    def clear(self, sources: list = None):
+        """Apaga os artefactos guardados (todos, ou só os gerados a partir de `sources`)."""
+        if not os.path.isdir(self.directory):
+            return
+        tag = _source_tag(sources) if sources is not None else None
+        for name in os.listdir(self.directory):
+            root = os.path.join(self.directory, name)
+            if not os.path.isdir(root):
+                continue
+            for source in os.listdir(root):
+                if tag is None or source == tag:
+                    shutil.rmtree(os.path.join(root, source), ignore_errors=True)
+
+
+def main(argv: list = None):
+    from src.config import DATA_PATHS, DATASET_CACHE_DIR
+    from src.core.catalog import load_catalog
+    from src.core.neighbors import publish_neighbors
+
+    parser = argparse.ArgumentParser(description="Publish the parsed catalog and its shared arrays")
+    parser.add_argument("--products", default=DATA_PATHS["products"])
+    parser.add_argument("--ingredients", default=DATA_PATHS["ingredients"])
+    parser.add_argument("--directory", default=DATASET_CACHE_DIR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes used to build the similar-products graph")
+    parser.add_argument("--skip-neighbors", action="store_true",
+                        help="do not build the similar-products graph (O(N²))")
+    args = parser.parse_args(argv)
+
+    store = DatasetStore(args.directory)
+    catalog = load_catalog(args.products, args.ingredients, store)
+    print(f"Published {catalog.index.n_products} products / {catalog.index.n_terms} ingredients "
+          f"to {args.directory}")
+
+    # Os cartões "Similar" só leem o grafo publicado; sem ele cada cartão calcula os vizinhos a pedido
+    if not args.skip_neighbors:
+        graph = publish_neighbors(catalog.index, store, [args.products], args.workers)
+        print(f"Published {len(graph.neighbors)} x {graph.k} neighbors to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
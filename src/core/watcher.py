@@ -0,0 +1,131 @@
+"""
+Recarregamento automático do catálogo quando os ficheiros de dados mudam
+"""
+
+import logging
+import threading
+
+import pandas as pd
+
+from src.core.cache import file_version
+from src.core.catalog import Catalog, load_catalog
+from src.core.store import DatasetStore
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogWatcher:
+    """Mantém o snapshot atual do catálogo e substitui-o quando os CSVs mudam.
+
+    Uma thread em segundo plano verifica o mtime/tamanho dos ficheiros; o novo catálogo
+    é construído fora do caminho dos pedidos e publicado com uma troca atómica de
+    referência. Até lá, as consultas continuam a usar o snapshot anterior. Os deltas
+    aplicados enquanto a recarga decorre são reaplicados ao novo snapshot antes da troca.
+    """
+
+    def __init__(self, products_path: str, ingredients_path: str, store: DatasetStore = None,
+                 interval: float = 2.0):
+        self.paths = {"products": products_path, "ingredients": ingredients_path}
+        self.store = store
+        self.interval = interval
+        self.swaps = 0
+
+        self._catalog = None
+        # Serializa a publicação de snapshots (recargas e deltas)
+        self._lock = threading.Lock()
+        # Deltas aplicados desde a última recarga publicada
+        self._deltas = []
+        self._pending_version = None
+        self._failed_version = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _load(self) -> Catalog:
+        return load_catalog(self.paths["products"], self.paths["ingredients"], self.store)
+
+    @property
+    def loaded(self) -> bool:
+        """True se já existe um snapshot (o próximo acesso a `catalog` não o constrói)."""
+        return self._catalog is not None
+
+    @property
+    def catalog(self) -> Catalog:
+        """Snapshot atual (carregado no primeiro acesso)."""
+        catalog = self._catalog
+        if catalog is None:
+            with self._lock:
+                if self._catalog is None:
+                    self._catalog = self._load()
+                catalog = self._catalog
+        return catalog
+
+    def check(self, wait_stable: bool = True) -> bool:
+        """Recarrega o catálogo se os ficheiros mudaram; retorna True se o snapshot foi trocado.
+
+        Com `wait_stable`, só recarrega quando a versão dos ficheiros se mantém entre duas
+        verificações seguidas, para não ler um CSV a meio de ser escrito.
+        """
+        current = self._catalog
+        if current is None:
+            return False
+
+        version = file_version(self.paths)
+        if version == current.base_version or version == self._failed_version:
+            self._pending_version = None
+            return False
+        if wait_stable and version != self._pending_version:
+            self._pending_version = version
+            return False
+
+        with self._lock:
+            start = len(self._deltas)
+
+        try:
+            catalog = self._load()
+            with self._lock:
+                # Os deltas que chegaram durante a recarga não estão no novo snapshot
+                pending = self._deltas[start:]
+                for delta in pending:
+                    catalog = catalog.apply_delta(delta)
+                self._catalog = catalog
+                self._deltas = pending
+        except Exception:
+            # Mantém o snapshot atual; volta a tentar quando os ficheiros mudarem de novo
+            logger.exception("Catalog reload failed; keeping version %s", current.version)
+            self._failed_version = version
+            return False
+
+        self._pending_version = None
+        self.swaps += 1
+        logger.info("Catalog reloaded: %s", catalog.version)
+        return True
+
+    def apply_delta(self, delta: pd.DataFrame) -> Catalog:
+        """Aplica alterações incrementais ao snapshot atual e publica o resultado."""
+        with self._lock:
+            if self._catalog is None:
+                self._catalog = self._load()
+            self._catalog = self._catalog.apply_delta(delta)
+            self._deltas.append(delta)
+            return self._catalog
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Catalog watcher check failed")
+
+    def start(self) -> "CatalogWatcher":
+        """Inicia a verificação periódica numa thread em segundo plano (idempotente)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="catalog-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
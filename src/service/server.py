@@ -0,0 +1,313 @@
+"""
+Serviço HTTP/JSON local para recomendações e pesquisa de ingredientes (sem Streamlit)
+
+Uso:
+
+    python -m src.service.server --port 8765
+
+Endpoints:
+
+    GET  /health
+    GET  /stats
+    POST /recommend            {"ingredients": [...] | "text": "...", "top_k": 5, "explain": true}
+    GET  /ingredients/lookup   ?name=glycerin
+    POST /ingredients/lookup   {"names": [...]}
+    POST /analyze              {"text": "...", "top_k": 5, "explain": true}
+    POST /catalog/delta        {"upsert": [{"product_url": ..., "price": ...}], "delete": ["<url>"]}
+
+Os endpoints POST aceitam também lotes: {"requests": [{...}, {...}]}.
+O endpoint /catalog/delta só existe com SERVICE_ENABLE_DELTA (src/config.py) ou --enable-delta.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from src.config import (
+    DATA_PATHS, DATASET_CACHE_DIR, HOT_RELOAD, PERSISTENT_CACHE, QUERY_COALESCE, RECOMMENDATION_CACHE_POLICY,
+    RECOMMENDATION_CACHE_SIZE, RELOAD_POLL_SECONDS, SERVICE_ENABLE_DELTA, SERVICE_HOST, SERVICE_MAX_BATCH,
+    SERVICE_MAX_BODY_BYTES, SERVICE_PORT, SERVICE_WORKERS, SIMILARITY_BACKEND
+)
+from src.core.analysis import analyze_ingredients
+from src.core.catalog import Catalog
+from src.core.data import delta_from_records
+from src.core.engine import QueryEngine
+from src.core.ingredients import parse_ingredient_list
+from src.core.store import DatasetStore
+from src.core.watcher import CatalogWatcher
+
+logger = logging.getLogger(__name__)
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error"
+}
+
+
+class BadRequest(ValueError):
+    """Pedido inválido (responde com 400)."""
+
+
+class RecommendationService:
+    """Lógica dos endpoints; partilha um único catálogo (e índice) entre todos os pedidos.
+
+    Com `hot_reload`, o catálogo é recarregado em segundo plano quando os CSVs mudam.
+    """
+
+    def __init__(self, products_path: str = DATA_PATHS["products"],
+                 ingredients_path: str = DATA_PATHS["ingredients"],
+                 max_batch: int = SERVICE_MAX_BATCH, hot_reload: bool = HOT_RELOAD):
+        self.max_batch = max_batch
+        # O cálculo já corre no pool do HTTPServer; o motor faz cache e agrupa consultas iguais em curso
+        self.engine = QueryEngine(
+            coalesce=QUERY_COALESCE,
+            cache_size=RECOMMENDATION_CACHE_SIZE,
+            cache_policy=RECOMMENDATION_CACHE_POLICY,
+            similarity=SIMILARITY_BACKEND
+        )
+        store = DatasetStore(DATASET_CACHE_DIR) if PERSISTENT_CACHE else None
+        self.watcher = CatalogWatcher(products_path, ingredients_path, store, interval=RELOAD_POLL_SECONDS)
+        # Carregar já no arranque, antes de aceitar pedidos
+        self.watcher.catalog
+        if hot_reload:
+            self.watcher.start()
+
+    @property
+    def catalog(self) -> Catalog:
+        """Snapshot atual; cada pedido usa o mesmo snapshot do início ao fim."""
+        return self.watcher.catalog
+
+    def reload(self):
+        """Recarrega o catálogo já se os ficheiros tiverem mudado (os deltas aplicados mantêm-se caso contrário)."""
+        self.watcher.check(wait_stable=False)
+
+    def apply_delta(self, payload: dict) -> dict:
+        """Aplica alterações incrementais (upsert/delete por `product_url`) e publica o novo snapshot."""
+        upserts = payload.get("upsert", [])
+        deletes = payload.get("delete", [])
+        if not isinstance(upserts, list) or not all(isinstance(u, dict) for u in upserts):
+            raise BadRequest("'upsert' must be a list of product objects")
+        if not isinstance(deletes, list) or not all(isinstance(d, str) for d in deletes):
+            raise BadRequest("'delete' must be a list of product URLs")
+        try:
+            delta = delta_from_records(upserts, deletes)
+        except (ValueError, SyntaxError) as e:
+            raise BadRequest(str(e))
+
+        catalog = self.watcher.apply_delta(delta)
+        return {"version": catalog.version, "revision": catalog.revision, "products": catalog.index.n_live}
+
+    def health(self) -> dict:
+        catalog = self.catalog
+        return {"status": "ok", "products": catalog.index.n_live, "version": catalog.version}
+
+    def stats(self) -> dict:
+        catalog = self.catalog
+        return {
+            "version": catalog.version,
+            "revision": catalog.revision,
+            "products": catalog.index.n_live,
+            "product_types": dict(catalog.type_counts.most_common()),
+            "top_ingredients": catalog.ingredient_counts(top_n=20),
+            "queries": self.engine.stats()
+        }
+
+    def _batch(self, payload: dict, handler) -> dict:
+        """Executa `handler` para um pedido simples ou para cada pedido de um lote (sobre o mesmo snapshot)."""
+        catalog = self.catalog
+        if "requests" in payload:
+            requests = payload["requests"]
+            if not isinstance(requests, list):
+                raise BadRequest("'requests' must be a list")
+            if len(requests) > self.max_batch:
+                raise BadRequest(f"batch too large (max {self.max_batch})")
+            return {"results": [handler(r, catalog) for r in requests]}
+        return handler(payload, catalog)
+
+    @staticmethod
+    def _top_k(payload: dict) -> int:
+        try:
+            top_k = int(payload.get("top_k", 5))
+        except (TypeError, ValueError):
+            raise BadRequest("'top_k' must be an integer")
+        if not 1 <= top_k <= 100:
+            raise BadRequest("'top_k' must be between 1 and 100")
+        return top_k
+
+    def _recommend_one(self, payload: dict, catalog: Catalog) -> dict:
+        if not isinstance(payload, dict):
+            raise BadRequest("each request must be a JSON object")
+        if "ingredients" in payload:
+            ingredients = payload["ingredients"]
+            if not isinstance(ingredients, list) or not all(isinstance(i, str) for i in ingredients):
+                raise BadRequest("'ingredients' must be a list of strings")
+        elif "text" in payload:
+            ingredients = parse_ingredient_list(payload["text"])
+        else:
+            raise BadRequest("provide 'ingredients' or 'text'")
+
+        explain = bool(payload.get("explain", False))
+        return {"recommendations": catalog.recommend_records(ingredients, self._top_k(payload), self.engine, explain)}
+
+    def _analyze_one(self, payload: dict, catalog: Catalog) -> dict:
+        if not isinstance(payload, dict) or not isinstance(payload.get("text"), str):
+            raise BadRequest("provide 'text' with the ingredient list")
+        return analyze_ingredients(catalog, payload["text"], self._top_k(payload), self.engine,
+                                   bool(payload.get("explain", False)))
+
+    def recommend(self, payload: dict) -> dict:
+        return self._batch(payload, self._recommend_one)
+
+    def analyze(self, payload: dict) -> dict:
+        return self._batch(payload, self._analyze_one)
+
+    def lookup(self, names: list) -> dict:
+        if len(names) > self.max_batch:
+            raise BadRequest(f"batch too large (max {self.max_batch})")
+        catalog = self.catalog
+        return {"results": {name: catalog.ingredient_info(name) for name in names}}
+
+
+class HTTPServer:
+    """Servidor HTTP/1.1 mínimo sobre asyncio (keep-alive, corpo JSON)."""
+
+    def __init__(self, service: RecommendationService, workers: int = SERVICE_WORKERS,
+                 enable_delta: bool = SERVICE_ENABLE_DELTA):
+        self.service = service
+        self.enable_delta = enable_delta
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="service")
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> tuple:
+        """Encaminha o pedido e retorna (status, payload)."""
+        url = urlsplit(target)
+        loop = asyncio.get_running_loop()
+
+        try:
+            payload = json.loads(body) if body else {}
+        except json.JSONDecodeError as e:
+            return 400, {"error": f"invalid JSON: {e}"}
+
+        def run(func, *args):
+            # O trabalho com o catálogo corre numa thread para não bloquear o event loop
+            return loop.run_in_executor(self.executor, func, *args)
+
+        try:
+            if url.path == "/health":
+                return 200, await run(self.service.health)
+
+            if url.path == "/stats":
+                return 200, await run(self.service.stats)
+
+            if url.path == "/ingredients/lookup":
+                if method == "GET":
+                    names = parse_qs(url.query).get("name", [])
+                elif method == "POST":
+                    names = payload.get("names", []) if isinstance(payload, dict) else None
+                else:
+                    return 405, {"error": "use GET or POST"}
+                if not isinstance(names, list) or not names:
+                    raise BadRequest("provide at least one ingredient name")
+                return 200, await run(self.service.lookup, names)
+
+            if url.path == "/catalog/delta" and not self.enable_delta:
+                return 403, {"error": "catalog deltas are disabled (SERVICE_ENABLE_DELTA)"}
+
+            routes = {
+                "/recommend": self.service.recommend,
+                "/analyze": self.service.analyze,
+                "/catalog/delta": self.service.apply_delta
+            }
+            if url.path in routes:
+                if method != "POST":
+                    return 405, {"error": "use POST"}
+                if not isinstance(payload, dict):
+                    raise BadRequest("body must be a JSON object")
+                return 200, await run(routes[url.path], payload)
+
+            return 404, {"error": f"unknown endpoint {url.path}"}
+        except BadRequest as e:
+            return 400, {"error": str(e)}
+        except Exception:
+            # O detalhe fica no log; o cliente recebe só uma mensagem genérica
+            logger.exception("Request %s %s failed", method, url.path)
+            return 500, {"error": "internal server error"}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                parts = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+
+                length = headers.get("content-length", "0")
+                if len(parts) != 3 or not length.isdigit():
+                    status, payload = 400, {"error": "malformed request"}
+                    keep_alive = False
+                elif int(length) > SERVICE_MAX_BODY_BYTES:
+                    status, payload = 413, {"error": "request body too large"}
+                    keep_alive = False
+                else:
+                    method, target, version = parts
+                    length = int(length)
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.dispatch(method, target, body)
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+                data = json.dumps(payload, default=str).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = SERVICE_HOST, port: int = SERVICE_PORT):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Serving on http://{host}:{port} ({self.service.catalog.index.n_products} products)")
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="Through the Label recommendation service")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS)
+    parser.add_argument("--enable-delta", action="store_true", default=SERVICE_ENABLE_DELTA,
+                        help="accept POST /catalog/delta (unauthenticated catalog writes)")
+    args = parser.parse_args(argv)
+
+    server = HTTPServer(RecommendationService(), workers=args.workers, enable_delta=args.enable_delta)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
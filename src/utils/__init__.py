@@ -2,12 +2,29 @@
 Utility modules for ingredient and product analysis
 """
 
-from .ingredient_utils import parse_ingredient_list, get_ingredient_info
-from .product_utils import recommend_products, load_products
+import importlib
+
+# Os submódulos só são importados quando uma função é usada,
+# para que páginas leves não carreguem pandas/plotly
+_LAZY_EXPORTS = {
+    'parse_ingredient_list': 'ingredient_utils',
+    'get_ingredient_info': 'ingredient_utils',
+    'resolve_ingredient': 'ingredient_utils',
+    'recommend_products': 'product_utils',
+    'load_products': 'product_utils'
+}
 
 __all__ = [
     'parse_ingredient_list',
     'get_ingredient_info',
+    'resolve_ingredient',
     'recommend_products',
     'load_products'
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        module = importlib.import_module(f".{_LAZY_EXPORTS[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,65 @@
+"""
+Utilitários de pré-agregação para manter os gráficos leves
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.config import MAX_CHART_MARKS, OTHER_LABEL
+
+
+def bin_numeric(values, bins: int = 30) -> pd.DataFrame:
+    """Agrupa uma série numérica em intervalos com np.histogram."""
+    array = pd.to_numeric(pd.Series(values), errors="coerce").dropna().to_numpy(dtype=float)
+
+    if array.size == 0:
+        return pd.DataFrame(columns=["bin_start", "bin_end", "bin_center", "count"])
+
+    counts, edges = np.histogram(array, bins=min(bins, MAX_CHART_MARKS))
+
+    return pd.DataFrame({
+        "bin_start": edges[:-1],
+        "bin_end": edges[1:],
+        "bin_center": (edges[:-1] + edges[1:]) / 2,
+        "count": counts
+    })
+
+
+def collapse_tail(counts: pd.Series, top_n: int, other_label: str = OTHER_LABEL) -> pd.Series:
+    """Mantém as `top_n` categorias e soma o resto numa categoria "Other"."""
+    top_n = max(1, min(top_n, MAX_CHART_MARKS - 1))
+    counts = counts.sort_values(ascending=False)
+
+    if len(counts) <= top_n:
+        return counts
+
+    head = counts.iloc[:top_n]
+    tail_total = counts.iloc[top_n:].sum()
+
+    return pd.concat([head, pd.Series({other_label: tail_total})])
+
+
+def aggregate_hierarchy(df: pd.DataFrame, outer: str, inner: str, top_outer: int,
+                        max_inner: int = 8, other_label: str = OTHER_LABEL) -> pd.DataFrame:
+    """Conta pares (outer, inner) para treemaps/sunbursts com número limitado de marcas.
+
+    Apenas as `top_outer` categorias externas são mantidas; dentro de cada uma,
+    as categorias internas além de `max_inner` são somadas em "Other". Os nós externos
+    também contam como marcas, por isso `top_outer` fica limitado a MAX_CHART_MARKS // 2.
+    """
+    if df.empty or outer not in df.columns or inner not in df.columns:
+        return pd.DataFrame(columns=[outer, inner, "count"])
+
+    top_outer = max(1, min(top_outer, MAX_CHART_MARKS // 2))
+    top = df[outer].value_counts().head(top_outer).index
+    pairs = df.loc[df[outer].isin(top)].groupby([outer, inner]).size().reset_index(name="count")
+
+    # Pais + filhos (incluindo o "Other" de cada pai) têm de caber em MAX_CHART_MARKS
+    children = max(1, min(max_inner + 1, (MAX_CHART_MARKS - len(top)) // max(len(top), 1)))
+    pairs = pairs.sort_values([outer, "count"], ascending=[True, False])
+    grouped = pairs.groupby(outer)
+    rank = grouped.cumcount()
+    keep = np.where(grouped[inner].transform("size") > children, children - 1, children)
+    pairs.loc[rank >= keep, inner] = other_label
+
+    return pairs.groupby([outer, inner], sort=False)["count"].sum().reset_index()
@@ -0,0 +1,91 @@
+"""
+Utilitários de cache para dados, figuras e resultados derivados
+"""
+
+from src.config import (
+    CACHE_BACKEND, CACHE_DIR, CACHE_TTL_SECONDS, DATA_PATHS, DATASET_CACHE_DIR, PERSISTENT_CACHE
+)
+from src.core.cache import CacheBackend, DiskBackend, LRUCache, MemoryBackend, cached, file_version
+from src.core.store import DatasetStore
+
+__all__ = [
+    "LRUCache",
+    "CacheBackend",
+    "StreamlitResourceBackend",
+    "make_backend",
+    "cached_loader",
+    "get_dataset_store",
+    "get_data_version"
+]
+
+_DATASET_STORE = DatasetStore(DATASET_CACHE_DIR) if PERSISTENT_CACHE else None
+
+
+class StreamlitResourceBackend(CacheBackend):
+    """Backend guardado no registo `st.cache_resource`: partilhado entre sessões, sem cópia.
+
+    É limpo também pela opção "Clear cache" do menu do Streamlit.
+    """
+
+    def __init__(self, name: str, ttl: float = None, max_size: int = 32):
+        import streamlit as st
+
+        @st.cache_resource(show_spinner=False)
+        def _store(store_name: str) -> MemoryBackend:
+            return MemoryBackend(max_size=max_size, ttl=ttl)
+
+        self.name = name
+        self._store = _store
+
+    def get(self, key, default=None):
+        return self._store(self.name).get(key, default)
+
+    def set(self, key, value):
+        self._store(self.name).set(key, value)
+
+    def clear(self):
+        self._store(self.name).clear()
+
+
+def _streamlit_running() -> bool:
+    """Indica se o código corre dentro de uma app Streamlit (e não num script/job)."""
+    try:
+        from streamlit.runtime import exists
+    except ImportError:
+        return False
+    return exists()
+
+
+def make_backend(name: str, kind: str = CACHE_BACKEND, ttl: float = CACHE_TTL_SECONDS) -> CacheBackend:
+    """Cria o backend de cache configurado para o loader `name`."""
+    if kind == "auto":
+        kind = "streamlit" if _streamlit_running() else "memory"
+
+    if kind == "memory":
+        return MemoryBackend(ttl=ttl)
+    if kind == "disk":
+        return DiskBackend(CACHE_DIR, name, ttl=ttl)
+    if kind == "streamlit":
+        return StreamlitResourceBackend(name, ttl=ttl)
+    raise ValueError(f"Unknown cache backend: {kind}")
+
+
+def cached_loader(name: str, kind: str = CACHE_BACKEND):
+    """Decorador de cache para loaders, com o backend escolhido no primeiro uso."""
+    return cached(lambda: make_backend(name, kind))
+
+
+def get_dataset_store() -> DatasetStore:
+    """Cache persistente dos datasets processados (None se desativado em config)."""
+    return _DATASET_STORE
+
+
+def get_data_version() -> str:
+    """Retorna a versão do snapshot atual do catálogo (ficheiros + revisão dos deltas aplicados)."""
+    from src.utils.catalog_utils import get_catalog
+
+    try:
+        return get_catalog().version
+    except Exception:
+        # Catálogo indisponível (ex.: CSV em falta): versão baseada apenas nos ficheiros
+        return file_version(DATA_PATHS)
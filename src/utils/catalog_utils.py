@@ -0,0 +1,117 @@
+"""
+Catálogo partilhado pela app: snapshot atual, recarregado em segundo plano quando os CSVs mudam
+"""
+
+import threading
+
+from src.config import (
+    DATA_PATHS, HOT_RELOAD, QUERY_COALESCE, QUERY_WORKERS, RECOMMENDATION_CACHE_POLICY, RECOMMENDATION_CACHE_SIZE,
+    RELOAD_POLL_SECONDS, SIMILARITY_BACKEND
+)
+from src.core.cache import LRUCache
+from src.core.catalog import Catalog
+from src.core.engine import QueryEngine
+from src.core.profiles import ProfileSpace, ProfileTable
+from src.core.watcher import CatalogWatcher
+from src.utils.cache_utils import get_dataset_store
+from src.utils.profiling_utils import PROFILER
+
+__all__ = [
+    "PROFILE_SPACE", "get_catalog_watcher", "reset_catalog_watcher", "get_catalog", "load_current_catalog",
+    "get_query_engine", "get_profile_table"
+]
+
+# Combinações de perfil pré-calculadas (opções de src/config.py)
+PROFILE_SPACE = ProfileSpace.from_config()
+
+_watcher = None
+_watcher_lock = threading.Lock()
+_engine = None
+_profile_tables = LRUCache(max_size=2)
+_profile_lock = threading.Lock()
+# Última tabela calculada, por versão base dos ficheiros (ponto de partida para os deltas seguintes)
+_latest_profile_table = {}
+
+
+def get_catalog_watcher() -> CatalogWatcher:
+    """Watcher do catálogo (um por processo); inicia a verificação periódica se HOT_RELOAD."""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = CatalogWatcher(
+                DATA_PATHS["products"],
+                DATA_PATHS["ingredients"],
+                store=get_dataset_store(),
+                interval=RELOAD_POLL_SECONDS
+            )
+            if HOT_RELOAD:
+                _watcher.start()
+    return _watcher
+
+
+def reset_catalog_watcher():
+    """Para o watcher atual; o próximo acesso cria outro com os DATA_PATHS atuais (usado nos benchmarks)."""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is not None:
+            _watcher.stop()
+            _watcher = None
+
+
+def load_current_catalog() -> tuple:
+    """(snapshot atual, hit): `hit` é False se o catálogo teve de ser construído neste pedido.
+
+    O resultado é registado no profiler como acesso ao cache "catalog"; as recargas feitas
+    pela thread do watcher não contam (o pedido recebe um snapshot já construído).
+    """
+    watcher = get_catalog_watcher()
+    hit = watcher.loaded
+    if not HOT_RELOAD and watcher.check(wait_stable=False):
+        # Sem thread de verificação: os ficheiros são confirmados (e recarregados) no próprio pedido
+        hit = False
+    catalog = watcher.catalog
+    PROFILER.record_cache("catalog", hit=hit)
+    return catalog, hit
+
+
+def get_catalog() -> Catalog:
+    """Snapshot atual do catálogo; nunca bloqueia à espera de uma recarga em curso."""
+    return load_current_catalog()[0]
+
+
+def get_query_engine() -> QueryEngine:
+    """Motor de consultas partilhado por todas as sessões (cache de resultados e agrupamento de consultas)."""
+    global _engine
+    with _watcher_lock:
+        if _engine is None:
+            _engine = QueryEngine(
+                max_workers=QUERY_WORKERS,
+                coalesce=QUERY_COALESCE,
+                cache_size=RECOMMENDATION_CACHE_SIZE,
+                cache_policy=RECOMMENDATION_CACHE_POLICY,
+                similarity=SIMILARITY_BACKEND
+            )
+    return _engine
+
+
+def get_profile_table(catalog: Catalog) -> ProfileTable:
+    """Tabela de recomendações por perfil do snapshot `catalog` (uma construção por versão).
+
+    Vem do DatasetStore (ver `python -m src.core.profiles`), com uma entrada por conjunto de
+    deltas aplicados; depois de deltas é atualizada a partir da tabela do snapshot anterior,
+    recalculando só as combinações afetadas pelos produtos alterados.
+    """
+    table = _profile_tables.get(catalog.version)
+    if table is None:
+        with _profile_lock:
+            table = _profile_tables.get(catalog.version)
+            if table is None:
+                revision, base = _latest_profile_table.get(catalog.base_version, (0, None))
+                if revision >= catalog.revision:
+                    base = None
+                sources = [DATA_PATHS["products"], DATA_PATHS["ingredients"]]
+                table = ProfileTable.load(catalog, PROFILE_SPACE, get_dataset_store(), sources, base=base)
+                _profile_tables.set(catalog.version, table)
+                _latest_profile_table.clear()
+                _latest_profile_table[catalog.base_version] = (catalog.revision, table)
+    return table
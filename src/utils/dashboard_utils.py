@@ -0,0 +1,70 @@
+"""
+Agregações usadas pelas secções do Dashboard
+"""
+
+import pandas as pd
+
+
+def compute_ingredient_stats(products_df: pd.DataFrame) -> dict:
+    """Calcula a frequência dos ingredientes em todo o catálogo."""
+    if products_df.empty or 'clean_ingreds' not in products_df.columns:
+        return {}
+
+    lists = products_df['clean_ingreds']
+    lists = lists[lists.map(lambda x: isinstance(x, list))]
+    all_ingredients = lists.explode().dropna()
+
+    if all_ingredients.empty:
+        return {}
+
+    counts = all_ingredients.value_counts()
+
+    return {
+        "counts": counts,
+        "total_unique": len(counts),
+        "total_mentions": len(all_ingredients),
+        "average_per_product": len(all_ingredients) / len(products_df)
+    }
+
+
+def compute_brand_stats(products_df: pd.DataFrame) -> dict:
+    """Calcula estatísticas de distribuição das marcas."""
+    if products_df.empty or 'brand_name' not in products_df.columns:
+        return {}
+
+    brand_counts = products_df['brand_name'].value_counts()
+
+    if brand_counts.empty:
+        return {}
+
+    return {
+        "counts": brand_counts,
+        "total_brands": len(brand_counts),
+        "largest_brand": brand_counts.index[0],
+        "largest_brand_count": int(brand_counts.values[0]),
+        "average_per_brand": brand_counts.mean(),
+        "top_10_share": brand_counts.head(10).sum() / brand_counts.sum() * 100,
+        "top_5_share": brand_counts.head(5).sum() / brand_counts.sum() * 100
+    }
+
+
+def compute_advanced_stats(products_df: pd.DataFrame, ingredients_df: pd.DataFrame,
+                           ingredient_goal: int = 5000) -> dict:
+    """Calcula os indicadores da secção de análise avançada."""
+    stats = {
+        "total_products": len(products_df),
+        "total_ingredients": len(ingredients_df)
+    }
+
+    if not products_df.empty and 'product_type' in products_df.columns:
+        stats["diversity_score"] = products_df['product_type'].nunique() / len(products_df) * 100
+
+    if not ingredients_df.empty:
+        # Assumindo ingredient_goal como meta
+        stats["coverage_score"] = min(len(ingredients_df) / ingredient_goal * 100, 100)
+
+    brand_stats = compute_brand_stats(products_df)
+    if brand_stats:
+        stats["brand_concentration"] = brand_stats["top_5_share"]
+
+    return stats
@@ -1,24 +1,60 @@
+import numpy as np
 import pandas as pd
-import ast
 import streamlit as st
 
+from src.config import COMPARE_MAX_PRODUCTS, DATA_PATHS
+from src.core.data import parse_prices, read_products
+from src.core.index import CatalogIndex
+from src.core.neighbors import NEIGHBORS_K
+from src.core.recommend import add_explanations, recommend
+from src.utils.cache_utils import cached_loader, get_dataset_store
+from src.core.profiles import ProfileTable
+from src.utils.catalog_utils import (
+    PROFILE_SPACE, get_catalog, get_profile_table, get_query_engine, load_current_catalog
+)
+from src.utils.profiling_utils import PROFILER, cache_lookup, profiled, record_cache_miss
 
-@st.cache_data(ttl=3600)
+__all__ = [
+    'load_products',
+    'parse_prices',
+    'recommend_products',
+    'concern_scores',
+    'flag_filter',
+    'ingredient_filter',
+    'ingredient_options',
+    'profile_recommendations',
+    'similar_products',
+    'compare_products',
+    'variant_filter',
+    'product_variants'
+]
+
+
+@cached_loader("products")
+def _read_products_cached(path: str) -> pd.DataFrame:
+    record_cache_miss("load_products")
+    store = get_dataset_store()
+    if store is None:
+        return read_products(path)
+    return store.frame("products", [path], lambda: read_products(path))
+
+
+@profiled("load_products")
 def load_products(path: str = "data/products.csv"):
-    """Carrega dados de produtos com cache para melhor performance."""
+    """Carrega dados de produtos com cache para melhor performance.
+
+    O catálogo configurado vem do snapshot atual (recarregado em segundo plano); outros
+    caminhos são lidos diretamente. O DataFrame é partilhado sem cópia entre chamadas:
+    use `.copy()` antes de o alterar.
+    """
     try:
-        df = pd.read_csv(path)
-        
-        # Process ingredient column if it exists
-        if 'clean_ingreds' in df.columns:
-            df["clean_ingreds"] = df["clean_ingreds"].apply(
-                lambda x: ast.literal_eval(x) if isinstance(x, str) else []
-            )
-            df["clean_ingreds"] = df["clean_ingreds"].apply(
-                lambda lst: [ing.strip().lower() for ing in lst] if isinstance(lst, list) else []
-            )
-        
-        return df
+        if path == DATA_PATHS["products"]:
+            # Hit/miss vêm de quem constrói o catálogo (o snapshot pode já estar carregado)
+            catalog, hit = load_current_catalog()
+            PROFILER.record_cache("load_products", hit=hit)
+            return catalog.live_products()
+        with cache_lookup("load_products"):
+            return _read_products_cached(path)
     except FileNotFoundError:
         st.error(f"Product database not found at {path}")
         return pd.DataFrame()
@@ -27,44 +63,158 @@ def load_products(path: str = "data/products.csv"):
         return pd.DataFrame()
 
 
-def recommend_products(ingredient_list: list, top_k: int = 3) -> pd.DataFrame:
-    """Recomenda produtos baseado em similaridade de ingredientes (Jaccard)."""
+load_products.clear = _read_products_cached.clear
+
+
+@profiled()
+def recommend_products(ingredient_list: list, top_k: int = 3, df: pd.DataFrame = None,
+                       explain: bool = False) -> pd.DataFrame:
+    """Recomenda produtos baseado em similaridade de ingredientes (Jaccard).
+    
+    `df` permite usar outro catálogo já carregado; por omissão usa load_products().
+    Com `explain`, acrescenta as colunas `shared_ingredients`, `only_in_query` e `only_in_product`.
+    """
     if not ingredient_list:
         return pd.DataFrame()
     
-    # Load products (with cache)
-    df = load_products()
+    # Shared catalog snapshot (products + index)
+    if df is None:
+        if load_products(DATA_PATHS["products"]).empty:
+            return pd.DataFrame()
+        return get_catalog().recommend(ingredient_list, top_k, engine=get_query_engine(), explain=explain)
     
     if df.empty or 'clean_ingreds' not in df.columns:
         return pd.DataFrame()
     
-    # Normalize input ingredients
-    user_set = set([i.strip().lower() for i in ingredient_list if i and i.strip()])
-    
-    if not user_set:
+    index = CatalogIndex.from_products(df)
+    recommendations = recommend(df, index, ingredient_list, top_k)
+    if explain and not recommendations.empty:
+        # O índice local usa posições de `df`, não os seus rótulos
+        positions = df.index.get_indexer(recommendations.index)
+        recommendations = add_explanations(recommendations.set_axis(positions), index, ingredient_list)
+        recommendations.index = df.index[positions]
+    return recommendations
+
+
+@profiled()
+def concern_scores(concerns: list, skin_type: str = None) -> pd.Series:
+    """Pontuação de cada produto para as preocupações (e tipo de pele) do perfil, pelos seus ingredientes.
+
+    A Series tem o índice do DataFrame de load_products(), por isso pode ser atribuída diretamente
+    a uma coluna (ou a um subconjunto filtrado) desse DataFrame.
+    """
+    catalog = get_catalog()
+    return pd.Series(catalog.concern_scores(concerns, skin_type), index=catalog.products.index)
+
+
+@profiled()
+def flag_filter(exclude=(), require=()) -> pd.Series:
+    """Máscara booleana dos produtos sem as flags `exclude` e com todas as `require` (ver src/core/flags.py).
+
+    Tal como `concern_scores`, usa o índice do DataFrame de load_products().
+    """
+    catalog = get_catalog()
+    return pd.Series(catalog.flag_mask(exclude, require), index=catalog.products.index)
+
+
+@profiled()
+def ingredient_filter(include=(), exclude=()) -> pd.Series:
+    """Máscara booleana dos produtos com todos os ingredientes `include` e nenhum dos `exclude`.
+
+    Avaliada sobre as posting lists do índice (ver src/core/query.py); tal como `flag_filter`,
+    usa o índice do DataFrame de load_products().
+    """
+    catalog = get_catalog()
+    mask = np.zeros(catalog.index.n_products, dtype=bool)
+    mask[catalog.ingredient_query(all_of=include, none_of=exclude)] = True
+    return pd.Series(mask, index=catalog.products.index)
+
+
+@profiled()
+def variant_filter() -> pd.Series:
+    """Máscara booleana com um produto por formulação (os outros tamanhos/variantes ficam de fora).
+
+    Tal como `flag_filter`, usa o índice do DataFrame de load_products().
+    """
+    catalog = get_catalog()
+    return pd.Series(catalog.canonical_mask, index=catalog.products.index)
+
+
+def product_variants(row: int) -> pd.DataFrame:
+    """Outros produtos ativos com a mesma formulação que `row` (ex.: outros tamanhos)."""
+    catalog = get_catalog()
+    if not 0 <= row < catalog.index.n_products:
         return pd.DataFrame()
-    
-    # Calculate Jaccard similarity
-    scores = []
-    for _, row in df.iterrows():
-        prod_set = set(row["clean_ingreds"]) if row["clean_ingreds"] else set()
-        
-        if not prod_set:
-            scores.append(0.0)
-        else:
-            intersection = len(user_set & prod_set)
-            union = len(user_set | prod_set)
-            similarity = intersection / union if union > 0 else 0.0
-            scores.append(similarity)
-    
-    # Add scores to dataframe
-    df_copy = df.copy()
-    df_copy["similarity"] = scores
-    
-    # Sort and return top K
-    recommendations = df_copy.sort_values(
-        by="similarity", 
-        ascending=False
-    ).head(top_k)
-    
+    return catalog.products.iloc[catalog.variants(row)]
+
+
+def ingredient_options() -> list:
+    """Ingredientes presentes no catálogo, do mais para o menos frequente (opções dos filtros)."""
+    return list(get_catalog().ingredient_counts())
+
+
+@profiled()
+def profile_recommendations(profile: dict, budget: float) -> pd.DataFrame:
+    """Top de produtos para um perfil guardado, lido da tabela pré-calculada (coluna `relevance_score`).
+
+    Perfis fora do espaço pré-calculado (ex.: opções que já não existem em config) são calculados na hora.
+    """
+    catalog = get_catalog()
+    key = PROFILE_SPACE.key(
+        profile.get('skin_type'), profile.get('concerns', []), profile.get('sensitivity'), profile.get('fragrance')
+    )
+    result = get_profile_table(catalog).lookup(key, budget)
+    if result is None:
+        result = ProfileTable.rank_profile(catalog, PROFILE_SPACE, key, budget)
+
+    rows, scores = result
+    recommendations = catalog.products.iloc[rows].copy()
+    recommendations['relevance_score'] = scores
     return recommendations
+
+
+@profiled()
+def similar_products(row: int, top_k: int = 3) -> pd.DataFrame:
+    """Produtos com ingredientes mais parecidos com o produto `row` (índice do DataFrame de load_products()).
+
+    Lidos do grafo kNN pré-calculado, se publicado (coluna `similarity`); entradas com o
+    mesmo nome do produto (duplicados no CSV) são omitidas.
+    """
+    catalog = get_catalog()
+    if not 0 <= row < catalog.index.n_products:
+        return pd.DataFrame()
+    rows, scores = catalog.similar_products(row, NEIGHBORS_K)
+    similar = catalog.products.iloc[rows].copy()
+    similar['similarity'] = scores
+    if 'product_name' in similar.columns:
+        similar = similar[similar['product_name'] != catalog.products['product_name'].iat[row]]
+    return similar.head(top_k)
+
+
+def _unique_labels(names: pd.Series, max_length: int = 40) -> list:
+    """Nomes curtos e únicos para os eixos dos gráficos (sufixo " #2", " #3"... nos repetidos)."""
+    labels = []
+    seen = {}
+    for name in names.fillna("Unknown Product").astype(str):
+        label = name if len(name) <= max_length else name[:max_length - 1] + "…"
+        seen[label] = seen.get(label, 0) + 1
+        labels.append(label if seen[label] == 1 else f"{label} #{seen[label]}")
+    return labels
+
+
+@profiled()
+def compare_products(rows: list) -> tuple:
+    """(similaridade, presença) de até COMPARE_MAX_PRODUCTS produtos (índice do DataFrame de load_products()).
+
+    `similaridade` é o Jaccard N×N e `presença` a matriz booleana N×ingredientes da união
+    dos seus ingredientes (do mais para o menos partilhado); as linhas (e as colunas da
+    similaridade) têm o nome de cada produto.
+    """
+    catalog = get_catalog()
+    rows = [row for row in dict.fromkeys(rows) if 0 <= row < catalog.index.n_products][:COMPARE_MAX_PRODUCTS]
+    terms, presence, similarity = catalog.compare_products(rows)
+    labels = _unique_labels(catalog.products['product_name'].iloc[rows]) if 'product_name' in catalog.products else rows
+    return (
+        pd.DataFrame(similarity, index=labels, columns=labels),
+        pd.DataFrame(presence.astype(bool), index=labels, columns=list(terms))
+    )
@@ -0,0 +1,249 @@
+"""
+Instrumentação leve dos caminhos críticos: contagem de chamadas, tempos e cache hits/misses
+"""
+
+import csv
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from src.config import DEBUG_ENV_VAR, PROFILE_LOG_DIR
+
+
+def _new_entry() -> dict:
+    return {"calls": 0, "total_s": 0.0, "max_s": 0.0, "hits": 0, "misses": 0}
+
+
+def _add_call(entry: dict, elapsed: float):
+    entry["calls"] += 1
+    entry["total_s"] += elapsed
+    entry["max_s"] = max(entry["max_s"], elapsed)
+
+
+def _as_rows(stats: dict) -> list:
+    rows = []
+    for name, entry in sorted(stats.items()):
+        calls, total_s, hits, misses = entry["calls"], entry["total_s"], entry["hits"], entry["misses"]
+        if calls == 0 and hits == 0 and misses == 0:
+            continue
+        rows.append({
+            "name": name,
+            "calls": calls,
+            "total_ms": total_s * 1000,
+            "mean_ms": total_s * 1000 / calls if calls else 0.0,
+            "max_ms": entry["max_s"] * 1000,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else None
+        })
+    return rows
+
+
+class ProfileRegistry:
+    """Registo global (por processo) de estatísticas de execução, thread-safe.
+
+    Além dos totais do processo, cada thread pode ter um coletor próprio (`start_rerun`):
+    o Streamlit executa cada rerun de uma sessão na sua thread, por isso o coletor só vê
+    o trabalho desse rerun e não o das outras sessões.
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _entry(self, name: str) -> dict:
+        if name not in self._stats:
+            self._stats[name] = _new_entry()
+        return self._stats[name]
+
+    def _rerun_entry(self, name: str):
+        rerun = getattr(self._local, "rerun", None)
+        if rerun is None:
+            return None
+        if name not in rerun:
+            rerun[name] = _new_entry()
+        return rerun[name]
+
+    def record_call(self, name: str, elapsed: float):
+        """Regista uma chamada e o respetivo tempo de parede."""
+        with self._lock:
+            _add_call(self._entry(name), elapsed)
+        rerun_entry = self._rerun_entry(name)
+        if rerun_entry is not None:
+            _add_call(rerun_entry, elapsed)
+
+    def record_cache(self, name: str, hit: bool):
+        """Regista um acesso ao cache."""
+        key = "hits" if hit else "misses"
+        with self._lock:
+            self._entry(name)[key] += 1
+        rerun_entry = self._rerun_entry(name)
+        if rerun_entry is not None:
+            rerun_entry[key] += 1
+        if not hit:
+            self._local.miss = True
+
+    def start_rerun(self):
+        """Começa (ou recomeça) o coletor da thread atual."""
+        self._local.rerun = {}
+
+    def stop_rerun(self):
+        """Desliga o coletor da thread atual."""
+        self._local.rerun = None
+
+    def rerun_rows(self) -> list:
+        """Retorna as estatísticas recolhidas pela thread atual desde `start_rerun`."""
+        return _as_rows(getattr(self._local, "rerun", None) or {})
+
+    def _take_miss_flag(self) -> bool:
+        miss = getattr(self._local, "miss", False)
+        self._local.miss = False
+        return miss
+
+    def snapshot(self) -> dict:
+        """Retorna uma cópia das estatísticas atuais."""
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._stats.items()}
+
+    def rows(self) -> list:
+        """Retorna os totais do processo como linhas."""
+        return _as_rows(self.snapshot())
+
+    def reset(self):
+        """Limpa todas as estatísticas."""
+        with self._lock:
+            self._stats.clear()
+
+
+PROFILER = ProfileRegistry()
+
+
+def profiled(name: str = None):
+    """Decorador que mede chamadas e tempo de uma função.
+
+    Os acessos a caches são registados explicitamente (`PROFILER.record_cache`, `cache_lookup`).
+    """
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                PROFILER.record_call(label, time.perf_counter() - start)
+
+        # Manter o .clear() das funções com cache
+        if hasattr(func, "clear"):
+            wrapper.clear = func.clear
+
+        return wrapper
+    return decorator
+
+
+def record_cache_miss(name: str):
+    """Marca a chamada atual como cache miss (usado dentro de funções com cache)."""
+    PROFILER.record_cache(name, hit=False)
+
+
+@contextmanager
+def cache_lookup(name: str):
+    """Conta um cache hit de `name` se o bloco não chamar `record_cache_miss` (ex.: loader com cache)."""
+    PROFILER._take_miss_flag()
+    try:
+        yield
+    finally:
+        if not PROFILER._take_miss_flag():
+            PROFILER.record_cache(name, hit=True)
+
+
+@contextmanager
+def profile_block(name: str):
+    """Context manager que mede o tempo de um bloco de código."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        PROFILER.record_call(name, time.perf_counter() - start)
+
+
+def export_profile(fmt: str = "json", directory: str = PROFILE_LOG_DIR) -> str:
+    """Grava as estatísticas atuais num ficheiro JSON ou CSV local e retorna o caminho."""
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(directory, f"profile-{stamp}.{fmt}")
+    rows = PROFILER.rows()
+
+    if fmt == "csv":
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else ["name"])
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"pid": os.getpid(), "timestamp": stamp, "stats": rows}, f, indent=2)
+
+    return path
+
+
+def debug_enabled() -> bool:
+    """O painel de debug só aparece com ?debug=1 no URL ou com a variável de ambiente definida."""
+    import streamlit as st
+
+    if os.environ.get(DEBUG_ENV_VAR) == "1":
+        return True
+    try:
+        return st.query_params.get("debug") == "1"
+    except Exception:
+        return False
+
+
+def start_rerun_profile():
+    """Reinicia o coletor desta execução da página (a thread do rerun), apenas em modo debug."""
+    if debug_enabled():
+        PROFILER.start_rerun()
+    else:
+        PROFILER.stop_rerun()
+
+
+def render_debug_panel():
+    """Mostra na sidebar os tempos desta execução e os totais do processo (apenas em modo debug)."""
+    import pandas as pd
+    import streamlit as st
+
+    if not debug_enabled():
+        return
+
+    with st.sidebar.expander("🛠️ Debug: performance", expanded=False):
+        st.markdown("**This rerun**")
+        st.dataframe(pd.DataFrame(PROFILER.rerun_rows()), use_container_width=True, hide_index=True)
+
+        st.markdown("**Process totals**")
+        st.dataframe(pd.DataFrame(PROFILER.rows()), use_container_width=True, hide_index=True)
+
+        from src.utils.catalog_utils import get_query_engine
+
+        query_stats = get_query_engine().stats()
+        st.markdown("**Recommendation queries**")
+        st.dataframe(
+            pd.DataFrame([{**{k: v for k, v in query_stats.items() if k != "cache"}, **query_stats.get("cache", {})}]),
+            use_container_width=True,
+            hide_index=True
+        )
+
+        col_json, col_csv, col_reset = st.columns(3)
+        with col_json:
+            if st.button("JSON", key="profile_export_json"):
+                st.caption(f"Saved to {export_profile('json')}")
+        with col_csv:
+            if st.button("CSV", key="profile_export_csv"):
+                st.caption(f"Saved to {export_profile('csv')}")
+        with col_reset:
+            if st.button("Reset", key="profile_reset"):
+                PROFILER.reset()
@@ -0,0 +1,113 @@
+"""
+Utilitários de arranque: imports pesados adiados, pré-aquecimento e relatório de tempos de import
+"""
+
+import importlib
+import logging
+import re
+import subprocess
+import sys
+import threading
+import types
+
+from src.config import DATA_PATHS, HEAVY_MODULES
+
+logger = logging.getLogger(__name__)
+
+
+class LazyModule(types.ModuleType):
+    """Módulo que só é importado no primeiro acesso a um atributo."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str):
+    """Retorna o módulo se já estiver carregado, senão um proxy que o importa quando for usado."""
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
+
+
+_warm_up_thread = None
+_warm_up_lock = threading.Lock()
+
+
+def _warm_up():
+    """Carrega o catálogo e os módulos pesados para que a primeira página seja rápida.
+
+    Só o snapshot que as páginas usam (produtos, nomes dos ingredientes, índice e textos em
+    mmap), com os loaders de `src.core`: a thread não tem ScriptRunContext, por isso não
+    usa os caches do Streamlit nem `st.error`. O watcher da app reutiliza o mesmo snapshot.
+    """
+    from src.core.catalog import load_catalog
+    from src.utils.cache_utils import get_dataset_store
+
+    try:
+        load_catalog(DATA_PATHS["products"], DATA_PATHS["ingredients"], get_dataset_store())
+    except Exception:
+        logger.exception("Catalog warm-up failed")
+
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+
+
+def start_warm_up() -> threading.Thread:
+    """Inicia o pré-aquecimento numa thread em segundo plano (apenas uma vez por processo)."""
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=_warm_up, name="warm-up", daemon=True)
+            _warm_up_thread.start()
+    return _warm_up_thread
+
+
+def import_time_report(modules: list = None) -> list:
+    """Mede o tempo de import a frio de cada módulo num processo novo (python -X importtime).
+
+    Retorna uma lista de dicionários ordenada do módulo mais lento para o mais rápido.
+    """
+    modules = modules or HEAVY_MODULES
+    report = []
+
+    for name in modules:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {name}"],
+            capture_output=True,
+            text=True
+        )
+        # Formato: "import time: self [us] | cumulative | imported package"
+        cumulative_us = None
+        for line in result.stderr.splitlines():
+            match = re.match(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)$", line)
+            if match and match.group(3) == name:
+                cumulative_us = int(match.group(2))
+
+        report.append({
+            "module": name,
+            "seconds": cumulative_us / 1e6 if cumulative_us is not None else None,
+            "ok": result.returncode == 0
+        })
+
+    return sorted(report, key=lambda r: r["seconds"] or 0, reverse=True)
+
+
+if __name__ == "__main__":
+    for row in import_time_report(sys.argv[1:] or None):
+        seconds = f"{row['seconds']:.3f}s" if row["seconds"] is not None else "failed"
+        print(f"{row['module']:<25} {seconds}")
@@ -2,11 +2,24 @@
 Utilitários para criação de visualizações e gráficos
 """
 
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import streamlit as st
+from __future__ import annotations
+
+from src.config import FIGURE_CACHE_SIZE, MAX_CHART_MARKS
+from src.core.cache import LRUCache
+from src.utils.profiling_utils import PROFILER, profile_block
+from src.utils.startup_utils import lazy_import
+
+# Plotly, pandas e os utilitários do catálogo (Streamlit, src.core) só são importados quando
+# o primeiro gráfico é construído
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
+pio = lazy_import("plotly.io")
+
+
+# Cache de figuras serializadas em JSON, chave: (versão dos dados, gráfico, parâmetros)
+_FIGURE_CACHE = LRUCache(max_size=FIGURE_CACHE_SIZE)
 
 
 def create_skin_type_distribution(df: pd.DataFrame, column: str = 'skin_type') -> go.Figure:
@@ -30,19 +43,20 @@ def create_skin_type_distribution(df: pd.DataFrame, column: str = 'skin_type') -
     return fig
 
 
-def create_product_type_chart(df: pd.DataFrame) -> go.Figure:
+def create_product_type_chart(df: pd.DataFrame, top_n: int = 10) -> go.Figure:
     """Cria gráfico de barras para tipos de produtos."""
     if df.empty or 'product_type' not in df.columns:
         return None
     
-    counts = df['product_type'].value_counts().head(10)
+    top_n = min(top_n, MAX_CHART_MARKS)
+    counts = df['product_type'].value_counts().head(top_n)
     
     fig = px.bar(
         x=counts.values,
         y=counts.index,
         orientation='h',
-        title="Top 10 Tipos de Produtos",
-        labels={'x': 'Quantidade', 'y': 'Tipo de Produto'},
+        title=f"Top {top_n} Product Types",
+        labels={'x': 'Count', 'y': 'Product Type'},
         color=counts.values,
         color_continuous_scale='Blues'
     )
@@ -52,20 +66,42 @@ def create_product_type_chart(df: pd.DataFrame) -> go.Figure:
     return fig
 
 
-def create_brand_distribution(df: pd.DataFrame, top_n: int = 15) -> go.Figure:
+def create_product_type_pie(df: pd.DataFrame, top_n: int = 8) -> go.Figure:
+    """Cria gráfico de pizza com a distribuição dos tipos de produtos."""
+    if df.empty or 'product_type' not in df.columns:
+        return None
+    
+    top_n = min(top_n, MAX_CHART_MARKS)
+    counts = df['product_type'].value_counts().head(top_n)
+    
+    fig = px.pie(
+        values=counts.values,
+        names=counts.index,
+        title=f"Product Type Distribution (Top {top_n})",
+        hole=0.4,
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+    
+    fig.update_layout(height=500)
+    
+    return fig
+
+
+def create_brand_distribution(df: pd.DataFrame, top_n: int = 15, color_scale: str = 'Viridis') -> go.Figure:
     """Cria gráfico de distribuição de marcas."""
     if df.empty or 'brand_name' not in df.columns:
         return None
     
+    top_n = min(top_n, MAX_CHART_MARKS)
     counts = df['brand_name'].value_counts().head(top_n)
     
     fig = px.bar(
         x=counts.index,
         y=counts.values,
-        title=f"Top {top_n} Marcas",
-        labels={'x': 'Marca', 'y': 'Número de Produtos'},
+        title=f"Top {top_n} Brands by Product Count",
+        labels={'x': 'Brand', 'y': 'Number of Products'},
         color=counts.values,
-        color_continuous_scale='Viridis'
+        color_continuous_scale=color_scale
     )
     
     fig.update_layout(
@@ -77,29 +113,100 @@ def create_brand_distribution(df: pd.DataFrame, top_n: int = 15) -> go.Figure:
     return fig
 
 
-def create_ingredient_frequency_chart(ingredients_list: list, top_n: int = 20) -> go.Figure:
-    """Cria gráfico de ingredientes mais comuns."""
-    if not ingredients_list:
+def create_brand_treemap(df: pd.DataFrame, top_n: int = 15) -> go.Figure:
+    """Cria treemap com o número de produtos das principais marcas."""
+    from src.utils.aggregation_utils import collapse_tail
+
+    if df.empty or 'brand_name' not in df.columns:
+        return None
+    
+    # As marcas fora do top são somadas num único retângulo "Other"
+    counts = collapse_tail(df['brand_name'].value_counts(), top_n)
+    
+    fig = px.treemap(
+        names=counts.index,
+        parents=["" for _ in counts.index],
+        values=counts.values,
+        title="Brand Distribution (Treemap)"
+    )
+    
+    fig.update_layout(height=500)
+    
+    return fig
+
+
+def create_brand_type_treemap(df: pd.DataFrame, top_brands: int = 10) -> go.Figure:
+    """Cria treemap de produtos por marca e tipo."""
+    from src.utils.aggregation_utils import aggregate_hierarchy
+
+    if df.empty or 'brand_name' not in df.columns or 'product_type' not in df.columns:
         return None
     
-    # Flatten lista de ingredientes
-    all_ingredients = []
-    for ing_list in ingredients_list:
-        if isinstance(ing_list, list):
-            all_ingredients.extend(ing_list)
+    top_brands = min(top_brands, MAX_CHART_MARKS // 2)
+    fig = px.treemap(
+        aggregate_hierarchy(df, 'brand_name', 'product_type', top_brands),
+        path=['brand_name', 'product_type'],
+        values='count',
+        title=f'Product Distribution by Brand and Type (Top {top_brands} Brands)',
+        color='count',
+        color_continuous_scale='Viridis'
+    )
     
-    if not all_ingredients:
+    fig.update_layout(height=600)
+    
+    return fig
+
+
+def create_brand_type_sunburst(df: pd.DataFrame, top_brands: int = 15) -> go.Figure:
+    """Cria sunburst de categorias de produtos por marca."""
+    from src.utils.aggregation_utils import aggregate_hierarchy
+
+    if df.empty or 'brand_name' not in df.columns or 'product_type' not in df.columns:
+        return None
+    
+    top_brands = min(top_brands, MAX_CHART_MARKS // 2)
+    fig = px.sunburst(
+        aggregate_hierarchy(df, 'brand_name', 'product_type', top_brands),
+        path=['brand_name', 'product_type'],
+        values='count',
+        title=f'Product Categories by Brand (Top {top_brands} Brands)',
+        color='count',
+        color_continuous_scale='RdYlGn'
+    )
+    
+    fig.update_layout(height=700)
+    
+    return fig
+
+
+def _ingredient_counts(ingredients_list) -> pd.Series:
+    """Frequência dos ingredientes de uma lista de listas, ou as contagens já calculadas (Series numérica)."""
+    if isinstance(ingredients_list, pd.Series) and pd.api.types.is_numeric_dtype(ingredients_list):
+        return ingredients_list.sort_values(ascending=False, kind="stable")
+    lists = pd.Series(ingredients_list, dtype=object)
+    lists = lists[lists.map(lambda x: isinstance(x, list))]
+    
+    return lists.explode().dropna().value_counts()
+
+
+def create_ingredient_frequency_chart(ingredients_list, top_n: int = 20) -> go.Figure:
+    """Cria gráfico de ingredientes mais comuns (a partir das listas ou das contagens, ver `_ingredient_counts`)."""
+    if ingredients_list is None or len(ingredients_list) == 0:
         return None
     
     # Contar frequência
-    ingredient_counts = pd.Series(all_ingredients).value_counts().head(top_n)
+    top_n = min(top_n, MAX_CHART_MARKS)
+    ingredient_counts = _ingredient_counts(ingredients_list).head(top_n)
+    
+    if ingredient_counts.empty:
+        return None
     
     fig = px.bar(
         x=ingredient_counts.values,
         y=ingredient_counts.index,
         orientation='h',
-        title=f"Top {top_n} Ingredientes Mais Comuns",
-        labels={'x': 'Frequência', 'y': 'Ingrediente'},
+        title=f"Top {top_n} Most Common Ingredients",
+        labels={'x': 'Frequency', 'y': 'Ingredient'},
         color=ingredient_counts.values,
         color_continuous_scale='Teal'
     )
@@ -109,6 +216,57 @@ def create_ingredient_frequency_chart(ingredients_list: list, top_n: int = 20) -
     return fig
 
 
+def create_ingredient_bubble_chart(ingredients_list, top_n: int = 30) -> go.Figure:
+    """Cria gráfico de bolhas com os ingredientes mais frequentes (listas ou contagens)."""
+    if ingredients_list is None or len(ingredients_list) == 0:
+        return None
+    
+    top_n = min(top_n, MAX_CHART_MARKS)
+    top = _ingredient_counts(ingredients_list).head(top_n)
+    
+    if top.empty:
+        return None
+    
+    fig = px.scatter(
+        x=range(len(top)),
+        y=top.values,
+        size=top.values,
+        text=top.index,
+        title=f"Top {top_n} Ingredients Bubble Chart",
+        labels={'x': '', 'y': 'Frequency'},
+        color=top.values,
+        color_continuous_scale='Viridis'
+    )
+    
+    fig.update_traces(textposition='top center')
+    fig.update_layout(height=500, showlegend=False, xaxis={'visible': False})
+    
+    return fig
+
+
+def create_completeness_chart(df: pd.DataFrame, top_n: int = 10) -> go.Figure:
+    """Cria gráfico com a percentagem de valores preenchidos por coluna."""
+    if df.empty:
+        return None
+    
+    top_n = min(top_n, MAX_CHART_MARKS)
+    completeness = (df.notna().mean() * 100).sort_values(ascending=False).head(top_n)
+    
+    fig = px.bar(
+        x=completeness.values,
+        y=completeness.index,
+        orientation='h',
+        title=f"Data Completeness by Field (Top {top_n})",
+        labels={'x': 'Completeness (%)', 'y': 'Field'},
+        color=completeness.values,
+        color_continuous_scale='RdYlGn'
+    )
+    
+    fig.update_layout(height=400, showlegend=False)
+    
+    return fig
+
+
 def create_concern_distribution(concerns_data: list) -> go.Figure:
     """Cria gráfico de preocupações de pele mais comuns."""
     if not concerns_data:
@@ -184,26 +342,104 @@ def create_similarity_comparison(products_df: pd.DataFrame) -> go.Figure:
     return fig
 
 
-def create_price_distribution(df: pd.DataFrame, price_column: str = 'price') -> go.Figure:
-    """Cria histograma de distribuição de preços."""
-    if df.empty or price_column not in df.columns:
+def create_similarity_heatmap(products_df: pd.DataFrame, rows: tuple = ()) -> go.Figure:
+    """Heatmap N×N do Jaccard entre os produtos `rows` (posições no catálogo)."""
+    from src.utils.product_utils import compare_products
+
+    similarity, _ = compare_products(list(rows))
+    if len(similarity) < 2:
         return None
     
-    # Remover valores nulos
-    prices = df[price_column].dropna()
+    labels = similarity.index.tolist()
+    fig = go.Figure(go.Heatmap(
+        z=similarity.to_numpy() * 100,
+        x=labels,
+        y=labels,
+        zmin=0,
+        zmax=100,
+        colorscale='Greens',
+        colorbar={'title': '%'},
+        # Valores nas células só enquanto forem legíveis
+        texttemplate='%{z:.0f}' if len(labels) <= 15 else None,
+        hovertemplate='%{y}<br>%{x}<br>Similarity: %{z:.1f}%<extra></extra>'
+    ))
+    
+    fig.update_layout(
+        title="Ingredient Similarity (Jaccard)",
+        height=max(400, 22 * len(labels) + 200),
+        xaxis_tickangle=-45,
+        yaxis_autorange='reversed'
+    )
     
-    if prices.empty:
+    return fig
+
+
+def create_ingredient_presence_heatmap(products_df: pd.DataFrame, rows: tuple = (),
+                                       top_n: int = MAX_CHART_MARKS) -> go.Figure:
+    """Heatmap produtos × ingredientes (união, os `top_n` mais partilhados) com a presença de cada um."""
+    from src.utils.product_utils import compare_products
+
+    _, presence = compare_products(list(rows))
+    if presence.empty:
         return None
     
-    fig = px.histogram(
-        prices,
-        nbins=30,
-        title="Distribuição de Preços",
-        labels={'value': 'Preço (CHF)', 'count': 'Frequência'},
-        color_discrete_sequence=['#3b82f6']
+    shown = presence.iloc[:, :min(top_n, MAX_CHART_MARKS)]
+    present = shown.to_numpy()
+    fig = go.Figure(go.Heatmap(
+        z=present.astype(int),
+        x=shown.columns.tolist(),
+        y=shown.index.tolist(),
+        zmin=0,
+        zmax=1,
+        colorscale=[[0, '#f3f4f6'], [1, '#10b981']],
+        showscale=False,
+        xgap=1,
+        ygap=1,
+        customdata=np.where(present, 'contains', 'does not contain'),
+        hovertemplate='%{y}<br>%{customdata} %{x}<extra></extra>'
+    ))
+    
+    fig.update_layout(
+        title=f"Ingredient Presence ({shown.shape[1]} of {presence.shape[1]} ingredients)",
+        height=max(400, 22 * len(shown) + 250),
+        xaxis_tickangle=-45,
+        yaxis_autorange='reversed'
     )
     
-    fig.update_layout(height=400, showlegend=False)
+    return fig
+
+
+def create_price_distribution(df: pd.DataFrame, price_column: str = 'price', bins: int = 30) -> go.Figure:
+    """Cria histograma de distribuição de preços, agregado no servidor."""
+    from src.utils.aggregation_utils import bin_numeric
+    from src.core.data import parse_prices
+
+    if df.empty or price_column not in df.columns:
+        return None
+    
+    # Agrupar os preços em intervalos antes de enviar ao browser
+    binned = bin_numeric(parse_prices(df[price_column]), bins=bins)
+    
+    if binned.empty:
+        return None
+    
+    fig = go.Figure(go.Bar(
+        x=binned['bin_center'],
+        y=binned['count'],
+        width=binned['bin_end'] - binned['bin_start'],
+        customdata=binned[['bin_start', 'bin_end']],
+        hovertemplate='%{customdata[0]:.2f} - %{customdata[1]:.2f}<br>%{y} products<extra></extra>',
+        marker_color='#3b82f6'
+    ))
+    
+    fig.update_layout(
+        title="Price Distribution",
+        xaxis_title="Price (£)",
+        yaxis_title="Frequency",
+        bargap=0,
+        height=400,
+        showlegend=False
+    )
     
     return fig
 
@@ -262,3 +498,53 @@ def create_gauge_chart(value: float, title: str, max_value: float = 100) -> go.F
     fig.update_layout(height=300)
     
     return fig
+
+
+# Gráficos calculados sobre o catálogo completo e que podem ser guardados em cache
+FIGURE_BUILDERS = {
+    "product_types_bar": create_product_type_chart,
+    "product_types_pie": create_product_type_pie,
+    "brand_bar": create_brand_distribution,
+    "brand_treemap": create_brand_treemap,
+    "brand_type_treemap": create_brand_type_treemap,
+    "brand_type_sunburst": create_brand_type_sunburst,
+    "ingredient_frequency": create_ingredient_frequency_chart,
+    "ingredient_bubble": create_ingredient_bubble_chart,
+    "completeness": create_completeness_chart,
+    "price_distribution": create_price_distribution,
+    "similarity_heatmap": create_similarity_heatmap,
+    "ingredient_presence": create_ingredient_presence_heatmap,
+}
+
+
+def get_cached_figure(chart_name: str, data, **params) -> go.Figure:
+    """Retorna um gráfico do catálogo a partir do cache, construindo-o apenas uma vez por versão dos dados.
+    
+    `data` deve ser o catálogo completo carregado de DATA_PATHS, pois a chave do
+    cache usa a versão dos ficheiros de dados e não o conteúdo recebido.
+    """
+    from src.utils.cache_utils import get_data_version
+
+    label = f"figure:{chart_name}"
+    key = (get_data_version(), chart_name, tuple(sorted(params.items())))
+    
+    with profile_block(label):
+        fig_json = _FIGURE_CACHE.get(key)
+        PROFILER.record_cache(label, hit=fig_json is not None)
+        
+        if fig_json is None:
+            with profile_block(f"build:{chart_name}"):
+                fig = FIGURE_BUILDERS[chart_name](data, **params)
+                # String vazia indica que o gráfico não pode ser construído com estes dados
+                fig_json = fig.to_json() if fig is not None else ""
+            _FIGURE_CACHE.set(key, fig_json)
+        
+        if not fig_json:
+            return None
+        
+        return pio.from_json(fig_json)
+
+
+def clear_figure_cache():
+    """Limpa o cache de gráficos."""
+    _FIGURE_CACHE.clear()
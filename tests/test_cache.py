@@ -0,0 +1,71 @@
+"""
+Política de remoção do LFUCache (src.core.cache)
+"""
+
+from src.core.cache import LFUCache
+
+
+def test_evicts_least_frequently_used():
+    cache = LFUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.evictions == 1
+
+
+def test_ties_evict_the_oldest_key():
+    cache = LFUCache(max_size=3)
+    for key in "abc":
+        cache.set(key, key)
+    for key in "cab":
+        cache.get(key)
+    # Todas com frequência 2: sai a que foi usada há mais tempo
+    cache.set("d", "d")
+    assert "c" not in cache
+    assert len(cache) == 3
+
+
+def test_new_keys_reset_the_minimum_frequency():
+    cache = LFUCache(max_size=2)
+    cache.set("a", 1)
+    for _ in range(3):
+        cache.get("a")
+    cache.set("b", 2)
+    cache.set("c", 3)
+    assert "a" in cache and "c" in cache and "b" not in cache
+
+
+def test_update_keeps_value_and_counts_as_use():
+    cache = LFUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 10)
+    cache.set("c", 3)
+    assert cache.get("a") == 10
+    assert "b" not in cache
+
+
+def test_missing_keys_return_default():
+    cache = LFUCache(max_size=2)
+    assert cache.get("missing") is None
+    assert cache.get("missing", 0) == 0
+
+
+def test_zero_size_stores_nothing():
+    cache = LFUCache(max_size=0)
+    cache.set("a", 1)
+    assert len(cache) == 0
+
+
+def test_clear():
+    cache = LFUCache(max_size=2)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.clear()
+    assert len(cache) == 0
+    cache.set("b", 2)
+    cache.set("c", 3)
+    cache.set("d", 4)
+    assert "b" not in cache and len(cache) == 2
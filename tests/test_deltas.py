@@ -0,0 +1,137 @@
+"""
+Deltas do catálogo (Catalog.apply_delta, CatalogIndex.apply_changes) contra uma reconstrução completa
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.catalog import Catalog
+from src.core.data import delta_from_records, read_ingredients, read_products
+from src.core.dedup import ProductClusters
+from src.core.index import CatalogIndex
+from src.core.profiles import ProfileSpace, ProfileTable
+
+QUERIES = [
+    ["aqua", "glycerin", "niacinamide", "phenoxyethanol"],
+    ["aqua", "parfum", "dimethicone"],
+    ["retinol", "squalane"],
+    ["glycerin", "brand new ingredient"],
+]
+
+
+@pytest.fixture(scope="module")
+def base():
+    products = read_products("data/products.csv").head(300)
+    return Catalog(products, read_ingredients("data/ingredients_dict.csv"), "test")
+
+
+def _deltas(products: pd.DataFrame) -> list:
+    """Sequência de upserts, inserções e remoções sobre os produtos de `products`."""
+    urls = products["product_url"].tolist()
+    first = products.iloc[0]
+    return [
+        # Upsert parcial: só o preço muda
+        delta_from_records(upserts=[{"product_url": urls[1], "price": "£1.00"}]),
+        # Produtos novos: uma variante de um produto existente e um com um ingrediente novo
+        delta_from_records(upserts=[
+            {"product_url": "https://example.com/variant", "product_name": f"{first['product_name']} 100ml",
+             "product_type": first["product_type"], "clean_ingreds": list(first["clean_ingreds"]),
+             "price": "£30.00"},
+            {"product_url": "https://example.com/new", "product_name": "New Serum", "product_type": "Serum",
+             "clean_ingreds": ["aqua", "glycerin", "brand new ingredient"], "price": "£12.50"},
+        ]),
+        # Remoções, incluindo o canónico da variante acabada de inserir
+        delta_from_records(deletes=[urls[0], urls[2], urls[3]]),
+        # Upsert que troca os ingredientes e o tipo de um produto existente
+        delta_from_records(upserts=[{"product_url": urls[4], "product_type": "Toner",
+                                     "clean_ingreds": ["aqua", "niacinamide", "glycerin"]}]),
+        # Remover um produto inserido por um delta anterior
+        delta_from_records(deletes=["https://example.com/new"]),
+    ]
+
+
+@pytest.fixture(scope="module")
+def updated(base):
+    catalog = base
+    for delta in _deltas(base.products):
+        catalog = catalog.apply_delta(delta)
+    return catalog
+
+
+@pytest.fixture(scope="module")
+def rebuilt(base, updated):
+    return Catalog(updated.live_products().reset_index(drop=True), base.ingredients, "rebuilt",
+                   ingredient_texts=base.ingredient_texts)
+
+
+def _live_rows(catalog: Catalog) -> np.ndarray:
+    return np.flatnonzero(catalog.index.live_mask())
+
+
+def test_base_snapshot_is_not_modified(base, updated):
+    assert base.index.n_live == 300
+    assert updated.revision == 5
+    assert updated.index.n_live == 300 + 2 - 3 - 1
+    assert len(updated.products) == 300 + 1 + 2 + 1
+
+
+def test_posting_lists_match_rebuild(updated, rebuilt):
+    live_rows = _live_rows(updated)
+    rebuilt_terms = set(rebuilt.index.terms.tolist())
+    for term, term_id in updated.index.vocab.items():
+        postings = updated.index.postings(term_id)
+        if term not in rebuilt_terms:
+            assert len(postings) == 0
+            continue
+        expected = live_rows[rebuilt.index.postings(rebuilt.index.vocab[term])]
+        np.testing.assert_array_equal(postings, expected)
+
+
+def test_product_rows_match_rebuild(updated, rebuilt):
+    live_rows = _live_rows(updated)
+    for row, updated_row in enumerate(live_rows):
+        expected = set(rebuilt.index.terms[rebuilt.index.product_ids(row)].tolist())
+        assert set(updated.index.terms[updated.index.product_ids(updated_row)].tolist()) == expected
+    assert (updated.index.sizes[~updated.index.live_mask()] == 0).all()
+
+
+def test_aggregates_match_rebuild(updated, rebuilt):
+    assert updated.type_counts == rebuilt.type_counts
+    np.testing.assert_array_equal(updated.prices[_live_rows(updated)], rebuilt.prices)
+    assert updated.index.n_live == rebuilt.index.n_products
+
+
+def test_clusters_match_rebuild(updated, rebuilt):
+    live_rows = _live_rows(updated)
+    np.testing.assert_array_equal(updated.clusters.canonical[live_rows], live_rows[rebuilt.clusters.canonical])
+
+
+def test_recommendations_match_rebuild(updated, rebuilt):
+    for query in QUERIES:
+        expected = rebuilt.recommend_records(query, top_k=5)
+        assert updated.recommend_records(query, top_k=5) == expected
+
+
+def test_index_apply_changes_matches_from_lists():
+    lists = [["a", "b"], ["b", "c"], ["c", "d", "a"], []]
+    index = CatalogIndex.from_lists(lists).apply_changes([1, 3], [["e", "a"], ["b"]])
+    rebuilt = CatalogIndex.from_lists([lists[0], lists[2], ["e", "a"], ["b"]])
+    live_rows = np.flatnonzero(index.live_mask())
+    np.testing.assert_array_equal(live_rows, [0, 2, 4, 5])
+    for term, term_id in rebuilt.vocab.items():
+        np.testing.assert_array_equal(index.postings(index.vocab[term]), live_rows[rebuilt.postings(term_id)])
+
+
+def test_product_clusters_extended_matches_build(base, updated):
+    extended = ProductClusters.build(base.index).extended(updated.index)
+    np.testing.assert_array_equal(extended.canonical, ProductClusters.build(updated.index).canonical)
+
+
+def test_profile_table_extended_matches_build(base, updated):
+    space = ProfileSpace.from_config()
+    extended = ProfileTable.build(base, space).extended(updated)
+    built = ProfileTable.build(updated, space)
+    np.testing.assert_array_equal(extended.offsets, built.offsets)
+    np.testing.assert_array_equal(extended.rows, built.rows)
+    np.testing.assert_array_equal(extended.scores, built.scores)
@@ -0,0 +1,58 @@
+"""
+Pesquisa aproximada e por substring (src.core.fuzzy) contra a pesquisa linear no dicionário
+"""
+
+import pytest
+
+from src.core.data import read_ingredients
+from src.core.fuzzy import FuzzyIndex, SubstringIndex, edit_distance
+
+
+@pytest.fixture(scope="module")
+def names():
+    return read_ingredients("data/ingredients_dict.csv")["name_clean"].dropna().tolist()
+
+
+def _misspellings(names):
+    """Erros de escrita dos nomes do dicionário (letra apagada, trocada, substituída, a mais)."""
+    words = ["xyz", "aqau", ""]
+    for name in names[::5]:
+        words += [name[:1] + name[2:], name[:2] + name[3:4] + name[2:3] + name[4:], name[:-1] + "x", name + "s"]
+    return words
+
+
+def _linear_lookup(terms, counts, word, limit, max_distance):
+    matches = [(edit_distance(word, term, max_distance), -counts.get(term, 0), term) for term in set(terms)]
+    return [(term, distance) for distance, _, term in sorted(m for m in matches if m[0] <= max_distance)[:limit]]
+
+
+def test_edit_distance():
+    assert edit_distance("glycerin", "glycerin", 2) == 0
+    assert edit_distance("glycerin", "glycerine", 2) == 1
+    assert edit_distance("aqua", "aqau", 2) == 1
+    assert edit_distance("retinol", "retinyl", 2) == 1
+    assert edit_distance("niacinamide", "amide", 2) == 3
+
+
+def test_fuzzy_lookup_matches_linear_scan(names):
+    counts = {name: len(name) % 7 for name in names}
+    index = FuzzyIndex(names, counts)
+    for word in _misspellings(names):
+        for max_distance in (1, 2):
+            expected = _linear_lookup(names, counts, word, 5, max_distance)
+            assert index.lookup(word, limit=5, max_distance=max_distance) == expected
+
+
+def test_fuzzy_lookup_edge_cases():
+    index = FuzzyIndex(["aqua", "", "glycerin"])
+    assert len(index) == 2
+    assert index.lookup("") == []
+    assert index.lookup("aqua") == [("aqua", 0)]
+
+
+def test_substring_index_matches_linear_scan(names):
+    index = SubstringIndex(names)
+    texts = ["", "a", "gl", "acid", "glycerin", "sodium hyal", "extract", "zzz", names[-1]]
+    for text in texts:
+        expected = next((i for i, name in enumerate(names) if text in name), None)
+        assert index.first(text) == expected
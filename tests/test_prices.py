@@ -0,0 +1,40 @@
+"""
+Conversão dos preços do catálogo (src.core.data.parse_prices)
+"""
+
+import math
+
+import pandas as pd
+
+from src.core.data import parse_prices, read_products
+
+
+def test_catalog_price_formats():
+    prices = parse_prices(pd.Series(["£9.99", "£24.50", "£105.00", "£0.95"]))
+    assert prices.tolist() == [9.99, 24.5, 105.0, 0.95]
+
+
+def test_thousands_separator_and_ranges_use_first_number():
+    prices = parse_prices(pd.Series(["£1,299.00", "£1,299.00 - £1,499.00", "£12 - £15"]))
+    assert prices.tolist() == [1299.0, 1299.0, 12.0]
+
+
+def test_unit_prices_ignore_the_unit():
+    prices = parse_prices(pd.Series(["£5.20/100ml", "£3.75 per 50ml"]))
+    assert prices.tolist() == [5.2, 3.75]
+
+
+def test_missing_or_non_numeric_prices_are_nan():
+    prices = parse_prices(pd.Series(["", "N/A", None], dtype=object))
+    assert all(math.isnan(p) for p in prices)
+
+
+def test_numeric_series_pass_through():
+    assert parse_prices(pd.Series([1, 2.5])).tolist() == [1.0, 2.5]
+
+
+def test_every_price_in_the_shipped_catalog_parses():
+    products = read_products("data/products.csv")
+    prices = parse_prices(products["price"])
+    assert prices.notna().all()
+    assert (prices > 0).all()